@@ -3,12 +3,16 @@ FastAPI application for GoalPilot
 Provides HTTP endpoints for AI-powered financial planning
 """
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timezone
+import asyncio
+import json
 import uvicorn
 
-from src.models.agent import goal_planning_graph
+from src.models.agent import async_goal_planning_graph, plan_event_sink
+from src.features.plan_cache import plan_cache
 from src.utils.logger import logger
 from src.utils.config import settings
 from src.monitoring.metrics_tracker import metrics
@@ -76,12 +80,14 @@ class PlanResponse(BaseModel):
     """Response containing the generated plan"""
     goal: str
     goal_type: str
+    parameters: Dict[str, Any] = {}
     summary: str
     plan_steps: List[PlanStep]
     api_data: Dict[str, Any]
     confidence_score: float
     eval_pass: bool
     timestamp: str
+    cache: str = "miss"  # "exact" / "similar": served from the plan cache, agent not run
     
 class HealthResponse(BaseModel):
     """Health check response"""
@@ -137,6 +143,8 @@ async def get_metrics():
                 "average_quality_score": round(avg_quality, 2),
                 "uptime_since": (app_start_time or datetime.now(timezone.utc)).isoformat(),
             },
+            "plan_cache": {**plan_cache.stats, "entries": len(plan_cache)},
+            "llm": metrics.get_llm_metrics(),
             "okr_dashboard": {
                 "goal": "Generate 100 successful financial plans",
                 "current_progress": successful_plans,
@@ -173,6 +181,59 @@ async def get_metrics():
         }
         return JSONResponse(content=error_response, status_code=500)
 
+def _initial_state(request: PlanRequest) -> Dict[str, Any]:
+    """Agent state for a new plan"""
+    return {
+        "goal": request.goal,
+        "user_profile": request.user_profile,
+        "analysis": "",
+        "goal_type": "general",
+        "parameters": {},
+        "tool_calls": [],
+        "api_data": {},
+        "plan_steps": [],
+        "summary": "",
+        "confidence_score": 0.0,
+        "eval_pass": False,
+        "error": ""
+    }
+
+def _record_success(result: Dict[str, Any]):
+    """Update metrics and the OKR counters for a successful plan"""
+    global successful_plans, quality_scores
+    
+    # Record successful plan
+    eval_score = result.get("confidence_score", 1.0)
+    metrics.record_request(success=True, eval_score=eval_score)
+    
+    # Track success metrics
+    try:
+        successful_plans += 1
+        conf = result.get("confidence_score", 0)
+        if conf and isinstance(conf, (int, float)) and conf > 0:
+            quality_scores.append(float(conf))
+        logger.info(f"Metrics updated: {successful_plans} successful")
+    except Exception as e:
+        logger.error(f"Failed to update metrics: {e}")
+
+def _plan_response(result: Dict[str, Any], cache: str = "miss") -> PlanResponse:
+    """Final agent state -> PlanResponse (stamped now; the result itself is left as is for the plan cache)"""
+    return PlanResponse(**{**result, "timestamp": datetime.now(timezone.utc).isoformat(), "cache": cache})
+
+def _cached_plan(request: PlanRequest) -> Tuple[Optional[Dict[str, Any]], str]:
+    """(agent result, cache status) from the plan cache, for the requested goal"""
+    if not settings.plan_cache_enabled:
+        return None, "miss"
+    cached, status = plan_cache.lookup(request.goal, request.user_profile)
+    if cached is None:
+        return None, status
+    logger.info(f"Plan served from cache ({status})")
+    return {**cached, "goal": request.goal}, status
+
+def _cache_plan(request: PlanRequest, result: Dict[str, Any]):
+    if settings.plan_cache_enabled:
+        plan_cache.store(request.goal, request.user_profile, result)
+
 @app.post("/plan", response_model=PlanResponse)
 async def generate_plan(request: PlanRequest):
     """
@@ -192,24 +253,18 @@ async def generate_plan(request: PlanRequest):
     logger.info(f"Plan requested: {request.goal[:50]}...")
     
     try:
+        # Repeated and near-identical goals skip the agent entirely
+        cached, cache_status = _cached_plan(request)
+        if cached is not None:
+            _record_success(cached)
+            return _plan_response(cached, cache_status)
+        
         # Prepare agent state
-        initial_state = {
-            "goal": request.goal,
-            "user_profile": request.user_profile,
-            "analysis": "",
-            "goal_type": "general",
-            "tool_calls": [],
-            "api_data": {},
-            "plan_steps": [],
-            "summary": "",
-            "confidence_score": 0.0,
-            "eval_pass": False,
-            "error": ""
-        }
+        initial_state = _initial_state(request)
         
-        # Run the agent
+        # Run the agent (async nodes: Bedrock and market-data waits don't block other requests)
         logger.info("Invoking LangGraph agent...")
-        result = goal_planning_graph.invoke(initial_state)
+        result = await async_goal_planning_graph.ainvoke(initial_state)
         
         # Check for errors
         if result.get("error"):
@@ -231,26 +286,10 @@ async def generate_plan(request: PlanRequest):
         
         logger.info(f"Plan generated: {len(plan_steps)} steps")
         
-        # Record successful plan
-        eval_score = result.get("confidence_score", 1.0)
-        metrics.record_request(success=True, eval_score=eval_score)
-        
-        # Track success metrics
-        try:
-            global successful_plans, failed_plans, quality_scores
-            successful_plans += 1
-            conf = result.get("confidence_score", 0)
-            if conf and isinstance(conf, (int, float)) and conf > 0:
-                quality_scores.append(float(conf))
-            logger.info(f"Metrics updated: {successful_plans} successful")
-        except Exception as e:
-            logger.error(f"Failed to update metrics: {e}")
-        
-        # Ensure timestamp is included
-        if 'timestamp' not in result:
-            result['timestamp'] = datetime.now(timezone.utc).isoformat()
-        
-        return PlanResponse(**result)
+        _record_success(result)
+        response = _plan_response(result)
+        _cache_plan(request, result)
+        return response
         
     except HTTPException:
         # Track failure for HTTP exceptions
@@ -268,6 +307,99 @@ async def generate_plan(request: PlanRequest):
             pass
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+def _node_event(node: str, update: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact progress payload for a finished agent node"""
+    if node == "planner":
+        return {
+            "goal_type": update.get("goal_type"),
+            "analysis": update.get("analysis", ""),
+            "parameters": update.get("parameters", {})
+        }
+    if node == "router":
+        return {"tools": [
+            {k: call.get(k) for k in ("tool", "status", "latency_ms")}
+            for call in update.get("tool_calls", [])
+        ]}
+    if node == "plan_generator":
+        return {"steps": len(update.get("plan_steps", [])), "summary": update.get("summary", "")}
+    if node == "evaluator":
+        return {"confidence_score": update.get("confidence_score"), "eval_pass": update.get("eval_pass")}
+    return {}
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/plan/stream")
+async def generate_plan_stream(request: PlanRequest):
+    """
+    Generate a financial plan, streamed as Server-Sent Events
+    
+    Events:
+        planner, router, plan_generator, evaluator: a node finished (progress payload)
+        plan_step: one plan step, as soon as the model has written it
+        done: the full PlanResponse (plan cache hits send plan_step events and
+            done straight away)
+        error: {"detail": ...}
+    """
+    logger.info(f"Streaming plan requested: {request.goal[:50]}...")
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    async def run_agent():
+        global failed_plans
+        token = plan_event_sink.set(lambda event, data: queue.put_nowait(_sse(event, data)))
+        try:
+            cached, cache_status = _cached_plan(request)
+            if cached is not None:
+                for step in cached.get("plan_steps", []):
+                    queue.put_nowait(_sse("plan_step", step))
+                _record_success(cached)
+                queue.put_nowait(_sse("done", _plan_response(cached, cache_status).model_dump()))
+                return
+            
+            result = _initial_state(request)
+            async for update in async_goal_planning_graph.astream(result):
+                for node, node_state in update.items():
+                    if not isinstance(node_state, dict):
+                        continue
+                    result = {**result, **node_state}
+                    queue.put_nowait(_sse(node, _node_event(node, node_state)))
+            
+            if result.get("error"):
+                logger.error(f"Agent error: {result['error']}")
+                metrics.record_request(success=False)
+                failed_plans += 1
+                queue.put_nowait(_sse("error", {"detail": f"Plan generation failed: {result['error']}"}))
+                return
+            
+            _record_success(result)
+            queue.put_nowait(_sse("done", _plan_response(result).model_dump()))
+            _cache_plan(request, result)
+        except Exception as e:
+            logger.error(f"Unexpected error: {e}", exc_info=True)
+            failed_plans += 1
+            queue.put_nowait(_sse("error", {"detail": f"Internal server error: {str(e)}"}))
+        finally:
+            plan_event_sink.reset(token)
+            queue.put_nowait(None)
+    
+    async def events():
+        task = asyncio.create_task(run_agent())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield item
+        finally:
+            if not task.done():
+                task.cancel()  # client went away
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/examples", response_model=List[Dict[str, str]])
 async def get_examples():
     """Get example goals for testing"""
@@ -1,14 +1,82 @@
 """
 Alpha Vantage API integration for stock quotes and retirement calculations
 """
-import requests
 from typing import Dict, Any
+from src.features.quote_cache import QuoteCache, TokenBucket
+from src.utils.http_client import PooledHTTPClient, RetryPolicy, CircuitBreaker
 from src.utils.config import settings
 from src.utils.logger import logger
 
-def get_stock_quote(symbol: str) -> Dict[str, Any]:
+# Shared keep-alive pool for every quote call (sync and async paths)
+alpha_vantage_client = PooledHTTPClient(
+    "alpha_vantage",
+    base_url=settings.alpha_vantage_url,
+    timeout=settings.alpha_vantage_timeout_seconds,
+    max_connections=settings.alpha_vantage_pool_size,
+    retry=RetryPolicy(max_attempts=settings.alpha_vantage_max_attempts),
+    breaker=CircuitBreaker(
+        "alpha_vantage",
+        failure_threshold=settings.alpha_vantage_breaker_failures,
+        reset_timeout=settings.alpha_vantage_breaker_reset_seconds
+    )
+)
+
+
+def _quote_params(symbol: str) -> Dict[str, str]:
+    """Query parameters for a GLOBAL_QUOTE request"""
+    api_key = settings.alpha_vantage_api_key
+    
+    # Use demo key if not configured
+    if api_key == "demo":
+        logger.warning("Using demo API key - limited to 5 calls/min")
+    
+    return {
+        "function": "GLOBAL_QUOTE",
+        "symbol": symbol,
+        "apikey": api_key
+    }
+
+
+def _parse_quote(symbol: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Alpha Vantage GLOBAL_QUOTE payload -> quote dict (mock data if empty)"""
+    if "Global Quote" in data and data["Global Quote"]:
+        quote = data["Global Quote"]
+        result = {
+            "symbol": symbol,
+            "price": float(quote.get("05. price", 0)),
+            "change": float(quote.get("09. change", 0)),
+            "change_percent": quote.get("10. change percent", "0%"),
+            "volume": int(quote.get("06. volume", 0)),
+            "latest_trading_day": quote.get("07. latest trading day", "")
+        }
+        logger.info(f"Got quote for {symbol}: ${result['price']:.2f}")
+        return result
+    else:
+        logger.warning(f"No data for {symbol}, using mock data")
+        return {
+            "mock": True,
+            "symbol": symbol,
+            "price": 450.00,
+            "change": 2.50,
+            "change_percent": "+0.56%",
+            "volume": 1000000,
+            "latest_trading_day": "2024-10-18"
+        }
+
+
+def _quote_error(symbol: str, e: Exception) -> Dict[str, Any]:
+    logger.error(f"Error fetching quote: {e}")
+    return {
+        "symbol": symbol,
+        "price": 0.0,
+        "error": str(e)
+    }
+
+
+def fetch_stock_quote(symbol: str) -> Dict[str, Any]:
     """
-    Get current stock quote from Alpha Vantage
+    Get current stock quote from Alpha Vantage (uncached; pooled, retried,
+    and skipped while the circuit breaker is open)
     
     Args:
         symbol: Stock ticker symbol (e.g., 'SPY', 'AAPL')
@@ -17,55 +85,60 @@ def get_stock_quote(symbol: str) -> Dict[str, Any]:
         Dict with price, change, volume
     """
     try:
-        api_key = settings.alpha_vantage_api_key
-        
-        # Use demo key if not configured
-        if api_key == "demo":
-            logger.warning("Using demo API key - limited to 5 calls/min")
-        
-        url = f"https://www.alphavantage.co/query"
-        params = {
-            "function": "GLOBAL_QUOTE",
-            "symbol": symbol,
-            "apikey": api_key
-        }
-        
+        params = _quote_params(symbol)
         logger.debug(f"Fetching quote for {symbol}")
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
+        return _parse_quote(symbol, alpha_vantage_client.get_json(params=params))
+    except Exception as e:
+        return _quote_error(symbol, e)
+
+
+async def afetch_stock_quote(symbol: str) -> Dict[str, Any]:
+    """
+    Async fetch_stock_quote, for the async agent path
+    
+    Args:
+        symbol: Stock ticker symbol (e.g., 'SPY', 'AAPL')
         
-        if "Global Quote" in data and data["Global Quote"]:
-            quote = data["Global Quote"]
-            result = {
-                "symbol": symbol,
-                "price": float(quote.get("05. price", 0)),
-                "change": float(quote.get("09. change", 0)),
-                "change_percent": quote.get("10. change percent", "0%"),
-                "volume": int(quote.get("06. volume", 0)),
-                "latest_trading_day": quote.get("07. latest trading day", "")
-            }
-            logger.info(f"Got quote for {symbol}: ${result['price']:.2f}")
-            return result
-        else:
-            logger.warning(f"No data for {symbol}, using mock data")
-            return {
-                "symbol": symbol,
-                "price": 450.00,
-                "change": 2.50,
-                "change_percent": "+0.56%",
-                "volume": 1000000,
-                "latest_trading_day": "2024-10-18"
-            }
-            
+    Returns:
+        Dict with price, change, volume
+    """
+    try:
+        params = _quote_params(symbol)
+        logger.debug(f"Fetching quote for {symbol}")
+        return _parse_quote(symbol, await alpha_vantage_client.aget_json(params=params))
     except Exception as e:
-        logger.error(f"Error fetching quote: {e}")
-        return {
-            "symbol": symbol,
-            "price": 0.0,
-            "error": str(e)
-        }
+        return _quote_error(symbol, e)
+
+quote_cache = QuoteCache(
+    fetch_stock_quote,
+    afetch_stock_quote,
+    ttl=settings.quote_ttl_seconds,
+    stale_ttl=settings.quote_stale_seconds,
+    limiter=TokenBucket(
+        rate=settings.alpha_vantage_calls_per_minute / 60.0,
+        capacity=settings.alpha_vantage_calls_per_minute
+    ),
+    persist_path=settings.quote_cache_path
+)
+
+
+def get_stock_quote(symbol: str) -> Dict[str, Any]:
+    """
+    Get current stock quote (cached, see quote_cache.py)
+    
+    Args:
+        symbol: Stock ticker symbol (e.g., 'SPY', 'AAPL')
+        
+    Returns:
+        Dict with price, change, volume, plus cache status ("cache", "as_of")
+    """
+    return quote_cache.get(symbol)
+
+
+async def aget_stock_quote(symbol: str) -> Dict[str, Any]:
+    """Async get_stock_quote: concurrent misses for a symbol share one fetch"""
+    return await quote_cache.aget(symbol)
+
 
 def calculate_retirement_projection(
     current_age: int,
@@ -0,0 +1,303 @@
+"""
+Local goal classifier and parameter extraction for planner_node
+- classify_goal: keyword/regex scores + a small multinomial Naive Bayes
+  trained at import on SEED_GOALS, averaged into one distribution; the top
+  class probability is the confidence. Below the threshold the planner falls
+  back to the LLM
+- extract_parameters: deterministic regexes for ages, horizons, dollar
+  amounts (by context: home price, down payment, savings, monthly
+  contribution, target, debt) and rates
+"""
+import re
+import math
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Tuple
+
+GOAL_TYPES = ["retirement", "home_purchase", "college", "debt", "general"]
+
+# ============================================================================
+# KEYWORD / REGEX SCORER
+# ============================================================================
+
+KEYWORD_PATTERNS: Dict[str, List[Tuple[str, float]]] = {
+    "retirement": [
+        (r"\bretir(e|ed|ement|ing)\b", 3.0), (r"\b401\s?\(?k\)?|\bira\b|\broth\b", 2.0),
+        (r"\bpension\b|\bnest egg\b|\bsocial security\b", 2.0), (r"\bstop working\b|\bfinancial independence\b|\bfire\b", 1.5),
+    ],
+    "home_purchase": [
+        (r"\bdown ?payment\b", 3.0), (r"\b(buy|purchase|afford)\b.*\b(house|home|condo|apartment|property)\b", 3.0),
+        (r"\b(house|home|condo)\b", 2.5), (r"\bmortgage\b", 2.0), (r"\bfirst[- ]time (home)?buyer\b", 2.0),
+    ],
+    "college": [
+        (r"\bcollege\b|\buniversity\b|\btuition\b", 3.0), (r"\b529\b", 3.0),
+        (r"\beducation\b", 2.0), (r"\b(child|children|kid|kids|son|daughter)('s)?\b", 0.5),
+    ],
+    "debt": [
+        (r"\bdebts?\b", 3.0), (r"\bpay (off|down)\b", 2.0), (r"\bcredit cards?\b", 2.0),
+        (r"\b(student|car|auto|personal) loans?\b", 2.0), (r"\bconsolidat(e|ion)\b|\brefinanc", 1.5),
+    ],
+    "general": [
+        (r"\bemergency fund\b|\brainy day\b", 3.0), (r"\bbudget(ing)?\b", 2.0),
+        (r"\binvest(ing|ment)?\b", 1.0), (r"\bwedding\b|\bvacation\b|\bcar\b|\bbusiness\b", 2.5),
+    ],
+}
+_COMPILED = {t: [(re.compile(p), w) for p, w in pats] for t, pats in KEYWORD_PATTERNS.items()}
+
+
+def _keyword_distribution(text: str) -> Dict[str, float]:
+    """Matched pattern weights per class, normalized (no match = mostly general)"""
+    scores = {t: sum(w for rx, w in pats if rx.search(text)) for t, pats in _COMPILED.items()}
+    scores["general"] += 0.5  # prior: unmatched goals are general
+    total = sum(scores.values())
+    return {t: s / total for t, s in scores.items()}
+
+
+# ============================================================================
+# NAIVE BAYES
+# ============================================================================
+
+SEED_GOALS: Dict[str, List[str]] = {
+    "retirement": [
+        "I want to retire comfortably in 20 years",
+        "retire early at 55 with enough savings",
+        "how much do I need to save for retirement",
+        "I am 45 and want to retire at 65",
+        "maximize my 401k and IRA contributions before retiring",
+        "build a nest egg so I can stop working by 60",
+        "plan for retirement income and social security",
+        "I'm near retirement and want to protect my savings",
+    ],
+    "home_purchase": [
+        "I need to save for a down payment on a $500k house in 5 years",
+        "buy my first home in three years",
+        "save for a house down payment",
+        "afford a $400,000 home with a 20% down payment",
+        "purchase a condo in the city",
+        "get a mortgage and buy a home next year",
+        "first time home buyer saving for a down payment",
+        "upgrade to a bigger house in 4 years",
+    ],
+    "college": [
+        "I want to save for my child's college education starting in 18 years",
+        "pay for my daughter's university tuition",
+        "open a 529 plan for my kids",
+        "save for college for two children",
+        "fund my son's education in 10 years",
+        "cover tuition costs for graduate school",
+        "plan for my kids' college expenses",
+        "save enough for a four year college degree",
+    ],
+    "debt": [
+        "pay off $30,000 of credit card debt",
+        "get out of debt in 3 years",
+        "pay down my student loans faster",
+        "consolidate my debts and lower interest",
+        "eliminate my car loan and personal loan",
+        "become debt free in 2 years",
+        "pay off my credit cards and student loan debt",
+        "refinance and pay off my loans",
+    ],
+    "general": [
+        "build an emergency fund of six months expenses",
+        "start investing my savings",
+        "create a monthly budget and save more",
+        "save for a wedding next year",
+        "save $10,000 for a vacation",
+        "grow my wealth and invest in index funds",
+        "save money for a new car",
+        "improve my finances and spend less",
+    ],
+}
+
+_WORD_RE = re.compile(r"\$?\d[\d,]*(?:\.\d+)?[km%]?|[a-z]+")
+
+
+def _features(text: str) -> List[str]:
+    words = ["<num>" if w[0].isdigit() or w[0] == "$" else w for w in _WORD_RE.findall(text.lower())]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class NaiveBayesGoalModel:
+    """Multinomial Naive Bayes over word unigrams/bigrams (Laplace smoothing)"""
+
+    def __init__(self, examples: Dict[str, List[str]], alpha: float = 1.0):
+        self.alpha = alpha
+        self.counts: Dict[str, Counter] = defaultdict(Counter)
+        docs = Counter()
+        for label, texts in examples.items():
+            for text in texts:
+                self.counts[label].update(_features(text))
+                docs[label] += 1
+        self.vocab = {f for counts in self.counts.values() for f in counts}
+        self.totals = {label: sum(counts.values()) for label, counts in self.counts.items()}
+        n = sum(docs.values())
+        self.log_prior = {label: math.log(docs[label] / n) for label in examples}
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        feats = [f for f in _features(text) if f in self.vocab]
+        v = len(self.vocab)
+        logp = {
+            label: prior + sum(
+                math.log((self.counts[label][f] + self.alpha) / (self.totals[label] + self.alpha * v))
+                for f in feats
+            )
+            for label, prior in self.log_prior.items()
+        }
+        top = max(logp.values())
+        exp = {label: math.exp(lp - top) for label, lp in logp.items()}
+        total = sum(exp.values())
+        return {label: e / total for label, e in exp.items()}
+
+
+_model = NaiveBayesGoalModel(SEED_GOALS)
+
+
+def classify_goal(goal: str) -> Tuple[str, float, Dict[str, float]]:
+    """
+    Classify a goal into GOAL_TYPES
+
+    Returns:
+        (goal_type, confidence in [0, 1], full probability distribution)
+    """
+    text = goal.lower()
+    keywords = _keyword_distribution(text)
+    bayes = _model.predict_proba(text)
+    probs = {t: round((keywords[t] + bayes.get(t, 0.0)) / 2, 4) for t in GOAL_TYPES}
+    goal_type = max(probs, key=probs.get)
+    return goal_type, probs[goal_type], probs
+
+
+# ============================================================================
+# PARAMETER EXTRACTION
+# ============================================================================
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "fifteen": 15, "twenty": 20,
+    "twenty-five": 25, "thirty": 30, "forty": 40
+}
+_NUM = r"(\d+(?:\.\d+)?|" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + r")"
+_AMOUNT_RE = re.compile(
+    r"\$\s?(\d[\d,]*(?:\.\d+)?)\s*(k|m|mm|thousand|million)?\b"
+    r"|\b(\d[\d,]*(?:\.\d+)?)\s*(k|thousand|million|dollars)\b"
+)
+# account names that look like amounts ("401k" is not $401,000); blanked before amount matching
+_ACCOUNT_RE = re.compile(r"(?<![$\d])\b(?:401\s?\(?k\)?|403\s?\(?b\)?|457\s?\(?b\)?|529)(?![\d,.])")
+_CURRENT_AGE_RES = [
+    re.compile(r"\b(?:i am|i'm|im|i’m)\s+(\d{2})\b(?!\s*(?:%|k\b|years? (?:to|from|until)))"),
+    re.compile(r"\b(\d{2})[- ]?(?:years?[- ]old|yo|y/o)\b"),
+    re.compile(r"\b(?:age|aged)\s+(\d{2})\b(?!.*\bretire\b.*\bat\b)"),
+]
+_RETIREMENT_AGE_RE = re.compile(r"\bretire(?:ment)?\s+(?:at|by)\s+(?:age\s+)?(\d{2})\b|\bretirement age (?:of\s+)?(\d{2})\b")
+_HORIZON_RE = re.compile(
+    r"\b(?:in|within|over(?: the next)?|next|for)\s+" + _NUM + r"\s+(years?|months?)\b"
+    r"|\b" + _NUM + r"[- ](year|month)s?\s+(?:plan|horizon|timeline|goal)\b"
+)
+MAX_HORIZON_YEARS = 100  # longer stated horizons are clamped (the simulators' cost is linear in years)
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s?%\s*(down|interest|rate|apr|return)?")
+_MONTHLY_RE = re.compile(r"^\s*(?:a|per|each|every)\s+month\b|^\s*(?:/\s?mo(?:nth)?|monthly)\b")
+
+# context words before/after an amount -> role
+_ROLE_BEFORE = [
+    ("down_payment", re.compile(r"down ?payment(?: of)?\s*$")),
+    ("current_savings", re.compile(r"(?:have|saved|savings of|currently have|already have)\s*(?:about|around)?\s*$")),
+    ("debt_amount", re.compile(r"(?:pay (?:off|down)|owe|(?:debt|loans?) of)\s*(?:my|about|around)?\s*$")),
+    ("target_amount", re.compile(r"(?:save|need|accumulate|reach|goal of|target of)\s*(?:up|about|around)?\s*$")),
+]
+_ROLE_AFTER = [
+    ("home_price", re.compile(r"^\s*(?:house|home|condo|property|apartment)\b")),
+    ("current_savings", re.compile(r"^\s*(?:saved|in savings|in my (?:401k|ira|account))\b")),
+    ("debt_amount", re.compile(r"^\s*(?:of |in )?(?:\w+ )?(?:debt|loans?)\b")),
+]
+
+
+def _number(token: str) -> float:
+    return float(_NUMBER_WORDS.get(token, None) or token.replace(",", ""))
+
+
+def _scaled(value: str, unit: str) -> float:
+    scale = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mm": 1e6, "million": 1e6}.get((unit or "").lower(), 1)
+    return _number(value) * scale
+
+
+def _amounts(text: str) -> Dict[str, float]:
+    found: Dict[str, float] = {}
+    masked = _ACCOUNT_RE.sub(lambda m: " " * len(m.group()), text)  # same offsets, context still read from text
+    for m in _AMOUNT_RE.finditer(masked):
+        value = _scaled(m.group(1) or m.group(3), m.group(2) or m.group(4))
+        before, after = text[max(0, m.start() - 40):m.start()], text[m.end():m.end() + 30]
+        if _MONTHLY_RE.search(after):
+            role = "monthly_contribution"
+        else:
+            role = next((r for r, rx in _ROLE_AFTER if rx.search(after)), None) \
+                or next((r for r, rx in _ROLE_BEFORE if rx.search(before)), None) \
+                or "target_amount"
+        found.setdefault(role, value)
+    return found
+
+
+def extract_parameters(goal: str) -> Dict[str, Any]:
+    """
+    Numbers stated in a goal (only keys that were found)
+
+    Keys: current_age, retirement_age, horizon_years, home_price, down_payment,
+    down_payment_percent, current_savings, monthly_contribution, target_amount,
+    debt_amount, interest_rate
+    """
+    text = goal.lower().replace("’", "'")
+    params: Dict[str, Any] = {}
+
+    for rx in _CURRENT_AGE_RES:
+        m = rx.search(text)
+        if m and 16 <= int(m.group(1)) <= 90:
+            params["current_age"] = int(m.group(1))
+            break
+
+    m = _RETIREMENT_AGE_RE.search(text)
+    if m:
+        params["retirement_age"] = int(m.group(1) or m.group(2))
+
+    m = _HORIZON_RE.search(text)
+    if m:
+        value, unit = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+        years = min(_number(value) / (12 if unit.startswith("month") else 1), MAX_HORIZON_YEARS)
+        params["horizon_years"] = round(years, 2) if years % 1 else int(years)
+
+    params.update(_amounts(text))
+
+    for m in _PERCENT_RE.finditer(text):
+        kind = m.group(2)
+        if kind == "down":
+            params.setdefault("down_payment_percent", float(m.group(1)))
+        elif kind in ("interest", "rate", "apr"):
+            params.setdefault("interest_rate", float(m.group(1)))
+
+    if "down_payment" in params and "home_price" in params and "down_payment_percent" not in params:
+        params["down_payment_percent"] = round(params["down_payment"] / params["home_price"] * 100, 1)
+    if "retirement_age" in params and "current_age" in params and "horizon_years" not in params:
+        params["horizon_years"] = params["retirement_age"] - params["current_age"]
+    return params
+
+
+def describe_goal(goal_type: str, params: Dict[str, Any]) -> str:
+    """One-line analysis for a locally classified goal"""
+    parts = [f"{goal_type.replace('_', ' ').capitalize()} goal"]
+    if "horizon_years" in params:
+        years = params["horizon_years"]
+        parts.append(f"over {years} year{'' if years == 1 else 's'}")
+    details = []
+    labels = [
+        ("current_age", "age {}"), ("retirement_age", "retiring at {}"),
+        ("home_price", "home price ${:,.0f}"), ("down_payment_percent", "{:g}% down"),
+        ("current_savings", "${:,.0f} saved"), ("monthly_contribution", "${:,.0f}/month"),
+        ("target_amount", "target ${:,.0f}"), ("debt_amount", "${:,.0f} of debt"),
+        ("interest_rate", "{:g}% rate"),
+    ]
+    for key, fmt in labels:
+        if key in params:
+            details.append(fmt.format(params[key]))
+    text = " ".join(parts)
+    return f"{text} ({', '.join(details)})" if details else text
+
+
+__all__ = ["classify_goal", "extract_parameters", "describe_goal", "GOAL_TYPES", "NaiveBayesGoalModel"]
@@ -0,0 +1,198 @@
+"""
+Monte Carlo retirement simulator (NumPy)
+- Monthly steps for every path at once, processed one year at a time so
+  memory stays at (paths x 12) however long the horizon
+- Returns: lognormal (expected return / volatility) or bootstrapped from
+  historical annual S&P 500 total returns (a whole year is drawn at a time)
+- Lognormal paths come in antithetic pairs (one draw, mirrored): half the
+  random numbers, lower variance
+- Seeded Generator: same inputs + seed -> same result
+- Cost: ~65-70 ms for 10k paths over 35 years (age 30 -> 65) on one core of
+  a small VM, RNG-bound and linear in paths x years; "elapsed_ms" reports it.
+  The async router runs it on the tool thread pool, off the event loop
+- Output: percentile bands per year, probability of reaching the target,
+  and sequence-of-returns risk (each path vs the same compound return
+  earned smoothly; success when the years just before retirement are worst)
+"""
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from src.utils.config import settings
+from src.utils.logger import logger
+
+# S&P 500 annual total returns 1974-2023 (rounded, %)
+SP500_ANNUAL_RETURNS = np.array([
+    -25.90, 37.00, 23.83, -6.98, 6.51, 18.52, 31.74, -4.70, 20.42, 22.34,
+    6.15, 31.24, 18.49, 5.81, 16.54, 31.48, -3.06, 30.23, 7.49, 9.97,
+    1.33, 37.20, 22.68, 33.10, 28.34, 20.89, -9.03, -11.85, -21.97, 28.36,
+    10.74, 4.83, 15.61, 5.48, -36.55, 25.94, 14.82, 2.10, 15.89, 32.15,
+    13.52, 1.38, 11.77, 21.61, -4.23, 31.21, 18.02, 28.47, -18.04, 26.06,
+]) / 100.0
+
+PERCENTILES = (10, 25, 50, 75, 90)
+RED_ZONE_YEARS = 5  # years before retirement where losses hurt most
+MAX_YEARS = 100      # hard limit on the horizon: memory and time are linear in years
+
+
+def _future_value(savings, monthly, monthly_rate, months):
+    """Closed-form balance after `months` at a constant monthly rate (vectorized)"""
+    growth = (1 + monthly_rate) ** months
+    safe_rate = np.where(np.abs(monthly_rate) < 1e-12, 1.0, monthly_rate)
+    annuity = np.where(np.abs(monthly_rate) < 1e-12, months, (growth - 1) / safe_rate)
+    return savings * growth + monthly * annuity
+
+
+def _percentiles(values: np.ndarray) -> np.ndarray:
+    """PERCENTILES along the last axis (nearest rank; one sort beats np.percentile's selects)"""
+    ordered = np.sort(values, axis=-1)
+    ranks = [round(p / 100 * (values.shape[-1] - 1)) for p in PERCENTILES]
+    return ordered[..., ranks]
+
+
+def _simulate_year(
+    rng: np.random.Generator,
+    method: str,
+    paths: int,
+    expected_return: float,
+    volatility: float,
+    work: Optional[np.ndarray] = None
+):
+    """
+    One year of monthly returns for every path, in log space
+
+    Args:
+        work: Reusable (2, 12, ceil(paths / 2)) float32 buffer (lognormal)
+
+    Returns:
+        (log growth over the year, sum over months m of growth from the end
+        of month m to year end = what 1/month of contributions becomes)
+    """
+    if method == "bootstrap":
+        # a historical year, earned evenly month by month: geometric series
+        monthly = np.log1p(rng.choice(SP500_ANNUAL_RETURNS, size=paths)) / 12
+        flat = np.abs(monthly) < 1e-12
+        contributions = np.where(flat, 12.0, np.expm1(12 * monthly) / np.where(flat, 1.0, np.expm1(monthly)))
+        return 12 * monthly, contributions
+    sigma = volatility / np.sqrt(12)
+    mu = np.log1p(expected_return / 12) - sigma ** 2 / 2  # E[monthly growth] = 1 + expected_return / 12
+    # (pair, month, path) float32, updated in place: the draws dominate the run
+    # time, so half the paths reuse their partner's draws mirrored (antithetic
+    # variates: half the RNG work, and lower variance for the same path count)
+    steps = work if work is not None else np.empty((2, 12, (paths + 1) // 2), dtype=np.float32)
+    rng.standard_normal(dtype=np.float32, out=steps[0])
+    np.negative(steps[0], out=steps[1])
+    steps *= np.float32(sigma)
+    steps += np.float32(mu)
+    for month in range(1, 12):            # log growth from the start of the year to month m
+        steps[:, month] += steps[:, month - 1]  # (row adds beat np.cumsum over a short axis)
+    year_end = steps[:, -1].copy()
+    steps -= year_end[:, None, :]
+    np.negative(steps, out=steps)
+    np.exp(steps, out=steps)              # growth from month m to the end of the year
+    contributions = steps.sum(axis=1, dtype=np.float64)
+    return year_end.reshape(-1)[:paths].astype(np.float64), contributions.reshape(-1)[:paths]
+
+
+def simulate_retirement(
+    current_age: int,
+    retirement_age: int,
+    monthly_contribution: float,
+    current_savings: float = 0,
+    target_amount: Optional[float] = None,
+    expected_return: float = 0.07,
+    volatility: float = 0.15,
+    paths: Optional[int] = None,
+    method: Optional[str] = None,
+    seed: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Simulate retirement savings under random market returns
+
+    Args:
+        current_age: Current age in years
+        retirement_age: Target retirement age
+        monthly_contribution: Amount added at the end of every month
+        current_savings: Starting balance
+        target_amount: Balance that counts as success (default: the flat
+            expected-return projection, i.e. "does the simple plan hold?")
+        expected_return: Expected annual return (lognormal)
+        volatility: Annual volatility (lognormal)
+        paths: Number of simulated paths (default MONTE_CARLO_PATHS)
+        method: "lognormal" or "bootstrap" (default MONTE_CARLO_METHOD)
+        seed: RNG seed (default MONTE_CARLO_SEED)
+
+    Raises:
+        ValueError: More than MAX_YEARS between current and retirement age
+
+    Returns:
+        Dict with final-balance percentiles, per-year bands, success
+        probability and sequence-of-returns risk
+    """
+    started = time.perf_counter()
+    paths = paths or settings.monte_carlo_paths
+    method = method or settings.monte_carlo_method
+    seed = settings.monte_carlo_seed if seed is None else seed
+    years = max(1, retirement_age - current_age)
+    if years > MAX_YEARS:
+        raise ValueError(f"Horizon of {years} years exceeds the {MAX_YEARS}-year limit")
+    rng = np.random.default_rng(seed)
+
+    deterministic = float(_future_value(current_savings, monthly_contribution, expected_return / 12, years * 12))
+    target = deterministic if target_amount is None else float(target_amount)
+
+    balance = np.full(paths, float(current_savings))
+    log_growth = np.zeros(paths)          # total log return per path
+    red_zone_growth = np.zeros(paths)     # log return over the last RED_ZONE_YEARS
+    yearly = np.empty((years, paths))
+    work = np.empty((2, 12, (paths + 1) // 2), dtype=np.float32) if method != "bootstrap" else None
+    for year in range(years):
+        year_log, contributions = _simulate_year(rng, method, paths, expected_return, volatility, work)
+        balance = balance * np.exp(year_log) + monthly_contribution * contributions
+        log_growth += year_log
+        if year >= years - RED_ZONE_YEARS:
+            red_zone_growth += year_log
+        yearly[year] = balance
+
+    # Same compound return, earned evenly: any difference is down to the order of returns
+    smooth = _future_value(current_savings, monthly_contribution, np.expm1(log_growth / (years * 12)), years * 12)
+    order_effect = balance / np.maximum(smooth, 1e-9)
+    worst_red_zone = red_zone_growth <= np.quantile(red_zone_growth, 0.2)
+    effect = _percentiles(order_effect)
+
+    bands = _percentiles(yearly).T  # (percentile, year)
+    success = balance >= target
+    result = {
+        "method": method,
+        "paths": paths,
+        "seed": seed,
+        "current_age": current_age,
+        "retirement_age": retirement_age,
+        "years_to_retirement": years,
+        "monthly_contribution": monthly_contribution,
+        "current_savings": current_savings,
+        "target_balance": round(target, 2),
+        "deterministic_balance": round(deterministic, 2),
+        "success_probability": round(float(success.mean()), 4),
+        "final_balance": {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, bands[:, -1])},
+        "bands": [
+            {"age": current_age + year + 1, **{f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, bands[:, year])}}
+            for year in range(years)
+        ],
+        "sequence_risk": {
+            "red_zone_years": min(RED_ZONE_YEARS, years),
+            "success_probability_worst_red_zone": round(float(success[worst_red_zone].mean()), 4),
+            **{f"order_effect_p{p}": round(float(v), 4) for p, v in zip(PERCENTILES, effect)},
+        },
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info(
+        f"Monte Carlo ({method}, {paths} paths): {result['success_probability']:.0%} reach "
+        f"${target:,.0f} in {years} years, median ${result['final_balance']['p50']:,.0f} "
+        f"({result['elapsed_ms']} ms)"
+    )
+    return result
+
+
+__all__ = ["simulate_retirement", "SP500_ANNUAL_RETURNS", "MAX_YEARS"]
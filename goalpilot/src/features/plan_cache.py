@@ -0,0 +1,220 @@
+"""
+Plan cache in front of the goal planning graph
+- Exact tier: normalized goal + user_profile + model
+- Similarity tier: same user_profile and model, same goal type
+  (classify_goal), the same numbers ("retire in 20 years" never serves
+  "retire in 30 years") and the same content words (stopwords, word order
+  and plurals aside: "house" never serves "car"); hashed word / bigram /
+  char-trigram cosine is then only a final guard against rewordings
+- Entries expire after PLAN_CACHE_TTL_SECONDS, or earlier when the market
+  data the plan was built on (api_data "as_of", else the time it was
+  stored) would no longer be served by the quote cache
+- Plans built on partial data (a tool failed, quote served from fallback)
+  are not cached
+"""
+import re
+import math
+import time
+import zlib
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.features.goal_classifier import classify_goal
+from src.utils.config import settings
+from src.utils.logger import logger
+
+_TOKEN_RE = re.compile(r"\d+(?:\.\d+)?[km]?|[a-z]+")
+_NUMBER_RE = re.compile(r"^\d")
+_STOPWORDS = {
+    "i", "id", "im", "me", "my", "we", "our", "a", "an", "the", "to", "for", "in",
+    "of", "and", "on", "be", "is", "it", "want", "would", "like", "need"
+}
+_DIM = 4096
+_DEGRADED = {"fallback", "rate_limited", "mock"}
+
+
+def _tokens(goal: str) -> List[str]:
+    """Lowercased word/number tokens ("$500,000" -> "500000", "$500k" -> "500k")"""
+    return _TOKEN_RE.findall(goal.lower().replace(",", "").replace("'", ""))
+
+
+def normalize_goal(goal: str) -> str:
+    """Exact-tier form of a goal: case, punctuation and spacing removed"""
+    return " ".join(_tokens(goal))
+
+
+def _words(tokens: List[str]) -> List[str]:
+    """Tokens without stopwords, plural "s" dropped ("cards" -> "card")"""
+    return [
+        t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t
+        for t in tokens if t not in _STOPWORDS
+    ]
+
+
+def _content_words(tokens: List[str]) -> frozenset:
+    """Set of words that must match for the similarity tier (numbers are compared separately)"""
+    return frozenset(w for w in _words(tokens) if not _NUMBER_RE.match(w))
+
+
+def _bucket(feature: str) -> int:
+    return zlib.crc32(feature.encode()) % _DIM
+
+
+def embed_goal(tokens: List[str]) -> Dict[int, float]:
+    """Sparse unit vector of hashed words, word bigrams and char trigrams"""
+    words = _words(tokens)
+    features: Counter = Counter()
+    for word in words:
+        features[_bucket(f"w:{word}")] += 1.0
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            features[_bucket(f"c:{padded[i:i + 3]}")] += 0.5
+    for a, b in zip(words, words[1:]):
+        features[_bucket(f"b:{a} {b}")] += 1.0
+    norm = math.sqrt(sum(v * v for v in features.values())) or 1.0
+    return {k: v / norm for k, v in features.items()}
+
+
+def _cosine(a: Dict[int, float], b: Dict[int, float]) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(k, 0.0) for k, v in a.items())
+
+
+def _data_as_of(api_data: Dict[str, Any], now: float) -> Optional[float]:
+    """
+    Oldest "as_of" among the market-data results (those carrying a "cache"
+    status); one without a stamp was fetched for this plan, i.e. `now`.
+    None if the plan used no market data.
+    """
+    stamps = [
+        v.get("as_of") or now
+        for v in api_data.values() if isinstance(v, dict) and ("as_of" in v or "cache" in v)
+    ]
+    return min(stamps) if stamps else None
+
+
+class PlanCache:
+    """LRU plan cache with exact and similarity tiers (see module docstring)"""
+
+    def __init__(
+        self,
+        ttl: float,
+        similarity: float,
+        max_entries: int = 500,
+        data_max_age: Optional[float] = None
+    ):
+        self.ttl = ttl
+        self.similarity = similarity
+        self.max_entries = max_entries
+        self.data_max_age = data_max_age
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"exact": 0, "similar": 0, "miss": 0, "stored": 0, "expired": 0}
+
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return now >= entry["expires_at"]
+
+    def _expires_at(self, result: Dict[str, Any], now: float) -> float:
+        expires = now + self.ttl
+        as_of = _data_as_of(result.get("api_data") or {}, now)
+        if as_of is not None and self.data_max_age is not None:
+            expires = min(expires, as_of + self.data_max_age)
+        return expires
+
+    def _cacheable(self, result: Dict[str, Any]) -> bool:
+        if result.get("error") or not result.get("plan_steps"):
+            return False
+        if any(call.get("status") != "ok" for call in result.get("tool_calls", [])):
+            return False
+        return not any(
+            isinstance(v, dict) and v.get("cache") in _DEGRADED
+            for v in (result.get("api_data") or {}).values()
+        )
+
+    def lookup(self, goal: str, user_profile: str, model: str = "") -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Find a cached plan for a goal
+
+        Returns:
+            (cached agent result or None, "exact" / "similar" / "miss")
+        """
+        tokens = _tokens(goal)
+        key = (" ".join(tokens), user_profile, model or settings.bedrock_model)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                self.stats["expired"] += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["exact"] += 1
+                return entry["result"], "exact"
+
+            numbers = [t for t in tokens if _NUMBER_RE.match(t)]
+            content = _content_words(tokens)
+            goal_type = classify_goal(goal)[0]
+            vector = embed_goal(tokens)
+            best, best_score = None, self.similarity
+            for other_key, other in list(self._entries.items()):
+                if self._expired(other, now):
+                    del self._entries[other_key]
+                    self.stats["expired"] += 1
+                    continue
+                if (other_key[1:] != key[1:] or other["numbers"] != numbers
+                        or other["content"] != content or other["goal_type"] != goal_type):
+                    continue
+                score = _cosine(vector, other["vector"])
+                if score >= best_score:
+                    best, best_score = other_key, score
+            if best is not None:
+                self._entries.move_to_end(best)
+                self.stats["similar"] += 1
+                logger.info(f"Plan cache: similar goal ({best_score:.2f}) '{best[0]}'")
+                return self._entries[best]["result"], "similar"
+            self.stats["miss"] += 1
+            return None, "miss"
+
+    def store(self, goal: str, user_profile: str, result: Dict[str, Any], model: str = ""):
+        """Cache a finished agent result (skipped for errors and partial data)"""
+        if not self._cacheable(result):
+            return
+        tokens = _tokens(goal)
+        key = (" ".join(tokens), user_profile, model or settings.bedrock_model)
+        now = time.time()
+        entry = {
+            "result": result,
+            "vector": embed_goal(tokens),
+            "numbers": [t for t in tokens if _NUMBER_RE.match(t)],
+            "content": _content_words(tokens),
+            "goal_type": classify_goal(goal)[0],
+            "expires_at": self._expires_at(result, now),
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stats["stored"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# A plan is only as fresh as its quotes: drop it once the quote cache would
+# no longer serve the data it was built on
+plan_cache = PlanCache(
+    ttl=settings.plan_cache_ttl_seconds,
+    similarity=settings.plan_cache_similarity,
+    max_entries=settings.plan_cache_max_entries,
+    data_max_age=settings.quote_ttl_seconds + settings.quote_stale_seconds
+)
+
+__all__ = ["PlanCache", "plan_cache", "normalize_goal", "embed_goal"]
@@ -0,0 +1,217 @@
+"""
+Market-data cache for Alpha Vantage quotes
+- Per-symbol TTL: fresh entries are served without a call
+- Stale-while-revalidate: for stale_ttl after expiry the old quote is served
+  immediately and one background refresh is started
+- Single-flight: concurrent misses for a symbol share one fetch (sync callers
+  wait on a Future, async callers on a Task)
+- Token bucket sized to the API key's quota; when it is empty we serve the
+  last known quote (however old) rather than spend a call we don't have
+- Upstream errors (including an open circuit breaker) and responses without a
+  quote (mock data) fall back to the last known quote when there is one
+- Optional JSON file tier (QUOTE_CACHE_PATH) so restarts start warm
+"""
+import os
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.utils.logger import logger
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available (never blocks)"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+
+class QuoteCache:
+    """TTL cache in front of a quote fetcher (see module docstring)"""
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Dict[str, Any]],
+        afetch: Callable[[str], Awaitable[Dict[str, Any]]],
+        ttl: float,
+        stale_ttl: float,
+        limiter: Optional[TokenBucket] = None,
+        persist_path: str = ""
+    ):
+        self.fetch = fetch
+        self.afetch = afetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.limiter = limiter
+        self.persist_path = persist_path
+        self._entries: Dict[str, Dict[str, Any]] = {}   # symbol -> {"quote", "fetched_at"}
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}          # sync single-flight
+        self._ainflight: Dict[str, asyncio.Task] = {}   # async single-flight (one event loop)
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="quote-refresh")
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "fetches": 0, "rate_limited": 0, "fallback": 0}
+        self._load()
+
+    # ----------------------------------------------------------------- state
+    def _lookup(self, symbol: str):
+        """(entry, status) with status fresh / stale / expired / None"""
+        entry = self._entries.get(symbol)
+        if entry is None:
+            return None, None
+        age = time.time() - entry["fetched_at"]
+        if age < self.ttl:
+            return entry, "fresh"
+        if age < self.ttl + self.stale_ttl:
+            return entry, "stale"
+        return entry, "expired"
+
+    def _serve(self, entry: Dict[str, Any], status: str) -> Dict[str, Any]:
+        return {**entry["quote"], "cache": status, "as_of": round(entry["fetched_at"])}
+
+    def _store(self, symbol: str, quote: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache real quotes only (returned with their "as_of"); errors and mock data are passed through"""
+        if quote.get("error") or quote.get("mock"):
+            return quote
+        fetched_at = time.time()
+        with self._lock:
+            self._entries[symbol] = {"quote": quote, "fetched_at": fetched_at}
+        self._save()
+        return {**quote, "as_of": round(fetched_at)}
+
+    def _no_token(self, symbol: str, entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        self.stats["rate_limited"] += 1
+        logger.warning(f"Quote rate limit reached, {'serving last known' if entry else 'no data for'} {symbol}")
+        if entry is not None:
+            return self._serve(entry, "rate_limited")
+        return {"symbol": symbol, "price": 0.0, "error": "rate limited (quote quota exhausted)"}
+
+    def _settle(self, symbol: str, entry: Optional[Dict[str, Any]], result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Result of a miss: fetched quote, or the last known one if we couldn't fetch"""
+        if result is None:
+            return self._no_token(symbol, entry)
+        failed = result.get("error") or result.get("mock")  # mock: rate-limit "Note" or empty payload
+        if failed and entry is not None:
+            self.stats["fallback"] += 1
+            reason = result.get("error") or "no quote in response"
+            logger.warning(f"Quote fetch failed for {symbol}, serving last known: {reason}")
+            return self._serve(entry, "fallback")
+        return {**result, "cache": "mock" if result.get("mock") else "miss"}
+
+    def _fetch_now(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """One upstream call if the quota allows; None when out of tokens"""
+        if self.limiter and not self.limiter.try_acquire():
+            return None
+        self.stats["fetches"] += 1
+        return self._store(symbol, self.fetch(symbol))
+
+    async def _afetch_now(self, symbol: str) -> Optional[Dict[str, Any]]:
+        if self.limiter and not self.limiter.try_acquire():
+            return None
+        self.stats["fetches"] += 1
+        return self._store(symbol, await self.afetch(symbol))
+
+    # ------------------------------------------------------------------ sync
+    def _single_flight(self, symbol: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            future = self._inflight.get(symbol)
+            leader = future is None
+            if leader:
+                future = self._inflight[symbol] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = self._fetch_now(symbol)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(symbol, None)
+
+    def _refresh_in_background(self, symbol: str):
+        with self._lock:
+            if symbol in self._inflight:
+                return
+        self._refresher.submit(self._single_flight, symbol)
+
+    def get(self, symbol: str) -> Dict[str, Any]:
+        """Quote for symbol (fresh, stale + refresh, or fetched once for all waiters)"""
+        entry, status = self._lookup(symbol)
+        if status in ("fresh", "stale"):
+            self.stats[status] += 1
+        if status == "fresh":
+            return self._serve(entry, status)
+        if status == "stale":
+            self._refresh_in_background(symbol)
+            return self._serve(entry, status)
+        self.stats["miss"] += 1
+        return self._settle(symbol, entry, self._single_flight(symbol))
+
+    # ----------------------------------------------------------------- async
+    def _atask(self, symbol: str) -> asyncio.Task:
+        task = self._ainflight.get(symbol)
+        if task is None:
+            task = self._ainflight[symbol] = asyncio.ensure_future(self._afetch_now(symbol))
+            task.add_done_callback(lambda _: self._ainflight.pop(symbol, None))
+        return task
+
+    async def aget(self, symbol: str) -> Dict[str, Any]:
+        """Async get(): misses for the same symbol await one shared task"""
+        entry, status = self._lookup(symbol)
+        if status in ("fresh", "stale"):
+            self.stats[status] += 1
+        if status == "fresh":
+            return self._serve(entry, status)
+        if status == "stale":
+            self._atask(symbol)  # refresh without waiting
+            return self._serve(entry, status)
+        self.stats["miss"] += 1
+        return self._settle(symbol, entry, await asyncio.shield(self._atask(symbol)))
+
+    # ------------------------------------------------------------ disk tier
+    def _load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path) as f:
+                self._entries = json.load(f)
+            logger.info(f"Loaded {len(self._entries)} cached quotes from {self.persist_path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring quote cache file {self.persist_path}: {e}")
+
+    def _save(self):
+        if not self.persist_path:
+            return
+        try:
+            with self._lock:
+                snapshot = json.dumps(self._entries)
+            os.makedirs(os.path.dirname(self.persist_path) or ".", exist_ok=True)
+            tmp = f"{self.persist_path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                f.write(snapshot)
+            os.replace(tmp, self.persist_path)
+        except OSError as e:
+            logger.warning(f"Could not persist quote cache: {e}")
+
+
+__all__ = ["QuoteCache", "TokenBucket"]
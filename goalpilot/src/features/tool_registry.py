@@ -0,0 +1,259 @@
+"""
+Financial tool registry and concurrent executor for router_node
+- Each goal type declares the tools it needs (GOAL_TOOLSETS)
+- Network tools run in parallel, each under its own timeout
+- Pure calculators run inline while network calls are in flight
+- Tool parameters come from the numbers in the goal where stated
+  (goal_classifier.extract_parameters), otherwise from the defaults below
+- Partial failure: a failed or timed-out tool is recorded in tool_calls and
+  left out of api_data; the other results are still used
+"""
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from src.features.alpha_vantage_tool import (
+    get_stock_quote,
+    aget_stock_quote,
+    calculate_retirement_projection
+)
+from src.features.mortgage_tool import calculate_mortgage
+from src.features.monte_carlo import simulate_retirement
+from src.utils.config import settings
+from src.utils.logger import logger
+
+
+class Tool:
+    """A callable the router can use"""
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[..., Dict[str, Any]],
+        afn: Optional[Callable[..., Awaitable[Dict[str, Any]]]] = None,
+        network: bool = False,
+        timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.fn = fn                # sync implementation
+        self.afn = afn              # async implementation (network tools)
+        self.network = network      # False = pure calculator, run inline
+        self.timeout = timeout or settings.tool_timeout_seconds
+
+
+class ToolCall:
+    """One use of a tool in a goal's tool set"""
+
+    def __init__(self, tool: str, params: Dict[str, Any], key: str):
+        self.tool = tool
+        self.params = params
+        self.key = key              # where the result goes in api_data
+
+
+TOOLS: Dict[str, Tool] = {
+    tool.name: tool for tool in [
+        Tool("get_stock_quote", get_stock_quote, aget_stock_quote, network=True),
+        Tool("retirement_projection", calculate_retirement_projection),
+        Tool("retirement_simulation", simulate_retirement),
+        Tool("mortgage_calculator", calculate_mortgage),
+    ]
+}
+
+_MARKET_OVERVIEW = [ToolCall("get_stock_quote", {"symbol": "SPY"}, "market_data")]
+
+GOAL_TOOLSETS: Dict[str, List[ToolCall]] = {
+    "retirement": [
+        ToolCall("get_stock_quote", {"symbol": "SPY"}, "spy_quote"),
+        ToolCall("retirement_projection", {
+            "current_age": 30,
+            "retirement_age": 65,
+            "monthly_contribution": 500,
+            "current_savings": 10000
+        }, "retirement_projection"),
+        ToolCall("retirement_simulation", {
+            "current_age": 30,
+            "retirement_age": 65,
+            "monthly_contribution": 500,
+            "current_savings": 10000
+        }, "retirement_simulation"),
+    ],
+    "home_purchase": [
+        ToolCall("mortgage_calculator", {
+            "home_price": 400000,
+            "down_payment_percent": 20,
+            "interest_rate": 7.0,
+            "loan_term_years": 30
+        }, "mortgage"),
+    ],
+}
+
+
+MAX_RETIREMENT_AGE = 120  # goal-derived retirement ages are capped here
+
+
+def _retirement_params(defaults: Dict[str, Any], goal: Dict[str, Any]) -> Dict[str, Any]:
+    params = {**defaults, **{k: goal[k] for k in (
+        "current_age", "retirement_age", "monthly_contribution", "current_savings"
+    ) if k in goal}}
+    if "retirement_age" not in goal and "horizon_years" in goal:
+        params["retirement_age"] = params["current_age"] + max(1, round(goal["horizon_years"]))
+    params["retirement_age"] = min(params["retirement_age"], MAX_RETIREMENT_AGE)
+    if params["retirement_age"] <= params["current_age"]:
+        return dict(defaults)
+    return params
+
+
+def _simulation_params(defaults: Dict[str, Any], goal: Dict[str, Any]) -> Dict[str, Any]:
+    params = _retirement_params(defaults, goal)
+    if "target_amount" in goal:
+        params["target_amount"] = goal["target_amount"]
+    return params
+
+
+def _mortgage_params(defaults: Dict[str, Any], goal: Dict[str, Any]) -> Dict[str, Any]:
+    return {**defaults, **{k: goal[k] for k in (
+        "home_price", "down_payment_percent", "interest_rate"
+    ) if k in goal}}
+
+
+# tool -> (declared params, goal parameters) -> params for this goal
+PARAM_RESOLVERS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]] = {
+    "retirement_projection": _retirement_params,
+    "retirement_simulation": _simulation_params,
+    "mortgage_calculator": _mortgage_params,
+}
+
+
+def toolset_for(goal_type: str, parameters: Optional[Dict[str, Any]] = None) -> List[ToolCall]:
+    """Tool calls for a goal type (market overview for anything undeclared)"""
+    calls = GOAL_TOOLSETS.get(goal_type, _MARKET_OVERVIEW)
+    if not parameters:
+        return calls
+    return [
+        ToolCall(call.tool, PARAM_RESOLVERS[call.tool](call.params, parameters), call.key)
+        if call.tool in PARAM_RESOLVERS else call
+        for call in calls
+    ]
+
+
+def _record(call: ToolCall, started: float, status: str = "ok", error: Optional[str] = None) -> Dict[str, Any]:
+    """tool_calls entry"""
+    entry = {
+        "tool": call.tool,
+        "params": call.params,
+        "status": status,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    if error is not None:
+        entry["error"] = error
+    return entry
+
+
+def _outcome(call: ToolCall, started: float, result: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """Tools that catch their own errors return {"error": ...}: count those as failures"""
+    if isinstance(result, dict) and result.get("error"):
+        return None, _record(call, started, "error", str(result["error"]))
+    return result, _record(call, started)
+
+
+def _merge(
+    calls: List[ToolCall],
+    outcomes: List[Tuple[Optional[Dict[str, Any]], Dict[str, Any]]]
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """(result, tool_call entry) per call -> (tool_calls, api_data), in declaration order"""
+    tool_calls, api_data = [], {}
+    for call, (result, entry) in zip(calls, outcomes):
+        tool_calls.append(entry)
+        if entry["status"] == "ok":
+            api_data[call.key] = result
+        else:
+            logger.warning(f"ROUTER: {call.tool} {entry['status']}: {entry.get('error', '')}")
+    ok = sum(1 for entry in tool_calls if entry["status"] == "ok")
+    logger.info(f"ROUTER: {ok}/{len(calls)} tools succeeded")
+    return tool_calls, api_data
+
+
+def _run_inline(call: ToolCall) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    started = time.perf_counter()
+    try:
+        return _outcome(call, started, TOOLS[call.tool].fn(**call.params))
+    except Exception as e:
+        return None, _record(call, started, "error", str(e))
+
+
+# ============================================================================
+# SYNC EXECUTOR (router_node)
+# ============================================================================
+
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tool")
+
+
+def run_tools(calls: List[ToolCall]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Run a tool set: network tools on a thread pool, calculators inline
+
+    Returns:
+        (tool_calls with status/latency, api_data of the successful results)
+    """
+    started = time.perf_counter()
+    futures = {
+        i: _executor.submit(_run_inline, call)  # timed inside the worker
+        for i, call in enumerate(calls) if TOOLS[call.tool].network
+    }
+    outcomes: List[Any] = [None] * len(calls)
+    for i, call in enumerate(calls):
+        if i not in futures:
+            outcomes[i] = _run_inline(call)
+    for i, future in futures.items():
+        call = calls[i]
+        remaining = TOOLS[call.tool].timeout - (time.perf_counter() - started)
+        try:
+            outcomes[i] = future.result(timeout=max(0.0, remaining))
+        except FutureTimeout:
+            outcomes[i] = None, _record(call, started, "timeout", f"timed out after {TOOLS[call.tool].timeout}s")
+    return _merge(calls, outcomes)
+
+
+# ============================================================================
+# ASYNC EXECUTOR (arouter_node)
+# ============================================================================
+
+async def _arun_network(call: ToolCall) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    tool = TOOLS[call.tool]
+    started = time.perf_counter()
+    try:
+        if tool.afn is None:
+            loop = asyncio.get_running_loop()
+            return await asyncio.wait_for(loop.run_in_executor(_executor, _run_inline, call), tool.timeout)
+        async with asyncio.timeout(tool.timeout):  # runs afn in this task (wait_for would wrap it in another)
+            return _outcome(call, started, await tool.afn(**call.params))
+    except asyncio.TimeoutError:
+        return None, _record(call, started, "timeout", f"timed out after {tool.timeout}s")
+    except Exception as e:
+        return None, _record(call, started, "error", str(e))
+
+
+async def arun_tools(calls: List[ToolCall]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Async run_tools: network tools as concurrent tasks, calculators on the
+    tool thread pool meanwhile (the Monte Carlo simulation alone takes tens
+    of milliseconds of CPU, which would otherwise stall the event loop)
+    """
+    tasks = {
+        i: asyncio.ensure_future(_arun_network(call))
+        for i, call in enumerate(calls) if TOOLS[call.tool].network
+    }
+    if tasks:
+        await asyncio.sleep(0)  # let the tasks send their requests before the calculators run
+    loop = asyncio.get_running_loop()
+    for i, call in enumerate(calls):
+        if i not in tasks:
+            tasks[i] = loop.run_in_executor(_executor, _run_inline, call)
+    outcomes: List[Any] = [None] * len(calls)
+    for i, task in tasks.items():
+        outcomes[i] = await task
+    return _merge(calls, outcomes)
+
+
+__all__ = ["Tool", "ToolCall", "TOOLS", "GOAL_TOOLSETS", "toolset_for", "run_tools", "arun_tools"]
@@ -2,10 +2,13 @@
 LangGraph Agent for Goal Planning
 Multi-node workflow: Planner → Router → Plan Generator → Evaluator
 """
-from typing import Dict, Any, List, TypedDict
+from contextvars import ContextVar
+from typing import Callable, Dict, Any, List, Optional, TypedDict
 from langgraph.graph import StateGraph, END
 import logging
 import json
+import os
+import re
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -81,7 +84,7 @@ def safe_json_from_text(text: str):
 
     # 1) try direct parse
     try:
-        return safe_json_from_text(t)
+        return json.loads(t)
     except Exception:
         pass
 
@@ -109,19 +112,17 @@ def safe_json_from_text(text: str):
     if start != -1 and end > start:
         candidate = t[start:end+1]
         candidate = re.sub(r",\s*([}\]])", r"\1", candidate)
-        return safe_json_from_text(candidate)
+        return json.loads(candidate)
 
     # nothing found
     raise ValueError("No JSON object/array found in response")
-import re
 
-from langgraph.graph import StateGraph, END
+
 from src.models.bedrock_client import bedrock_client
-from src.features.alpha_vantage_tool import (
-    get_stock_quote, 
-    calculate_retirement_projection
-)
-from src.features.mortgage_tool import calculate_mortgage
+from src.features.tool_registry import toolset_for, run_tools, arun_tools
+from src.features.goal_classifier import classify_goal, extract_parameters, describe_goal
+from src.utils.config import settings
+from src.utils.json_stream import StreamingArrayParser
 from src.utils.logger import logger
 
 # ============================================================================
@@ -134,6 +135,7 @@ class AgentState(TypedDict):
     user_profile: str
     analysis: str
     goal_type: str
+    parameters: Dict[str, Any]  # numbers stated in the goal (goal_classifier.extract_parameters)
     tool_calls: List[Dict[str, Any]]
     api_data: Dict[str, Any]
     plan_steps: List[Dict[str, Any]]
@@ -143,18 +145,20 @@ class AgentState(TypedDict):
     error: str
 
 
+# Every node has a sync version (graph.invoke) and an async one (graph.ainvoke).
+# They share the prompt builders and response parsers below; only the I/O differs.
+
+# Set by a streaming caller (/plan/stream) around graph.astream: async nodes
+# report progress through it, e.g. emit("plan_step", {...}). None = no streaming
+plan_event_sink: ContextVar[Optional[Callable[[str, Dict[str, Any]], None]]] = ContextVar(
+    "plan_event_sink", default=None
+)
+
 # ============================================================================
 # NODE 1: PLANNER (Uses Claude to analyze goal)
 # ============================================================================
 
-def planner_node(state: AgentState) -> AgentState:
-    """
-    Analyze user goal and determine what needs to be done
-    Uses Claude to understand intent and classify goal type
-    """
-    logger.info(f"PLANNER: Analyzing goal: {state['goal']}")
-    
-    system_prompt = """You are a financial planning assistant. Analyze the user's goal and:
+PLANNER_SYSTEM_PROMPT = """You are a financial planning assistant. Analyze the user's goal and:
 1. Classify the goal type (retirement/home_purchase/college/debt/general)
 2. Identify key parameters and timeline
 3. Determine which financial tools are needed
@@ -168,39 +172,83 @@ Return a JSON object with:
     "tools_needed": ["tool1", "tool2"]
 }"""
 
+
+def _classify_locally(state: AgentState) -> bool:
+    """
+    Extract goal parameters and try the local classifier
+
+    Returns:
+        True if goal_type/analysis were set without the LLM
+    """
+    state['parameters'] = extract_parameters(state['goal'])
+    if not settings.goal_classifier_enabled:
+        return False
+    goal_type, confidence, _ = classify_goal(state['goal'])
+    if confidence < settings.goal_classifier_min_confidence:
+        logger.info(f"PLANNER: Local classifier unsure ({goal_type} {confidence:.2f}), asking the LLM")
+        return False
+    state['goal_type'] = goal_type
+    state['analysis'] = describe_goal(goal_type, state['parameters'])
+    logger.info(f"PLANNER: Classified locally as '{goal_type}' ({confidence:.2f})")
+    return True
+
+
+def _planner_request(state: AgentState) -> Dict[str, Any]:
+    """Bedrock invoke() arguments for the planner"""
     user_message = f"""Goal: {state['goal']}
 User Profile: {state['user_profile']}
 
 Analyze this financial goal and provide structured output."""
+    return {
+        "messages": [{"role": "user", "content": user_message}],
+        "system": PLANNER_SYSTEM_PROMPT,
+        "max_tokens": 1000,
+        "temperature": 0.2,
+    }
 
-        # ---- Extract, parse, and classify planner response (single try) ----
 
-    # ---- LLM call + parse (single try) ----
+def _apply_planner_response(state: AgentState, response: Any) -> AgentState:
+    """Parse the planner reply into goal_type/analysis"""
+    # Normalize to plain text (works for dict/object/string)
+    response_text = bedrock_text_from_result(response) or ""
+    logger.info(f"PLANNER: Got response ({len(response_text)} chars)")
+
+    # Parse JSON from text (handles prose + fenced code)
+    result = safe_json_from_text(response_text.strip())
+
+    # Fill state (always present)
+    state['goal_type'] = result.get('goal_type', 'general')
+    state['analysis']  = result.get('analysis', '')
+
+    logger.info(f"PLANNER: Classified as '{state['goal_type']}'")
+    return state
+
+
+def planner_node(state: AgentState) -> AgentState:
+    """
+    Analyze user goal and determine what needs to be done
+    Uses Claude to understand intent and classify goal type
+    """
+    logger.info(f"PLANNER: Analyzing goal: {state['goal']}")
     try:
-        # 1) Call Bedrock (capture the raw response object)
-        response = bedrock_client.invoke(
-            messages=[{"role": "user", "content": user_message}],
-            system=system_prompt,
-            max_tokens=1000,
-            temperature=0.2
-        )
-
-        # 2) Normalize to plain text (works for dict/object/string)
-        response_text = bedrock_text_from_result(response) or ""
-        logger.info(f"PLANNER: Got response ({len(response_text)} chars)")
-
-        # 3) Parse JSON from text (handles prose + fenced code)
-        raw_text = response_text.strip()
-        logger.info(f"PLANNER: Extracted text: {len(raw_text)} chars")
-        result = safe_json_from_text(raw_text)  # {} on failure
-
-        # 4) Fill state (always present)
-        state['goal_type'] = result.get('goal_type', 'general')
-        state['analysis']  = result.get('analysis', '')
-
-        logger.info(f"PLANNER: Classified as '{state['goal_type']}'")
+        if _classify_locally(state):
+            return state
+        response = bedrock_client.invoke(**_planner_request(state))
+        return _apply_planner_response(state, response)
+    except Exception as e:
+        logger.error(f"PLANNER error: {e}")
+        state['error'] = f"Planning failed: {str(e)}"
         return state
 
+
+async def aplanner_node(state: AgentState) -> AgentState:
+    """Async planner_node: the Bedrock call does not block the event loop"""
+    logger.info(f"PLANNER: Analyzing goal: {state['goal']}")
+    try:
+        if _classify_locally(state):
+            return state
+        response = await bedrock_client.ainvoke(**_planner_request(state))
+        return _apply_planner_response(state, response)
     except Exception as e:
         logger.error(f"PLANNER error: {e}")
         state['error'] = f"Planning failed: {str(e)}"
@@ -216,58 +264,21 @@ def router_node(state: AgentState) -> AgentState:
     Calls APIs and stores results in state
     """
     logger.info(f"ROUTER: Routing '{state['goal_type']}' goal")
-    
-    tool_calls = []
-    api_data = {}
-    
     try:
-        goal_type = state['goal_type']
-        
-        # Retirement goals
-        if goal_type == 'retirement':
-            logger.info("ROUTER: Calling retirement tools")
-            
-            # Get market data
-            spy_quote = get_stock_quote('SPY')
-            tool_calls.append({"tool": "get_stock_quote", "params": {"symbol": "SPY"}})
-            api_data['spy_quote'] = spy_quote
-            
-            # Calculate retirement projection
-            retirement_data = calculate_retirement_projection(
-                current_age=30,
-                retirement_age=65,
-                monthly_contribution=500,
-                current_savings=10000
-            )
-            tool_calls.append({"tool": "retirement_projection", "params": retirement_data})
-            api_data['retirement_projection'] = retirement_data
-            
-        # Home purchase goals
-        elif goal_type == 'home_purchase':
-            logger.info("ROUTER: Calling mortgage calculator")
-            
-            mortgage_data = calculate_mortgage(
-                home_price=400000,
-                down_payment_percent=20,
-                interest_rate=7.0,
-                loan_term_years=30
-            )
-            tool_calls.append({"tool": "mortgage_calculator", "params": mortgage_data})
-            api_data['mortgage'] = mortgage_data
-            
-        # General financial goals
-        else:
-            logger.info("ROUTER: Using market overview")
-            spy_quote = get_stock_quote('SPY')
-            tool_calls.append({"tool": "get_stock_quote", "params": {"symbol": "SPY"}})
-            api_data['market_data'] = spy_quote
-        
-        state['tool_calls'] = tool_calls
-        state['api_data'] = api_data
-        
-        logger.info(f"ROUTER: Called {len(tool_calls)} tools")
+        state['tool_calls'], state['api_data'] = run_tools(toolset_for(state['goal_type'], state.get('parameters')))
+        return state
+    except Exception as e:
+        logger.error(f"Router error: {e}")
+        state['error'] = f"Routing failed: {str(e)}"
+        return state
+
+
+async def arouter_node(state: AgentState) -> AgentState:
+    """Async router_node: network tools run as concurrent tasks"""
+    logger.info(f"ROUTER: Routing '{state['goal_type']}' goal")
+    try:
+        state['tool_calls'], state['api_data'] = await arun_tools(toolset_for(state['goal_type'], state.get('parameters')))
         return state
-        
     except Exception as e:
         logger.error(f"Router error: {e}")
         state['error'] = f"Routing failed: {str(e)}"
@@ -278,120 +289,7 @@ def router_node(state: AgentState) -> AgentState:
 # NODE 3: PLAN GENERATOR (Creates detailed action plan)
 # ============================================================================
 
-def plan_generator_node(state: AgentState) -> AgentState:
-    """
-    Build user-facing plan using API data and LLM output.
-    Priority: 1) JSON with plan_steps 2) Extract JSON from text 3) Line parsing
-    Never overwrite non-empty plan_steps with empty results.
-    """
-    import json
-    import re
-    from typing import Any, Dict, List
-
-    logger.info("PLAN GENERATOR: Creating plan with API data")
-
-    # Helper: Normalize step keys
-    def _coerce_step(d: Dict[str, Any], idx: int) -> Dict[str, Any]:
-        return {
-            "step_number": d.get("step_number") or d.get("step") or idx,
-            "title": d.get("title") or d.get("action") or f"Step {idx}",
-            "description": d.get("description") or d.get("details") or "",
-            "estimated_duration": d.get("estimated_duration") or d.get("timeline") or "TBD",
-            "resources_needed": d.get("resources_needed") or d.get("resources") or []
-        }
-
-    # Helper: Extract JSON from mixed text
-    def _parse_json_from_text(text: str) -> Dict[str, Any]:
-        patterns = [
-            r'\{[^{}]*"plan_steps"[^{}]*\[[^\]]*\][^{}]*\}',
-            r'\[[^\[\]]*\{[^\}]*"step_number"[^\}]*\}[^\[\]]*\]',
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, text, re.DOTALL)
-            if match:
-                try:
-                    return safe_json_from_text(match.group(0))
-                except:
-                    continue
-        # Fallback: find balanced braces
-        start = text.find('{')
-        if start >= 0:
-            count = 0
-            for i in range(start, len(text)):
-                if text[i] == '{': count += 1
-                elif text[i] == '}':
-                    count -= 1
-                    if count == 0:
-                        try:
-                            return safe_json_from_text(text[start:i+1])
-                        except:
-                            break
-        return {}
-
-    # Helper: Extract steps and summary
-    def _extract_steps_and_summary(obj: Any) -> tuple:
-        if obj is None:
-            return [], ""
-        
-        data = {}
-        if isinstance(obj, dict):
-            data = obj
-        elif isinstance(obj, str):
-            try:
-                data = safe_json_from_text(obj)
-            except:
-                data = _parse_json_from_text(obj)
-        
-        if not isinstance(data, dict):
-            return [], ""
-        
-        steps = data.get("plan_steps") or data.get("steps") or []
-        summary = data.get("summary") or ""
-        
-        if not steps:
-            container = data.get("plan") or data.get("result") or {}
-            if isinstance(container, dict):
-                steps = container.get("plan_steps") or container.get("steps") or []
-                summary = summary or container.get("summary") or ""
-        
-        if isinstance(steps, list):
-            norm = [_coerce_step(s if isinstance(s, dict) else {}, i) for i, s in enumerate(steps, 1)]
-            norm = [s for s in norm if s["title"] or s["description"]]
-            return norm, str(summary or "").strip()
-        
-        return [], str(summary or "").strip()
-
-    # Helper: Fallback line parsing
-    def _fallback_line_parse(text: str) -> List[Dict[str, Any]]:
-        if not text:
-            return []
-        steps = []
-        lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-        current = None
-        
-        for line in lines:
-            match = re.match(r'^(?:Step\s+)?(\d+)[\.:)\s]+(.+)$', line, re.IGNORECASE)
-            if match:
-                if current:
-                    steps.append(current)
-                current = {
-                    "step_number": int(match.group(1)),
-                    "title": match.group(2).strip(),
-                    "description": "",
-                    "estimated_duration": "TBD",
-                    "resources_needed": []
-                }
-            elif current and line:
-                current["description"] += " " + line
-        
-        if current:
-            steps.append(current)
-        return steps
-
-    try:
-        api_context = json.dumps(state['api_data'], indent=2) if state['api_data'] else "No API data"
-        
-        system_prompt = """You are a financial planning assistant. Create 10-15 actionable steps.
+PLAN_GENERATOR_SYSTEM_PROMPT = """You are a financial planning assistant. Create 10-15 actionable steps.
 
 Return ONLY valid JSON:
 {
@@ -407,47 +305,214 @@ Return ONLY valid JSON:
     ]
 }"""
 
-        user_message = f"""Goal: {state['goal']}
+
+def _coerce_step(d: Dict[str, Any], idx: int) -> Dict[str, Any]:
+    """Normalize step keys"""
+    return {
+        "step_number": d.get("step_number") or d.get("step") or idx,
+        "title": d.get("title") or d.get("action") or f"Step {idx}",
+        "description": d.get("description") or d.get("details") or "",
+        "estimated_duration": d.get("estimated_duration") or d.get("timeline") or "TBD",
+        "resources_needed": d.get("resources_needed") or d.get("resources") or []
+    }
+
+
+def _parse_json_from_text(text: str) -> Dict[str, Any]:
+    """Extract JSON from mixed text"""
+    patterns = [
+        r'\{[^{}]*"plan_steps"[^{}]*\[[^\]]*\][^{}]*\}',
+        r'\[[^\[\]]*\{[^\}]*"step_number"[^\}]*\}[^\[\]]*\]',
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, text, re.DOTALL)
+        if match:
+            try:
+                return safe_json_from_text(match.group(0))
+            except:
+                continue
+    # Fallback: find balanced braces
+    start = text.find('{')
+    if start >= 0:
+        count = 0
+        for i in range(start, len(text)):
+            if text[i] == '{': count += 1
+            elif text[i] == '}':
+                count -= 1
+                if count == 0:
+                    try:
+                        return safe_json_from_text(text[start:i+1])
+                    except:
+                        break
+    return {}
+
+
+def _extract_steps_and_summary(obj: Any) -> tuple:
+    """Extract steps and summary"""
+    if obj is None:
+        return [], ""
+    
+    data = {}
+    if isinstance(obj, dict):
+        data = obj
+    elif isinstance(obj, str):
+        try:
+            data = safe_json_from_text(obj)
+        except:
+            data = _parse_json_from_text(obj)
+    
+    if not isinstance(data, dict):
+        return [], ""
+    
+    steps = data.get("plan_steps") or data.get("steps") or []
+    summary = data.get("summary") or ""
+    
+    if not steps:
+        container = data.get("plan") or data.get("result") or {}
+        if isinstance(container, dict):
+            steps = container.get("plan_steps") or container.get("steps") or []
+            summary = summary or container.get("summary") or ""
+    
+    if isinstance(steps, list):
+        norm = [_coerce_step(s if isinstance(s, dict) else {}, i) for i, s in enumerate(steps, 1)]
+        norm = [s for s in norm if s["title"] or s["description"]]
+        return norm, str(summary or "").strip()
+    
+    return [], str(summary or "").strip()
+
+
+def _fallback_line_parse(text: str) -> List[Dict[str, Any]]:
+    """Fallback line parsing"""
+    if not text:
+        return []
+    steps = []
+    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
+    current = None
+    
+    for line in lines:
+        match = re.match(r'^(?:Step\s+)?(\d+)[\.:)\s]+(.+)$', line, re.IGNORECASE)
+        if match:
+            if current:
+                steps.append(current)
+            current = {
+                "step_number": int(match.group(1)),
+                "title": match.group(2).strip(),
+                "description": "",
+                "estimated_duration": "TBD",
+                "resources_needed": []
+            }
+        elif current and line:
+            current["description"] += " " + line
+    
+    if current:
+        steps.append(current)
+    return steps
+
+
+# Bulky tool output kept in api_data for clients but left out of the prompt
+_PROMPT_OMIT_KEYS = {"bands"}
+
+
+def _prompt_data(api_data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: {k: v for k, v in value.items() if k not in _PROMPT_OMIT_KEYS} if isinstance(value, dict) else value
+        for key, value in api_data.items()
+    }
+
+
+def _plan_generator_request(state: AgentState) -> Dict[str, Any]:
+    """Bedrock invoke() arguments for the plan generator"""
+    api_context = json.dumps(_prompt_data(state['api_data']), indent=2) if state['api_data'] else "No API data"
+    parameters = json.dumps(state.get('parameters') or {})
+    user_message = f"""Goal: {state['goal']}
 User: {state['user_profile']}
 Type: {state['goal_type']}
 Analysis: {state['analysis']}
+Parameters: {parameters}
 
 Data:
 {api_context}
 
 Create comprehensive plan with 10-15 steps."""
+    return {
+        "messages": [{"role": "user", "content": user_message}],
+        "system": PLAN_GENERATOR_SYSTEM_PROMPT,
+        "max_tokens": 3000,
+        "temperature": 0.3,
+    }
 
-        response = bedrock_client.invoke(
-            messages=[{"role": "user", "content": user_message}],
-            system=system_prompt,
-            max_tokens=3000,
-            temperature=0.3
-        )
-        
-        parsed_steps = []
-        
-        try:
-            data = safe_json_from_text(response)
-            parsed_steps, summary = _extract_steps_and_summary(data)
+
+def _apply_plan_response(state: AgentState, response: str) -> AgentState:
+    """
+    Build user-facing plan from the LLM output.
+    Priority: 1) JSON with plan_steps 2) Extract JSON from text 3) Line parsing
+    Never overwrite non-empty plan_steps with empty results.
+    """
+    parsed_steps = []
+    
+    try:
+        data = safe_json_from_text(response)
+        parsed_steps, summary = _extract_steps_and_summary(data)
+        if summary:
+            state['summary'] = summary
+    except (json.JSONDecodeError, ValueError):
+        extracted = _parse_json_from_text(response)
+        if extracted:
+            parsed_steps, summary = _extract_steps_and_summary(extracted)
             if summary:
                 state['summary'] = summary
-        except json.JSONDecodeError:
-            extracted = _parse_json_from_text(response)
-            if extracted:
-                parsed_steps, summary = _extract_steps_and_summary(extracted)
-                if summary:
-                    state['summary'] = summary
-            else:
-                parsed_steps = _fallback_line_parse(response)
-        
-        if parsed_steps:
-            state['plan_steps'] = parsed_steps
-            logger.info(f"PLAN GENERATOR: Created {len(parsed_steps)} steps")
         else:
-            logger.warning("PLAN GENERATOR: No steps parsed")
-        
+            parsed_steps = _fallback_line_parse(response)
+    
+    if parsed_steps:
+        state['plan_steps'] = parsed_steps
+        logger.info(f"PLAN GENERATOR: Created {len(parsed_steps)} steps")
+    else:
+        logger.warning("PLAN GENERATOR: No steps parsed")
+    
+    return state
+
+
+def plan_generator_node(state: AgentState) -> AgentState:
+    """
+    Build user-facing plan using API data and LLM output.
+    """
+    logger.info("PLAN GENERATOR: Creating plan with API data")
+    try:
+        response = bedrock_client.invoke(**_plan_generator_request(state))
+        return _apply_plan_response(state, response)
+    except Exception as e:
+        logger.error(f"Plan generator error: {e}")
+        state['error'] = f"Plan generation failed: {str(e)}"
         return state
-        
+
+
+async def _astream_plan(request: Dict[str, Any], emit: Callable[[str, Dict[str, Any]], None]) -> str:
+    """Stream the completion, emitting each plan step as soon as its JSON object closes"""
+    parser = StreamingArrayParser("plan_steps")
+    parts = []
+    async for text in bedrock_client.astream(**request):
+        parts.append(text)
+        steps = parser.feed(text)
+        base = parser.count - len(steps)  # feed() has already counted every step in this chunk
+        for i, step in enumerate(steps, 1):
+            emit("plan_step", _coerce_step(step, base + i))
+    return "".join(parts)
+
+
+async def aplan_generator_node(state: AgentState) -> AgentState:
+    """
+    Async plan_generator_node. With a plan_event_sink set, the completion is
+    streamed and steps are emitted incrementally
+    """
+    logger.info("PLAN GENERATOR: Creating plan with API data")
+    try:
+        request = _plan_generator_request(state)
+        emit = plan_event_sink.get()
+        if emit is None:
+            response = await bedrock_client.ainvoke(**request)
+        else:
+            response = await _astream_plan(request, emit)
+        return _apply_plan_response(state, response)
     except Exception as e:
         logger.error(f"Plan generator error: {e}")
         state['error'] = f"Plan generation failed: {str(e)}"
@@ -506,15 +571,21 @@ def evaluator_node(state: AgentState) -> AgentState:
 # BUILD GRAPH
 # ============================================================================
 
-def create_goal_planning_graph():
-    """Create the LangGraph workflow"""
+def create_goal_planning_graph(use_async: bool = False):
+    """
+    Create the LangGraph workflow
+    
+    Args:
+        use_async: Use the async nodes (run with ainvoke, LLM and HTTP waits
+            overlap across concurrent plans)
+    """
     workflow = StateGraph(AgentState)
     
     # Add nodes
-    workflow.add_node("planner", planner_node)
-    workflow.add_node("router", router_node)
-    workflow.add_node("plan_generator", plan_generator_node)
-    workflow.add_node("evaluator", evaluator_node)
+    workflow.add_node("planner", aplanner_node if use_async else planner_node)
+    workflow.add_node("router", arouter_node if use_async else router_node)
+    workflow.add_node("plan_generator", aplan_generator_node if use_async else plan_generator_node)
+    workflow.add_node("evaluator", evaluator_node)  # pure CPU, fine in both
     
     # Define edges (workflow)
     workflow.set_entry_point("planner")
@@ -525,7 +596,8 @@ def create_goal_planning_graph():
     
     return workflow.compile()
 
-# Global graph instance
+# Global graph instances
 goal_planning_graph = create_goal_planning_graph()
+async_goal_planning_graph = create_goal_planning_graph(use_async=True)
 
-__all__ = ["goal_planning_graph", "AgentState"]
+__all__ = ["goal_planning_graph", "async_goal_planning_graph", "plan_event_sink", "AgentState"]
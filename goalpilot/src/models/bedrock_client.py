@@ -1,22 +1,201 @@
 """
 AWS Bedrock Client for Claude AI
+- boto3 is blocking: ainvoke() runs invoke() on a bounded thread pool so the
+  event loop keeps serving while calls are in flight
+- At most BEDROCK_MAX_CONCURRENCY calls in flight (sync and async callers
+  share one semaphore) over a BEDROCK_POOL_SIZE connection pool
+- Adaptive rate limit: a token bucket that halves its rate on every
+  ThrottlingException and creeps back up on success (AIMD)
+- Throttles, 5xx and connection errors are retried with full-jitter backoff
+  (botocore's own retries are off so attempts aren't multiplied)
+- Every call reports latency and token usage (including prompt-cache reads
+  and writes) to metrics_tracker
+- BEDROCK_PROMPT_CACHING=true sends the system prompt as a cache_control
+  block, so repeated calls reuse the cached prefix
+- BEDROCK_BACKEND=stub swaps in a deterministic local client (bedrock_stub.py)
 """
 import json
+import time
+import asyncio
+import threading
 import boto3
-from typing import List, Dict, Any
+from botocore.config import Config
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError
+)
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, AsyncIterator, Iterator, Optional
+from src.models.bedrock_stub import StubBedrockRuntime
+from src.monitoring.metrics_tracker import metrics
+from src.utils.http_client import RetryPolicy
 from src.utils.config import settings
 from src.utils.logger import logger
 
+THROTTLE_CODES = {"ThrottlingException", "TooManyRequestsException"}
+RETRYABLE_CODES = THROTTLE_CODES | {
+    "ServiceUnavailableException",
+    "InternalServerException",
+    "ModelNotReadyException",
+    "ModelTimeoutException"
+}
+RETRYABLE_ERRORS = (ConnectionClosedError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError)
+
+
+class AdaptiveRateLimiter:
+    """
+    Blocking token bucket with AIMD rate control
+    
+    Args:
+        rate: Starting requests per second (also the ceiling)
+        min_rate: Floor the rate never drops below
+        increase: Requests/second added back per successful call
+        decrease: Factor applied to the rate on a throttle
+    """
+
+    def __init__(self, rate: float, min_rate: float = 0.5, increase: float = 0.1, decrease: float = 0.5):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = max(1.0, rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Wait for a token; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                capacity = max(1.0, self.rate)
+                self._tokens = min(capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+    
+    def on_throttle(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+        logger.warning(f"Bedrock throttled, rate limit now {self.rate:.2f} req/s")
+    
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+def _error_code(e: Exception) -> str:
+    return e.response.get("Error", {}).get("Code", "") if isinstance(e, ClientError) else ""
+
+
+def _close(body: Any):
+    """Close a response body / event stream (drops the connection if unread)"""
+    close = getattr(body, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception as e:
+            logger.debug(f"Closing Bedrock response body failed: {e}")
+
+
+def _usage(body: Dict[str, Any]) -> Dict[str, int]:
+    usage = body.get("usage") or {}
+    return {
+        "input_tokens": int(usage.get("input_tokens", 0)),
+        "output_tokens": int(usage.get("output_tokens", 0)),
+        "cache_read_tokens": int(usage.get("cache_read_input_tokens") or 0),
+        "cache_write_tokens": int(usage.get("cache_creation_input_tokens") or 0)
+    }
+
+
 class BedrockClient:
-    """Client for invoking Claude via AWS Bedrock"""
+    """Client for invoking Claude via AWS Bedrock (or the local stub)"""
     
-    def __init__(self):
-        self.client = boto3.client(
-            service_name='bedrock-runtime',
-            region_name=settings.aws_region
-        )
+    def __init__(self, runtime: Any = None):
+        self.max_concurrency = settings.bedrock_max_concurrency
+        self.backend = "custom" if runtime is not None else settings.bedrock_backend
+        if runtime is not None:
+            self.client = runtime
+        elif self.backend == "stub":
+            self.client = StubBedrockRuntime(latency_ms=settings.bedrock_stub_latency_ms)
+        else:
+            self.client = boto3.client(
+                service_name='bedrock-runtime',
+                region_name=settings.aws_region,
+                config=Config(
+                    max_pool_connections=settings.bedrock_pool_size,
+                    connect_timeout=5,
+                    read_timeout=settings.bedrock_read_timeout_seconds,
+                    retries={"total_max_attempts": 1, "mode": "standard"}  # we retry ourselves
+                )
+            )
         self.model_id = settings.bedrock_model
-        logger.info(f"Initialized Bedrock client with model: {self.model_id}")
+        self.prompt_caching = settings.bedrock_prompt_caching
+        self.limiter = AdaptiveRateLimiter(settings.bedrock_requests_per_second)
+        self.retry = RetryPolicy(max_attempts=settings.bedrock_max_attempts, base_delay=0.5, max_delay=10.0)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="bedrock"
+        )
+        logger.info(f"Initialized Bedrock client ({self.backend}) with model: {self.model_id}")
+    
+    def _request_body(self, messages, system, max_tokens, temperature) -> Dict[str, Any]:
+        """Anthropic Messages API body"""
+        request_body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": messages
+        }
+        
+        if system and self.prompt_caching:
+            # The system prompt is static per node: cache it as the request prefix
+            request_body["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+        elif system:
+            request_body["system"] = system
+        return request_body
+    
+    def _call(self, operation: str, request_body: Dict[str, Any], stats: Dict[str, int]) -> Dict[str, Any]:
+        """
+        One logical Bedrock call: rate limit, concurrency slot, retries
+        
+        The slot is still held on return; the caller releases it once the
+        response body has been read.
+        """
+        body = json.dumps(request_body)
+        for attempt in range(1, self.retry.max_attempts + 1):
+            self.limiter.acquire()
+            self._slots.acquire()
+            try:
+                response = getattr(self.client, operation)(modelId=self.model_id, body=body)
+                self.limiter.on_success()
+                return response
+            except (ClientError, *RETRYABLE_ERRORS) as e:
+                self._slots.release()
+                code = _error_code(e)
+                if code in THROTTLE_CODES:
+                    stats["throttles"] += 1
+                    self.limiter.on_throttle()
+                if (isinstance(e, ClientError) and code not in RETRYABLE_CODES) or attempt == self.retry.max_attempts:
+                    raise
+                stats["retries"] += 1
+                delay = self.retry.delay(attempt)
+                logger.warning(f"Bedrock {code or type(e).__name__}, retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+            except Exception:
+                self._slots.release()
+                raise
     
     def invoke(
         self,
@@ -33,29 +212,26 @@ class BedrockClient:
             system: System prompt (optional)
             max_tokens: Max tokens to generate
             temperature: Sampling temperature (0-1)
-            
+        
         Returns:
             Generated text from Claude
         """
-        request_body = {
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "messages": messages
-        }
-        
-        if system:
-            request_body["system"] = system
+        request_body = self._request_body(messages, system, max_tokens, temperature)
+        stats = {"retries": 0, "throttles": 0}
+        started = time.perf_counter()
+        usage: Dict[str, int] = {}
+        success = False
         
         try:
             logger.debug(f"Invoking Bedrock model: {self.model_id}")
             
-            response = self.client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps(request_body)
-            )
-            
-            response_body = json.loads(response['body'].read())
+            response = self._call("invoke_model", request_body, stats)
+            try:
+                response_body = json.loads(response['body'].read())
+            finally:
+                self._slots.release()
+            usage = _usage(response_body)
+            success = True
             
             if 'content' in response_body and len(response_body['content']) > 0:
                 text = response_body['content'][0]['text']
@@ -64,12 +240,144 @@ class BedrockClient:
             else:
                 logger.error("No content in Bedrock response")
                 return ""
-                
+        
         except Exception as e:
             logger.error(f"Bedrock invocation error: {e}")
             raise
+        finally:
+            metrics.record_llm_call(
+                latency_ms=(time.perf_counter() - started) * 1000,
+                success=success,
+                **usage,
+                **stats
+            )
+    
+    async def ainvoke(
+        self,
+        messages: List[Dict[str, str]],
+        system: str = None,
+        max_tokens: int = 2000,
+        temperature: float = 0.2
+    ) -> str:
+        """
+        Async invoke(): at most max_concurrency calls run at once, extra
+        callers wait for a free worker without blocking the event loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            partial(self.invoke, messages, system=system, max_tokens=max_tokens, temperature=temperature)
+        )
+    
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        system: str = None,
+        max_tokens: int = 2000,
+        temperature: float = 0.2,
+        cancelled: Optional[threading.Event] = None
+    ) -> Iterator[str]:
+        """
+        Invoke Claude with invoke_model_with_response_stream
+        
+        Only opening the stream is retried; once text has been yielded an
+        error is raised to the caller. Setting `cancelled` (or closing the
+        generator) stops reading: the event stream is closed so Bedrock stops
+        generating, and the concurrency slot is released.
+        
+        Yields:
+            Text deltas as Bedrock sends them
+        """
+        request_body = self._request_body(messages, system, max_tokens, temperature)
+        stats = {"retries": 0, "throttles": 0}
+        usage = {"input_tokens": 0, "output_tokens": 0, "cache_read_tokens": 0, "cache_write_tokens": 0}
+        started = time.perf_counter()
+        success = False
+        logger.debug(f"Streaming Bedrock model: {self.model_id}")
+        try:
+            response = self._call("invoke_model_with_response_stream", request_body, stats)
+            try:
+                for event in response['body']:
+                    if cancelled is not None and cancelled.is_set():
+                        logger.info("Bedrock stream cancelled by the caller")
+                        break
+                    chunk = event.get('chunk')
+                    if not chunk:
+                        continue
+                    data = json.loads(chunk['bytes'])
+                    kind = data.get('type')
+                    if kind == 'content_block_delta':
+                        text = data.get('delta', {}).get('text')
+                        if text:
+                            yield text
+                    elif kind == 'message_start':
+                        usage.update(_usage(data.get('message', {})))
+                    elif kind == 'message_delta':
+                        usage["output_tokens"] = _usage(data)["output_tokens"]
+                success = True  # a caller cancelling is not a Bedrock error
+            finally:
+                _close(response['body'])
+                self._slots.release()
+        finally:
+            metrics.record_llm_call(
+                latency_ms=(time.perf_counter() - started) * 1000,
+                success=success,
+                **usage,
+                **stats
+            )
+    
+    async def astream(
+        self,
+        messages: List[Dict[str, str]],
+        system: str = None,
+        max_tokens: int = 2000,
+        temperature: float = 0.2
+    ) -> AsyncIterator[str]:
+        """
+        Async stream(): the blocking event stream is read on the Bedrock
+        thread pool. If the consumer stops early (client disconnected, task
+        cancelled) the reader thread closes the stream at the next event.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        cancelled = threading.Event()
+        
+        def deliver(item):
+            if cancelled.is_set():
+                return
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:  # event loop already closed
+                cancelled.set()
+        
+        def pump():
+            texts = self.stream(messages, system=system, max_tokens=max_tokens,
+                                temperature=temperature, cancelled=cancelled)
+            try:
+                for text in texts:
+                    deliver(text)
+            except Exception as e:
+                deliver(e)
+            finally:
+                texts.close()
+                deliver(done)
+        
+        pumping = loop.run_in_executor(self._executor, pump)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    logger.error(f"Bedrock stream error: {item}")
+                    raise item
+                yield item
+            await pumping
+        finally:
+            cancelled.set()
 
 # Global instance
 bedrock_client = BedrockClient()
 
-__all__ = ["bedrock_client", "BedrockClient"]
+__all__ = ["bedrock_client", "BedrockClient", "AdaptiveRateLimiter"]
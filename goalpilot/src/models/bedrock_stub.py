@@ -0,0 +1,144 @@
+"""
+Deterministic local stand-in for the bedrock-runtime client (BEDROCK_BACKEND=stub)
+Same request/response shapes as invoke_model / invoke_model_with_response_stream,
+no AWS account or network: for tests, load tests and offline development
+"""
+import io
+import json
+import time
+import threading
+from typing import Any, Dict, Iterator, List
+
+from botocore.exceptions import ClientError
+
+_GOAL_TYPES = [
+    ("retirement", ("retire", "retirement", "pension", "401k")),
+    ("home_purchase", ("house", "home", "down payment", "mortgage")),
+    ("college", ("college", "education", "tuition", "529")),
+    ("debt", ("debt", "loan", "credit card")),
+]
+
+
+def _text_of(content: Any) -> str:
+    """Message/system content as text (plain string or content blocks)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return ""
+
+
+def _field(text: str, name: str) -> str:
+    for line in text.splitlines():
+        if line.startswith(f"{name}:"):
+            return line.split(":", 1)[1].strip()
+    return ""
+
+
+class StubBedrockRuntime:
+    """
+    Fake bedrock-runtime client
+
+    Args:
+        latency_ms: Simulated model latency per call (streams spread it over chunks)
+        throttle_every: Raise ThrottlingException on every Nth call (0 = never)
+    """
+
+    def __init__(self, latency_ms: float = 0.0, throttle_every: int = 0):
+        self.latency = latency_ms / 1000.0
+        self.throttle_every = throttle_every
+        self.calls = 0
+        self._prompt_cache = set()
+        self._lock = threading.Lock()
+
+    def _reply(self, body: Dict[str, Any]) -> str:
+        system = _text_of(body.get("system"))
+        prompt = _text_of(body["messages"][-1]["content"])
+        goal = _field(prompt, "Goal")
+        if "goal_type" in system and "plan_steps" not in system:
+            lowered = goal.lower()
+            goal_type = next((t for t, words in _GOAL_TYPES if any(w in lowered for w in words)), "general")
+            return json.dumps({
+                "goal_type": goal_type,
+                "analysis": f"Stub analysis of a {goal_type} goal: {goal}",
+                "parameters": {},
+                "tools_needed": []
+            })
+        return json.dumps({
+            "summary": f"Stub plan for: {goal}",
+            "plan_steps": [
+                {
+                    "step_number": i,
+                    "title": f"Step {i}",
+                    "description": f"Deterministic stub step {i} for the goal '{goal}'",
+                    "estimated_duration": f"{i} month{'s' if i > 1 else ''}",
+                    "resources_needed": ["Budget spreadsheet"]
+                }
+                for i in range(1, 11)
+            ]
+        }, indent=2)
+
+    def _usage(self, body: Dict[str, Any], text: str) -> Dict[str, int]:
+        """Token counts at ~4 chars/token; a cache_control system prompt is written once, then read"""
+        system = body.get("system")
+        messages = "".join(_text_of(m["content"]) for m in body["messages"])
+        usage = {"input_tokens": len(messages) // 4, "output_tokens": len(text) // 4}
+        if isinstance(system, list) and any("cache_control" in block for block in system):
+            prefix = _text_of(system)
+            with self._lock:
+                hit = prefix in self._prompt_cache
+                self._prompt_cache.add(prefix)
+            usage["cache_read_input_tokens" if hit else "cache_creation_input_tokens"] = len(prefix) // 4
+        else:
+            usage["input_tokens"] += len(_text_of(system)) // 4
+        return usage
+
+    def _begin(self, operation: str) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+            throttled = self.throttle_every and self.calls % self.throttle_every == 0
+        if throttled:
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded (stub)"}},
+                operation
+            )
+
+    def invoke_model(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        self._begin("InvokeModel")
+        request = json.loads(body)
+        text = self._reply(request)
+        time.sleep(self.latency)
+        payload = {
+            "type": "message",
+            "role": "assistant",
+            "model": modelId,
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "usage": self._usage(request, text)
+        }
+        return {"body": io.BytesIO(json.dumps(payload).encode()), "contentType": "application/json"}
+
+    def invoke_model_with_response_stream(self, modelId: str, body: str, **kwargs) -> Dict[str, Any]:
+        self._begin("InvokeModelWithResponseStream")
+        request = json.loads(body)
+        text = self._reply(request)
+        return {"body": self._events(request, text), "contentType": "application/json"}
+
+    def _events(self, request: Dict[str, Any], text: str) -> Iterator[Dict[str, Any]]:
+        usage = self._usage(request, text)
+        chunks: List[str] = [text[i:i + 64] for i in range(0, len(text), 64)]
+
+        def event(data: Dict[str, Any]) -> Dict[str, Any]:
+            return {"chunk": {"bytes": json.dumps(data).encode()}}
+
+        start_usage = {k: v for k, v in usage.items() if k != "output_tokens"}
+        yield event({"type": "message_start", "message": {"usage": start_usage}})
+        for chunk in chunks:
+            time.sleep(self.latency / max(1, len(chunks)))
+            yield event({"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": chunk}})
+        yield event({"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                     "usage": {"output_tokens": usage["output_tokens"]}})
+        yield event({"type": "message_stop"})
+
+
+__all__ = ["StubBedrockRuntime"]
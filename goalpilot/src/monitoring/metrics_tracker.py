@@ -1,7 +1,8 @@
 """
 Simple in-memory metrics tracker for API performance
-Tracks: total requests, successful plans, eval scores
+Tracks: total requests, successful plans, eval scores, LLM calls
 """
+from collections import deque
 from datetime import datetime
 from typing import Dict, List
 import threading
@@ -18,6 +19,17 @@ class MetricsTracker:
             'eval_scores': [],  # Quality scores from evaluator
             'start_time': datetime.utcnow().isoformat()
         }
+        self._llm = {
+            'calls': 0,
+            'errors': 0,
+            'retries': 0,
+            'throttles': 0,
+            'input_tokens': 0,
+            'output_tokens': 0,
+            'cache_read_tokens': 0,   # prompt-cache hits (billed at the cache-read rate)
+            'cache_write_tokens': 0,  # prompt-cache writes
+            'latencies_ms': deque(maxlen=1000)  # recent calls, for percentiles
+        }
     
     def record_request(self, success: bool, eval_score: float = None):
         """Record a plan generation attempt"""
@@ -31,6 +43,46 @@ class MetricsTracker:
             else:
                 self._data['failed_plans'] += 1
     
+    def record_llm_call(
+        self,
+        latency_ms: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0,
+        retries: int = 0,
+        throttles: int = 0,
+        success: bool = True
+    ):
+        """Record one Bedrock call (latency includes retries and rate-limit waits)"""
+        with self._lock:
+            llm = self._llm
+            llm['calls'] += 1
+            llm['errors'] += 0 if success else 1
+            llm['retries'] += retries
+            llm['throttles'] += throttles
+            llm['input_tokens'] += input_tokens
+            llm['output_tokens'] += output_tokens
+            llm['cache_read_tokens'] += cache_read_tokens
+            llm['cache_write_tokens'] += cache_write_tokens
+            llm['latencies_ms'].append(latency_ms)
+    
+    def get_llm_metrics(self) -> Dict:
+        """Bedrock call counters, token usage and recent latency percentiles"""
+        with self._lock:
+            llm = dict(self._llm)
+            latencies = sorted(llm.pop('latencies_ms'))
+        
+        def pct(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 1) if latencies else 0.0
+        
+        llm.update({
+            'avg_latency_ms': round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            'p50_latency_ms': pct(0.50),
+            'p95_latency_ms': pct(0.95)
+        })
+        return llm
+    
     def get_metrics(self) -> Dict:
         """Return current metrics snapshot"""
         with self._lock:
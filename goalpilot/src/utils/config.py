@@ -13,12 +13,57 @@ class Settings:
     # AWS Bedrock
     aws_region: str = os.getenv("AWS_REGION", "us-east-1")
     bedrock_model: str = os.getenv("BEDROCK_MODEL", "anthropic.claude-3-5-sonnet-20240620-v1:0")
+    # Concurrent Bedrock calls from the async path (thread pool + HTTP pool size)
+    bedrock_max_concurrency: int = int(os.getenv("BEDROCK_MAX_CONCURRENCY", "16"))
+    bedrock_pool_size: int = int(os.getenv("BEDROCK_POOL_SIZE", str(bedrock_max_concurrency)))
+    # Starting/maximum request rate; halved on ThrottlingException, recovers on success
+    bedrock_requests_per_second: float = float(os.getenv("BEDROCK_REQUESTS_PER_SECOND", "10"))
+    bedrock_max_attempts: int = int(os.getenv("BEDROCK_MAX_ATTEMPTS", "4"))
+    # Mark the static system prompts cacheable (cache_control); model must support prompt caching
+    bedrock_prompt_caching: bool = os.getenv("BEDROCK_PROMPT_CACHING", "false").lower() == "true"
+    bedrock_read_timeout_seconds: float = float(os.getenv("BEDROCK_READ_TIMEOUT_SECONDS", "60"))
+    # "bedrock" or "stub" (deterministic local responses, no AWS; latency simulated)
+    bedrock_backend: str = os.getenv("BEDROCK_BACKEND", "bedrock")
+    bedrock_stub_latency_ms: float = float(os.getenv("BEDROCK_STUB_LATENCY_MS", "0"))
     
     # API Settings
     api_port: int = int(os.getenv("API_PORT", "8000"))
     
     # Alpha Vantage (optional)
     alpha_vantage_api_key: str = os.getenv("ALPHA_VANTAGE_API_KEY", "demo")
+    alpha_vantage_calls_per_minute: float = float(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE", "5"))  # key quota
+    alpha_vantage_url: str = os.getenv("ALPHA_VANTAGE_URL", "https://www.alphavantage.co/query")  # point at a stub for tests
+    
+    # Alpha Vantage HTTP client: pooled keep-alive connections, retries on 429/5xx,
+    # circuit breaker (open after N failed calls, retry after RESET seconds)
+    alpha_vantage_timeout_seconds: float = float(os.getenv("ALPHA_VANTAGE_TIMEOUT_SECONDS", "2"))
+    alpha_vantage_pool_size: int = int(os.getenv("ALPHA_VANTAGE_POOL_SIZE", "10"))
+    alpha_vantage_max_attempts: int = int(os.getenv("ALPHA_VANTAGE_MAX_ATTEMPTS", "3"))
+    alpha_vantage_breaker_failures: int = int(os.getenv("ALPHA_VANTAGE_BREAKER_FAILURES", "5"))
+    alpha_vantage_breaker_reset_seconds: float = float(os.getenv("ALPHA_VANTAGE_BREAKER_RESET_SECONDS", "30"))
+    
+    # Quote cache: serve fresh for TTL, then stale (refreshing) for STALE more seconds
+    quote_ttl_seconds: float = float(os.getenv("QUOTE_TTL_SECONDS", "60"))
+    quote_stale_seconds: float = float(os.getenv("QUOTE_STALE_SECONDS", "900"))
+    quote_cache_path: str = os.getenv("QUOTE_CACHE_PATH", "")  # JSON file; empty = memory only
+    
+    # Plan cache: exact + similar-goal hits skip the agent (similarity = cosine threshold)
+    plan_cache_enabled: bool = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+    plan_cache_ttl_seconds: float = float(os.getenv("PLAN_CACHE_TTL_SECONDS", "3600"))
+    plan_cache_similarity: float = float(os.getenv("PLAN_CACHE_SIMILARITY", "0.9"))
+    plan_cache_max_entries: int = int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "500"))
+    
+    # Planner: classify goals locally, calling the LLM only below this confidence
+    goal_classifier_enabled: bool = os.getenv("GOAL_CLASSIFIER_ENABLED", "true").lower() == "true"
+    goal_classifier_min_confidence: float = float(os.getenv("GOAL_CLASSIFIER_MIN_CONFIDENCE", "0.65"))
+    
+    # Monte Carlo retirement simulation: paths, "lognormal" or "bootstrap", RNG seed
+    monte_carlo_paths: int = int(os.getenv("MONTE_CARLO_PATHS", "10000"))
+    monte_carlo_method: str = os.getenv("MONTE_CARLO_METHOD", "lognormal")
+    monte_carlo_seed: int = int(os.getenv("MONTE_CARLO_SEED", "42"))
+    
+    # Router tools: default per-tool timeout for network tools (seconds)
+    tool_timeout_seconds: float = float(os.getenv("TOOL_TIMEOUT_SECONDS", "8"))
     
     # Logging
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
@@ -0,0 +1,197 @@
+"""
+Pooled HTTP client with retries and a circuit breaker
+- One keep-alive connection pool per upstream (sync httpx.Client and, per
+  event loop, httpx.AsyncClient), bounded by max_connections
+- Retries 429/5xx and transport errors with full-jitter exponential backoff
+  (Retry-After is honoured, capped at max_delay)
+- Circuit breaker: after `failure_threshold` failed calls in a row the
+  upstream is skipped (CircuitOpenError, no network) for `reset_timeout`
+  seconds, then a single trial call decides whether to close it again (a
+  cancelled call counts as a failure; a trial that never reports back is
+  given up after another `reset_timeout`)
+"""
+import time
+import random
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+
+from src.utils.logger import logger
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure breaker: closed -> open -> half-open -> closed"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial: Optional[float] = None  # monotonic start of the half-open trial
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self._opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        """True if a call may go out (closed, or the single half-open trial)"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                return False
+            if self._trial is not None and now - self._trial < self.reset_timeout:
+                return False
+            self._trial = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit {self.name} closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            trial = self._trial is not None
+            if trial or self._failures >= self.failure_threshold:
+                if self._opened_at is None or trial:
+                    logger.warning(f"Circuit {self.name} open for {self.reset_timeout:.0f}s after {self._failures} failures")
+                self._opened_at = time.monotonic()
+                self._trial = None
+
+
+class RetryPolicy:
+    """Full-jitter exponential backoff"""
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Seconds to wait before retry number `attempt` (1-based)"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(self.max_delay, float(retry_after))
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class PooledHTTPClient:
+    """Shared client for one upstream (see module docstring)"""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        timeout: float = 5.0,
+        max_connections: int = 10,
+        retry: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=min(timeout, 3.0))
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker(name)
+        self._client: Optional[httpx.Client] = None
+        self._aclients: Dict[int, httpx.AsyncClient] = {}  # id(event loop) -> client
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self.limits)
+            return self._client
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        """Async client for the running loop (async clients cannot cross loops)"""
+        loop_id = id(asyncio.get_running_loop())
+        client = self._aclients.get(loop_id)
+        if client is None or client.is_closed:
+            client = self._aclients[loop_id] = httpx.AsyncClient(
+                base_url=self.base_url, timeout=self.timeout, limits=self.limits
+            )
+        return client
+
+    def _check(self, response: httpx.Response) -> httpx.Response:
+        if response.status_code in RETRY_STATUSES:
+            raise _RetryableStatus(response)
+        response.raise_for_status()
+        return response
+
+    def _gate(self):
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit open, skipping call")
+
+    def get_json(self, path: str = "", params: Optional[Dict[str, Any]] = None) -> Any:
+        """GET and decode JSON, with retries; raises CircuitOpenError when the breaker is open"""
+        self._gate()
+        for attempt in range(1, self.retry.max_attempts + 1):
+            try:
+                data = self._check(self.client.get(path, params=params)).json()
+                self.breaker.record_success()
+                return data
+            except (_RetryableStatus, httpx.TransportError) as e:
+                if attempt == self.retry.max_attempts:
+                    self.breaker.record_failure()
+                    raise
+                delay = self.retry.delay(attempt, getattr(e, "response", None))
+                logger.warning(f"{self.name}: {e}, retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+            except Exception:
+                self.breaker.record_failure()
+                raise
+
+    async def aget_json(self, path: str = "", params: Optional[Dict[str, Any]] = None) -> Any:
+        """Async get_json (cancellation, e.g. a tool timeout, counts as a failure)"""
+        self._gate()
+        try:
+            for attempt in range(1, self.retry.max_attempts + 1):
+                try:
+                    data = self._check(await self.aclient.get(path, params=params)).json()
+                    self.breaker.record_success()
+                    return data
+                except (_RetryableStatus, httpx.TransportError) as e:
+                    if attempt == self.retry.max_attempts:
+                        self.breaker.record_failure()
+                        raise
+                    delay = self.retry.delay(attempt, getattr(e, "response", None))
+                    logger.warning(f"{self.name}: {e}, retry {attempt} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                except Exception:
+                    self.breaker.record_failure()
+                    raise
+        except asyncio.CancelledError:
+            self.breaker.record_failure()  # releases a half-open trial
+            raise
+
+
+__all__ = ["PooledHTTPClient", "CircuitBreaker", "CircuitOpenError", "RetryPolicy"]
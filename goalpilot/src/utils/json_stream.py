@@ -0,0 +1,86 @@
+"""
+Incremental JSON parsing for streamed LLM output
+Yields each object of a named array as soon as its closing brace arrives,
+without waiting for (or re-parsing) the rest of the document
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+
+class StreamingArrayParser:
+    """
+    Feed text chunks; get back the completed objects of the `key` array
+
+    Example:
+        parser = StreamingArrayParser("plan_steps")
+        for chunk in chunks:
+            for step in parser.feed(chunk):
+                ...
+
+    Only the array itself is scanned (one pass, string/escape aware), so the
+    cost per chunk is proportional to the chunk. Objects that fail to parse
+    are skipped; the caller still parses the full text at the end.
+    """
+
+    def __init__(self, key: str):
+        self._key_re = re.compile(r'"' + re.escape(key) + r'"\s*:\s*\[')
+        self._buf = ""
+        self._pos: Optional[int] = None   # scan position inside the array
+        self._depth = 0                   # nesting below the array
+        self._in_string = False
+        self._escape = False
+        self._start: Optional[int] = None # '{' of the object being read
+        self.done = False
+        self.count = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Add a chunk; returns the objects completed by it"""
+        self._buf += text
+        if self._pos is None:
+            match = self._key_re.search(self._buf)
+            if not match:
+                return []
+            self._pos = match.end()
+
+        out = []
+        buf = self._buf
+        while self._pos < len(buf) and not self.done:
+            c = buf[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+            elif c == '"':
+                self._in_string = True
+            elif c in '{[':
+                if self._depth == 0 and c == '{':
+                    self._start = self._pos
+                self._depth += 1
+            elif c in '}]':
+                if self._depth == 0:
+                    self.done = True  # end of the array
+                else:
+                    self._depth -= 1
+                    if self._depth == 0 and self._start is not None:
+                        obj = self._load(buf[self._start:self._pos + 1])
+                        self._start = None
+                        if obj is not None:
+                            self.count += 1
+                            out.append(obj)
+            self._pos += 1
+        return out
+
+    @staticmethod
+    def _load(text: str) -> Optional[Dict[str, Any]]:
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            return None
+        return obj if isinstance(obj, dict) else None
+
+
+__all__ = ["StreamingArrayParser"]
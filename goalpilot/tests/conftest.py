@@ -0,0 +1,5 @@
+"""Make `src` importable when pytest is run from the project root"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
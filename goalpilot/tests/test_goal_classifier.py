@@ -0,0 +1,75 @@
+"""Local goal classifier and deterministic parameter extraction"""
+import pytest
+
+from src.features.goal_classifier import GOAL_TYPES, classify_goal, describe_goal, extract_parameters
+
+
+@pytest.mark.parametrize("goal, expected", [
+    ("I want to retire comfortably in 20 years", "retirement"),
+    ("45 years old, retire by 62", "retirement"),
+    ("Save $50,000 for a house down payment in 5 years", "home_purchase"),
+    ("Buy a $400,000 home with 20% down in 3 years", "home_purchase"),
+    ("I need to save for my daughter's college in ten years", "college"),
+    ("Pay off $25k of credit card debt at 22% APR within 18 months", "debt"),
+    ("Pay down my student loans faster", "debt"),
+    ("Build an emergency fund of six months expenses", "general"),
+    ("Save $10,000 for a vacation next year", "general"),
+])
+def test_classify_goal(goal, expected):
+    goal_type, confidence, probs = classify_goal(goal)
+    assert goal_type == expected
+    assert confidence == max(probs.values())
+    assert set(probs) == set(GOAL_TYPES)
+    assert sum(probs.values()) == pytest.approx(1.0, abs=1e-3)
+
+
+def test_unclear_goal_has_low_confidence():
+    assert classify_goal("I already have $20,000 saved and want $100k in 7 years")[1] < 0.65
+
+
+@pytest.mark.parametrize("goal, expected", [
+    ("I'm 30 and want to retire at 65 with $1.5 million, saving $800 a month",
+     {"current_age": 30, "retirement_age": 65, "horizon_years": 35,
+      "target_amount": 1_500_000, "monthly_contribution": 800}),
+    ("45 years old, retire by 62", {"current_age": 45, "retirement_age": 62, "horizon_years": 17}),
+    ("Save $50,000 for a house down payment in 5 years", {"horizon_years": 5, "target_amount": 50_000}),
+    ("Buy a $400,000 home with 20% down in 3 years",
+     {"horizon_years": 3, "home_price": 400_000, "down_payment_percent": 20}),
+    ("Pay off $25k of credit card debt at 22% APR within 18 months",
+     {"horizon_years": 1.5, "debt_amount": 25_000, "interest_rate": 22}),
+    ("I already have $20,000 saved and want $100k in 7 years",
+     {"horizon_years": 7, "current_savings": 20_000, "target_amount": 100_000}),
+    ("I need to save for my daughter's college in ten years", {"horizon_years": 10}),
+    ("Pay down my student loans faster", {}),
+])
+def test_extract_parameters(goal, expected):
+    assert extract_parameters(goal) == expected
+
+
+@pytest.mark.parametrize("goal, expected", [
+    ("Max out my 401k and retire at 60, I'm 35", {"current_age": 35, "retirement_age": 60, "horizon_years": 25}),
+    ("I have $50k in my 401k and want to retire at 65", {"retirement_age": 65, "current_savings": 50_000}),
+    ("contribute $500 a month to my 401(k)", {"monthly_contribution": 500}),
+    ("open a 529 plan with $200 a month", {"monthly_contribution": 200}),
+    ("roll my 403b and 457b into an IRA", {}),
+    ("pay off my 401k loan of $10k", {"debt_amount": 10_000}),
+    ("pay off a $10k 401k loan", {"debt_amount": 10_000}),
+    ("I have a 401(k) loan of about $8,500 to pay off", {"debt_amount": 8_500}),
+])
+def test_account_names_are_not_amounts(goal, expected):
+    assert extract_parameters(goal) == expected
+
+
+def test_dollar_amount_written_like_an_account_is_still_an_amount():
+    assert extract_parameters("I have $401k saved") == {"current_savings": 401_000}
+
+
+def test_horizon_is_clamped():
+    assert extract_parameters("I want to retire in 5000 years") == {"horizon_years": 100}
+    assert extract_parameters("a 1200-month plan") == {"horizon_years": 100}
+
+
+def test_describe_goal():
+    params = extract_parameters("Pay off $25k of credit card debt at 22% APR within 18 months")
+    assert describe_goal("debt", params) == "Debt goal over 1.5 years ($25,000 of debt, 22% rate)"
+    assert describe_goal("general", {"horizon_years": 1}) == "General goal over 1 year"
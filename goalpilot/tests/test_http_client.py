@@ -0,0 +1,53 @@
+"""Circuit breaker: half-open trials are always released"""
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from src.utils.http_client import CircuitBreaker, PooledHTTPClient, RetryPolicy
+
+
+def _open_breaker(reset_timeout=0.2):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=reset_timeout)
+    breaker.record_failure()
+    return breaker
+
+
+def test_trial_is_single_and_closes_on_success():
+    breaker = _open_breaker()
+    assert not breaker.allow()
+    time.sleep(0.25)
+    assert breaker.allow()
+    assert not breaker.allow()  # one trial at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_cancelled_trial_reopens_the_breaker():
+    async def hang(request):
+        await asyncio.sleep(10)
+
+    async def call(client):
+        client._aclients[id(asyncio.get_running_loop())] = httpx.AsyncClient(
+            base_url="http://upstream", transport=httpx.MockTransport(hang)
+        )
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.05):
+                await client.aget_json("/quote")
+
+    breaker = _open_breaker()
+    client = PooledHTTPClient("test", "http://upstream", retry=RetryPolicy(max_attempts=1), breaker=breaker)
+    time.sleep(0.25)
+    asyncio.run(call(client))
+    assert breaker.state == "open"
+    time.sleep(0.25)
+    assert breaker.allow()  # a new trial is possible once reset_timeout passes again
+
+
+def test_abandoned_trial_expires():
+    breaker = _open_breaker()
+    time.sleep(0.25)
+    assert breaker.allow()  # trial taken, never reported
+    time.sleep(0.25)
+    assert breaker.allow()
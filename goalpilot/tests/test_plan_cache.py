@@ -0,0 +1,97 @@
+"""Plan cache: similarity-tier near misses and data-age expiry; quote cache fallbacks"""
+import time
+
+import pytest
+
+from src.features.plan_cache import PlanCache
+from src.features.quote_cache import QuoteCache
+
+
+def _result(goal, **api_data):
+    return {
+        "goal": goal,
+        "plan_steps": [{"step_number": 1, "title": "Start", "description": goal}],
+        "tool_calls": [],
+        "api_data": api_data,
+    }
+
+
+@pytest.fixture
+def cache():
+    return PlanCache(ttl=3600, similarity=0.9, max_entries=100, data_max_age=960)
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Save $50,000 for a house", "Save $50,000 for a car"),
+    ("Retire comfortably in 20 years", "Retire comfortably in 30 years"),
+    ("Pay off my credit card debt", "Pay off my student loan debt"),
+    ("Save for my daughter's college in 10 years", "Save for my retirement in 10 years"),
+    ("Build an emergency fund of $10,000", "Build a vacation fund of $10,000"),
+    ("Buy a house in 5 years", "Sell a house in 5 years"),
+])
+def test_near_misses_are_not_served(cache, stored, asked):
+    cache.store(stored, "novice", _result(stored), model="m")
+    result, status = cache.lookup(asked, "novice", model="m")
+    assert (result, status) == (None, "miss")
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Retire comfortably in 20 years", "I'd like to retire comfortably in 20 years"),
+    ("Pay off my credit cards", "pay off credit card"),
+    ("Save $50,000 for a house down payment", "I need to save $50,000 for the house down payment"),
+])
+def test_rewordings_are_served(cache, stored, asked):
+    cache.store(stored, "novice", _result(stored), model="m")
+    result, status = cache.lookup(asked, "novice", model="m")
+    assert status == "similar"
+    assert result["goal"] == stored
+
+
+def test_exact_tier_ignores_case_and_punctuation(cache):
+    cache.store("Retire in 20 years", "novice", _result("Retire in 20 years"), model="m")
+    assert cache.lookup("retire in 20 years!", "novice", model="m")[1] == "exact"
+    assert cache.lookup("retire in 20 years", "expert", model="m")[1] == "miss"
+
+
+def test_plan_expires_with_its_market_data(cache):
+    old = time.time() - 900
+    cache.store("Retire in 20 years", "novice", _result("Retire in 20 years", get_stock_quote={
+        "symbol": "SPY", "price": 500.0, "cache": "stale", "as_of": round(old)}), model="m")
+    entry = next(iter(cache._entries.values()))
+    assert entry["expires_at"] == pytest.approx(old + 960, abs=1)
+
+
+def test_unstamped_quote_counts_as_fetched_now(cache):
+    before = time.time()
+    cache.store("Retire in 20 years", "novice", _result("Retire in 20 years", get_stock_quote={
+        "symbol": "SPY", "price": 500.0, "cache": "miss"}), model="m")
+    entry = next(iter(cache._entries.values()))
+    assert before + 960 <= entry["expires_at"] < before + 3600
+
+
+def test_quote_cache_miss_is_stamped():
+    quotes = QuoteCache(fetch=lambda symbol: {"symbol": symbol, "price": 1.0}, afetch=None, ttl=60, stale_ttl=900)
+    before = time.time()
+    miss = quotes.get("SPY")
+    assert miss["cache"] == "miss"
+    assert before - 1 <= miss["as_of"] <= time.time() + 1
+    assert quotes.get("SPY")["as_of"] == miss["as_of"]
+
+
+def test_mock_quote_falls_back_to_last_known():
+    responses = iter([{"symbol": "SPY", "price": 512.0}, {"symbol": "SPY", "price": 450.0, "mock": True}])
+    quotes = QuoteCache(fetch=lambda symbol: next(responses), afetch=None, ttl=60, stale_ttl=0)
+    quotes.get("SPY")
+    quotes._entries["SPY"]["fetched_at"] -= 120  # expired
+    served = quotes.get("SPY")
+    assert (served["price"], served["cache"]) == (512.0, "fallback")
+    assert quotes._entries["SPY"]["quote"]["price"] == 512.0
+
+
+def test_plans_on_mock_quotes_are_not_cached(cache):
+    quotes = QuoteCache(fetch=lambda symbol: {"symbol": symbol, "price": 450.0, "mock": True},
+                        afetch=None, ttl=60, stale_ttl=900)
+    quote = quotes.get("SPY")
+    assert quote["cache"] == "mock"
+    cache.store("Retire in 20 years", "novice", _result("Retire in 20 years", get_stock_quote=quote), model="m")
+    assert not cache._entries
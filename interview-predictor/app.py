@@ -1,31 +1,53 @@
 """
 FastAPI Interview Predictor with Timeline Analysis (cleaned)
 """
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-import tempfile, os, traceback, asyncio, json
+import tempfile, os, sys, traceback, asyncio, json, threading, time, uuid
 from datetime import datetime
+from typing import Dict, List, Optional
+from pydantic import BaseModel
 
-# GPU check (non-fatal if torch missing)
-try:
-    import torch
-    print(f"[STARTUP] PyTorch {torch.__version__} loaded, CUDA: {torch.cuda.is_available()}", flush=True)
-    TORCH_AVAILABLE = True
-except Exception:
-    TORCH_AVAILABLE = False
-    torch = None
-    print("[STARTUP] PyTorch not available", flush=True)
-
-from utils.asr_processor import ASRProcessor
+# These modules import torch/transformers/faster-whisper lazily, on first model
+# load, so the server binds and answers /health before the heavy imports finish
+from utils import model_store
+from utils.asr_processor import ASRProcessor, _to_wav_mono_16k, _wav_duration_seconds
 from utils.nlp_analyzer import NLPAnalyzer
 from utils.ensemble_scorer import EnsembleScorer
 from utils.timeline_analyzer import TimelineAnalyzer
-from utils.llm_feedback import LLMFeedbackGenerator
+from utils.llm_feedback import get_feedback_generator, MAX_OUTPUT_TOKENS, STREAM_TIMEOUT_SECONDS
+from utils.feedback_cache import get_feedback_cache, canonicalize, cache_key
+from utils.live_session import LiveSession
+from utils.feature_store import FeatureStore
+from utils.analysis_store import get_analysis_store
+from utils import bounded_pipeline
+from utils import pipeline
+
+# background (default): warm models off the event loop, serve immediately
+# eager: block startup until models are warm (previous behaviour)
+# lazy: no warmup, models load on first request
+STARTUP_MODE = os.getenv("STARTUP_MODE", "background").lower()
+WARMUP_WHISPER_MODEL = os.getenv("WARMUP_WHISPER_MODEL", "tiny")
+LIVE_WHISPER_MODEL = os.getenv("LIVE_WHISPER_MODEL", "tiny")
+
+# Full-text analysis settings (per-segment keywords live on TimelineAnalyzer)
+COMPETENCY_LABELS = ["technical skills","communication","problem solving","leadership"]
+POSITIVE_KEYWORDS = ["experienced","led","achieved","improved","solved"]
+NEGATIVE_KEYWORDS = ["maybe","i think","i guess","not sure"]
+
+# full: whole file in memory (fastest for normal interviews)
+# bounded: fixed windows + spill file, flat memory for multi-hour recordings
+# auto: bounded once the recording is at least BOUNDED_MIN_SECONDS long
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "auto").lower()
+BOUNDED_MIN_SECONDS = float(os.getenv("BOUNDED_MIN_SECONDS", "1800"))
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "200"))
 
 # ----------------- Global progress -----------------
 ASR_SINGLETON = None
+_asr_lock = threading.Lock()
+_warmup_done = False
 _progress = {"percent": 0, "stage": "idle", "message": "Waiting…"}
 
 def set_progress(percent: float | None = None, stage: str | None = None, message: str | None = None):
@@ -38,29 +60,96 @@ def set_progress(percent: float | None = None, stage: str | None = None, message
     print(f"[PROGRESS] {_progress['percent']}% - {_progress['stage']}: {_progress['message']}", flush=True)
 
 app = FastAPI(title="Interview Predictor")
+feature_store = FeatureStore()
 
-# ----------------- Warmup -----------------
-@app.on_event("startup")
-async def warmup_models():
-    """Preload whisper tiny to reduce TTFB on first request."""
+def get_asr() -> ASRProcessor:
+    """Process-wide ASRProcessor, created on first use."""
     global ASR_SINGLETON
+    with _asr_lock:
+        if ASR_SINGLETON is None:
+            ASR_SINGLETON = ASRProcessor()
+        return ASR_SINGLETON
+
+# ----------------- Warmup -----------------
+def _warmup_blocking():
+    """Load whisper + NLP models so the first request skips the cold path."""
+    global _warmup_done
     try:
-        print("[WARMUP] Initializing ASR + caching tiny model…", flush=True)
-        ASR_SINGLETON = ASRProcessor()
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, ASR_SINGLETON.load_model, "tiny")
+        print(f"[WARMUP] Initializing ASR + caching {WARMUP_WHISPER_MODEL} model…", flush=True)
+        get_asr().load_model(WARMUP_WHISPER_MODEL)
         print("[WARMUP] ✅ ASR ready.", flush=True)
     except Exception as e:
-        print(f"[WARMUP] ⚠️  Warmup skipped: {e}", flush=True)
+        print(f"[WARMUP] ⚠️  ASR warmup skipped: {e}", flush=True)
+    try:
+        NLPAnalyzer().load_models()
+        print("[WARMUP] ✅ NLP ready.", flush=True)
+    except Exception as e:
+        print(f"[WARMUP] ⚠️  NLP warmup skipped: {e}", flush=True)
+    _warmup_done = True
+
+_PRELOADED = False
+
+def preload_for_fork():
+    """
+    Pre-fork master (gunicorn.conf.py when_ready): load the NLP models once,
+    move their weights to shared memory and freeze the GC, so every worker
+    maps the same pages. Whisper is loaded per worker: CTranslate2 models
+    are not fork-safe. CPU only; CUDA contexts cannot cross fork.
+    """
+    global _PRELOADED
+    import gc
+    if model_store.cuda_available():
+        print("[PREFORK] CUDA host: skipping master preload (run a single worker per GPU)", flush=True)
+        return
+    from utils import safe_nlp, model_loader
+    model_loader.apply_thread_budget(threads=1)  # no OpenMP pool in the master; workers set their own budget
+    safe_nlp.sentiment_pipeline()
+    safe_nlp.toxicity_pipeline()
+    safe_nlp.zero_shot_pipeline()
+    shared_mb = model_loader.share_memory()
+    gc.collect()
+    gc.freeze()  # keep the collector from touching (and un-sharing) preloaded objects
+    _PRELOADED = True
+    print(f"[PREFORK] ✅ NLP models preloaded in master, {shared_mb} MB of weights in shared memory", flush=True)
+
+@app.on_event("startup")
+async def warmup_models():
+    """Preload models to reduce TTFB on first request."""
+    global _warmup_done
+    print(f"[STARTUP] Mode: {STARTUP_MODE}, model dir: {model_store.MODEL_DIR or '(hub)'}, "
+          f"preloaded: {_PRELOADED}, pid: {os.getpid()}", flush=True)
+    if STARTUP_MODE == "lazy":
+        _warmup_done = True
+        return
+    loop = asyncio.get_event_loop()
+    future = loop.run_in_executor(None, _warmup_blocking)
+    if STARTUP_MODE == "eager":
+        await future
+
+@app.on_event("shutdown")
+async def close_stores():
+    # drain queued history writes before the process exits
+    get_analysis_store().close()
 
 @app.get("/health")
 async def health_check():
-    gpu = False
-    try:
-        gpu = TORCH_AVAILABLE and torch is not None and torch.cuda.is_available()
-    except Exception:
-        gpu = False
-    return {"status":"healthy","service":"interview-predictor","gpu_available":gpu,"warmup_complete":ASR_SINGLETON is not None}
+    # Liveness only: never touches torch, so it answers during cold start
+    gpu = bool(model_store.cuda_probed())
+    return {"status":"healthy","service":"interview-predictor","gpu_available":gpu,"warmup_complete":_warmup_done}
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once warmup finished, 503 while models are still loading."""
+    models = model_store.warm_state()
+    loading = [name for name, m in models.items() if m["status"] == "loading"]
+    ready = _warmup_done and not loading
+    body = {
+        "ready": ready,
+        "startup_mode": STARTUP_MODE,
+        "degraded": any(m["status"] == "failed" for m in models.values()),
+        "models": models,
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
 
 # CORS + static
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
@@ -93,6 +182,8 @@ async def model_info():
     }
 
 # ----------------- Progress (SSE + JSON) -----------------
+_SSE_HEADERS = {"Content-Type":"text/event-stream","Cache-Control":"no-cache","Connection":"keep-alive","X-Accel-Buffering":"no"}
+
 @app.get("/api/progress")
 async def sse_progress(request: Request):
     async def eventgen():
@@ -107,8 +198,7 @@ async def sse_progress(request: Request):
             else:
                 yield ": ping\n\n"
             await asyncio.sleep(1.0)
-    headers = {"Content-Type":"text/event-stream","Cache-Control":"no-cache","Connection":"keep-alive","X-Accel-Buffering":"no"}
-    return StreamingResponse(eventgen(), headers=headers, media_type="text/event-stream")
+    return StreamingResponse(eventgen(), headers=_SSE_HEADERS, media_type="text/event-stream")
 
 @app.get("/api/progress-now")
 async def progress_now():
@@ -130,20 +220,154 @@ def _approximate_word_timestamps(segments):
         seg["words"] = words
     return segments
 
+def _analyze_bounded(wav_path: str, model_select: str, profile: Optional[str], candidate: str) -> Dict:
+    """Flat-memory path for multi-hour recordings; same response shape, segments spilled to disk."""
+    asr = get_asr()
+    nlp = NLPAnalyzer()
+    scorer = EnsembleScorer()
+    timeline_analyzer = TimelineAnalyzer()
+    analysis_id = uuid.uuid4().hex
+
+    set_progress(15, "transcribing", "Transcribing in windows…")
+    run = bounded_pipeline.BoundedAnalysis(asr, timeline_analyzer, model_select, profile).run(
+        wav_path, analysis_id, POSITIVE_KEYWORDS, NEGATIVE_KEYWORDS,
+        progress=lambda frac, msg: set_progress(15 + int(frac * 70), "transcribing", msg),
+    )
+
+    # Full-text models read only the first 512 characters, so the prefix is all they need
+    set_progress(88, "nlp", "Running NLP analysis…")
+    nlp.load_models()
+    prefix = run["transcript_prefix"]
+    sentiment = nlp.analyze_sentiment(prefix)
+    toxicity = nlp.analyze_toxicity(prefix)
+    competencies = nlp.analyze_competency(prefix, candidate_labels=COMPETENCY_LABELS)
+
+    set_progress(94, "scoring", "Calculating interview score…")
+    results = scorer.calculate_ensemble_score(
+        sentiment_scores=sentiment,
+        toxicity_score=toxicity["toxic"],
+        competency_scores=competencies,
+        keyword_match=run["keywords"],
+        segment_sentiments=[run["segment_sentiment"]] if run["segment_sentiment"] else None
+    )
+
+    try:
+        feature_store.save(analysis_id, run["scored_segments"], {
+            "model": model_select,
+            "duration": run["duration"],
+            "transcript": "",
+            "spilled": True,  # rescore scans the spill file for full-transcript keywords
+            "sentiment": sentiment,
+            "toxicity": toxicity,
+            "competency": competencies,
+        })
+    except Exception as fe:
+        print(f"[API] Feature store write failed: {fe}", flush=True)
+
+    set_progress(100, "done", "Complete")
+    response = {
+        "success": True,
+        "analysis_id": analysis_id,
+        "mode": "bounded",
+        "prediction": results["prediction"],
+        "score": results["score"],
+        "confidence": results["confidence"],
+        "component_scores": results["component_scores"],
+        "component_contributions": results["component_contributions"],
+        "transcript": prefix[:500] + "..." if run["transcript_length"] > 500 else prefix,
+        "transcript_length": run["transcript_length"],
+        "timeline": run["timeline"],
+        "segments": [],
+        "segment_count": run["segment_count"],
+        "segments_url": f"/api/analyses/{analysis_id}/segments",
+        "audio_skipped_pct": run["silence_trim"]["skipped_pct"]
+    }
+    # the store's writer thread streams the spill file into transcript_parts
+    transcript = (seg["text"] for seg in bounded_pipeline.iter_spilled_segments(analysis_id))
+    get_analysis_store().record(analysis_id, response, transcript,
+                                candidate=candidate, model=model_select, duration=run["duration"])
+    return response
+
+_BOUNDED_PIPELINE_ERROR = ("The pipeline field is not supported by the bounded pipeline (long recordings); "
+                           "send mode=full to run a custom pipeline, or omit pipeline")
+
+def _audio_stages(nlp, scorer, timeline_analyzer) -> Dict[str, pipeline.Stage]:
+    """
+    Post-ASR DAG for /api/analyze-audio. Everything reads the seeded
+    "transcript" ({text, segments, duration}). Independent stages run
+    concurrently; model calls are serialized per model inside NLPAnalyzer
+    (model_loader.inference), so e.g. full-text sentiment interleaves with
+    the per-segment calls instead of waiting for the whole timeline.
+    """
+    def text(r):
+        return r["transcript"]["text"]
+
+    def score(r, o):
+        segment_sentiments = [seg["sentiment"] for seg in r["segment_scores"] if "sentiment" in seg]
+        print(f"[API] Extracted {len(segment_sentiments)} segment sentiments from timeline", flush=True)
+        return (EnsembleScorer(weights=o["weights"]) if "weights" in o else scorer).calculate_ensemble_score(
+            sentiment_scores=r["sentiment"],
+            toxicity_score=r["toxicity"]["toxic"],
+            competency_scores=r["competency"],
+            keyword_match=r["keywords"],
+            segment_sentiments=segment_sentiments  # Use timeline's analysis
+        )
+
+    return {s.name: s for s in [
+        pipeline.Stage("sentiment", lambda r, o: nlp.analyze_sentiment(text(r)),
+                       deps=["transcript"]),
+        pipeline.Stage("toxicity", lambda r, o: nlp.analyze_toxicity(text(r)),
+                       deps=["transcript"]),
+        pipeline.Stage("competency", lambda r, o: nlp.analyze_competency(text(r), candidate_labels=o.get("labels", COMPETENCY_LABELS)),
+                       deps=["transcript"], options={"labels": list}),
+        pipeline.Stage("keywords", lambda r, o: nlp.detect_keywords(
+                           text(r),
+                           positive_keywords=o.get("positive", POSITIVE_KEYWORDS),
+                           negative_keywords=o.get("negative", NEGATIVE_KEYWORDS)),
+                       deps=["transcript"], options={"positive": list, "negative": list}),
+        # per-segment sentiment + toxicity (sampled), feeds both the timeline and the score
+        pipeline.Stage("segment_scores", lambda r, o: timeline_analyzer.analyze_segments(r["transcript"]["segments"]),
+                       deps=["transcript"]),
+        pipeline.Stage("timeline", lambda r, o: timeline_analyzer.create_timeline_data(
+                           r["segment_scores"], r["transcript"]["duration"], bin_size=o.get("bin_size")),
+                       deps=["segment_scores"], options={"bin_size": int}),
+        pipeline.Stage("score", score,
+                       deps=["sentiment", "toxicity", "competency", "keywords", "segment_scores"], options={"weights": dict}),
+    ]}
+
 # ----------------- Analyze Audio -----------------
 @app.post("/api/analyze-audio")
-async def analyze_audio(file: UploadFile = File(...), model_select: str = Form("base", alias="model_size")):
+async def analyze_audio(file: UploadFile = File(...), model_select: str = Form("base", alias="model_size"),
+                        candidate: str = Form(""), profile: str = Form("", description="fast | balanced | accurate"),
+                        mode: str = Form("", description="full | bounded | auto"),
+                        pipeline_spec: str = Form("", alias="pipeline",
+                                                  description='JSON, e.g. {"stages": ["timeline", {"name": "competency", "labels": ["leadership"]}]}')):
     print(f"\n[API] ========== NEW ANALYZE REQUEST ==========", flush=True)
     print(f"[API] File: {file.filename}, Model: {model_select}", flush=True)
     set_progress(1, "start", "Starting…")
 
     # size guard (best-effort; UploadFile may not expose .size)
     try:
-        if getattr(file, "size", 0) and file.size > 200*1024*1024:
-            raise HTTPException(400, "File too large. Max 200MB.")
+        if getattr(file, "size", 0) and file.size > MAX_UPLOAD_MB*1024*1024:
+            raise HTTPException(400, f"File too large. Max {MAX_UPLOAD_MB}MB.")
     except Exception: pass
 
+    # Validate the pipeline spec before doing any work
+    stages = _audio_stages(None, None, None)
+    try:
+        spec = pipeline.PipelineSpec.parse(pipeline_spec, stages, root="transcript")
+        if "weights" in spec.options.get("score", {}):
+            EnsembleScorer(weights=spec.options["score"]["weights"])
+        if spec.options.get("timeline", {}).get("bin_size", 1) <= 0:
+            raise ValueError("timeline.bin_size must be positive")
+    except ValueError as e:
+        raise HTTPException(400, f"Invalid pipeline: {e}")
+    mode = (mode or PIPELINE_MODE).lower()
+    if mode == "bounded" and pipeline_spec.strip():
+        raise HTTPException(400, _BOUNDED_PIPELINE_ERROR)
+
     temp_file = None
+    wav_file = None
     try:
         # Save upload
         set_progress(5, "uploading", "Saving upload…")
@@ -156,9 +380,25 @@ async def analyze_audio(file: UploadFile = File(...), model_select: str = Form("
                 tmp.write(chunk)
         print(f"[API] File saved: {temp_file}", flush=True)
 
+        decoded = False
+        if mode in ("bounded", "auto"):
+            set_progress(10, "decoding", "Decoding audio…")
+            wav_file = _to_wav_mono_16k(temp_file)
+            wav_duration = _wav_duration_seconds(wav_file)
+            if mode == "bounded" or wav_duration >= BOUNDED_MIN_SECONDS:
+                if pipeline_spec.strip():
+                    raise HTTPException(400, _BOUNDED_PIPELINE_ERROR)
+                print(f"[API] Bounded pipeline ({wav_duration:.0f}s)", flush=True)
+                response = _analyze_bounded(wav_file, model_select, profile or None, candidate)
+                print("[API] ========== REQUEST COMPLETE ==========\n", flush=True)
+                return JSONResponse(response)
+            temp_file_for_asr, decoded = wav_file, True  # ASR reuses this WAV instead of decoding again
+        else:
+            temp_file_for_asr = temp_file
+
         # Init processors
         set_progress(15, "init", "Loading models…")
-        asr = ASR_SINGLETON or ASRProcessor()
+        asr = get_asr()
         nlp = NLPAnalyzer()
         scorer = EnsembleScorer()
         timeline_analyzer = TimelineAnalyzer()
@@ -166,7 +406,8 @@ async def analyze_audio(file: UploadFile = File(...), model_select: str = Form("
         # Transcribe
         set_progress(30, "transcribing", "Transcribing audio…")
         print(f"[API] Starting transcription with model: {model_select}", flush=True)
-        transcription = asr.transcribe_audio(temp_file, model_name=model_select)
+        transcription = asr.transcribe_audio(temp_file_for_asr, model_name=model_select, profile=profile or None,
+                                             decoded=decoded)
         print("[API] Transcription complete!", flush=True)
         set_progress(55, "transcribed", "Transcription complete")
 
@@ -207,75 +448,74 @@ async def analyze_audio(file: UploadFile = File(...), model_select: str = Form("
 
         segments = _approximate_word_timestamps(segments)
 
-        # NLP - Load models ONCE
+        # Post-ASR stages: only what the spec needs, independent ones concurrently
         set_progress(60, "nlp", "Running NLP analysis…")
-        nlp.load_models()
-        
-        # Full-text analysis (for toxicity, competency, keywords)
-        sentiment = nlp.analyze_sentiment(transcript_text)
-        set_progress(70, "nlp", "Toxicity…")
-        toxicity = nlp.analyze_toxicity(transcript_text)
-        set_progress(75, "nlp", "Competency…")
-        competencies = nlp.analyze_competency(
-            transcript_text,
-            candidate_labels=["technical skills","communication","problem solving","leadership"]
+        if spec.targets:
+            nlp.load_models()
+        stages = _audio_stages(nlp, scorer, timeline_analyzer)
+        results, timings, skipped = pipeline.run(
+            stages, spec,
+            seed={"transcript": {"text": transcript_text, "segments": segments, "duration": duration}},
+            on_done=lambda name, n, total: set_progress(60 + int(35 * n / total), "nlp", f"{name} done ({n}/{total})"),
         )
-        set_progress(80, "nlp", "Keywords…")
-        keywords = nlp.detect_keywords(
-            transcript_text,
-            positive_keywords=["experienced","led","achieved","improved","solved"],
-            negative_keywords=["maybe","i think","i guess","not sure"]
-        )
-
-        # Timeline (this also does segment sentiment analysis internally)
-        set_progress(86, "timeline", "Building performance timeline…")
-        scored_segments = timeline_analyzer.analyze_segments(segments)
-        timeline_data = timeline_analyzer.create_timeline_data(scored_segments, duration)
-        
-        # Extract segment sentiments from timeline analysis
-        segment_sentiments = []
-        for seg in scored_segments:
-            if "sentiment" in seg:
-                segment_sentiments.append(seg["sentiment"])
-                # Debug: print first 3 segments
-                if len(segment_sentiments) <= 3:
-                    print(f"[DEBUG] Segment {len(segment_sentiments)}: {seg['sentiment']}", flush=True)
-        
-        print(f"[API] Extracted {len(segment_sentiments)} segment sentiments from timeline", flush=True)
+        print(f"[API] Stages: {timings} (skipped: {skipped})", flush=True)
 
-        # Score - Use timeline's segment sentiments
-        set_progress(92, "scoring", "Calculating interview score…")
-        results = scorer.calculate_ensemble_score(
-            sentiment_scores=sentiment,
-            toxicity_score=toxicity["toxic"],
-            competency_scores=competencies,
-            keyword_match=keywords,
-            segment_sentiments=segment_sentiments  # Use timeline's analysis
-        )
-        print("[API] Components (outgoing):", results["component_scores"], flush=True)
-
-        # Done
-        set_progress(100, "done", "Complete")
         response = {
             "success": True,
-            "prediction": results["prediction"],
-            "score": results["score"],
-            "confidence": results["confidence"],
-            "component_scores": results["component_scores"],
-            "component_contributions": results["component_contributions"],
             "transcript": transcript_text[:500] + "..." if len(transcript_text) > 500 else transcript_text,
             "transcript_length": len(transcript_text),
-            "timeline": timeline_data,
-            "segments": segments
+            "segments": segments,
+            "audio_skipped_pct": (transcription.get("silence_trim") or {}).get("skipped_pct", 0.0),
+            "full_text": {k: results[k] for k in ("sentiment", "toxicity", "competency", "keywords") if k in results},
+            "stage_timings_ms": timings,
+            "stages_skipped": skipped,
         }
+        if "timeline" in results:
+            response["timeline"] = results["timeline"]
+        if "score" in results:
+            score = results["score"]
+            print("[API] Components (outgoing):", score["component_scores"], flush=True)
+            analysis_id = uuid.uuid4().hex
+            response.update({
+                "analysis_id": analysis_id,
+                "prediction": score["prediction"],
+                "score": score["score"],
+                "confidence": score["confidence"],
+                "component_scores": score["component_scores"],
+                "component_contributions": score["component_contributions"],
+            })
+            # Persist per-segment features so /rescore never needs the models again
+            try:
+                feature_store.save(analysis_id, results["segment_scores"], {
+                    "model": model_select,
+                    "duration": duration,
+                    "transcript": transcript_text,
+                    "sentiment": results["sentiment"],
+                    "toxicity": results["toxicity"],
+                    "competency": results["competency"],
+                })
+            except Exception as fe:
+                print(f"[API] Feature store write failed: {fe}", flush=True)
+            get_analysis_store().record(analysis_id, response, transcript_text,
+                                        candidate=candidate, model=model_select, duration=duration)
+
+        set_progress(100, "done", "Complete")
         print("[API] ========== REQUEST COMPLETE ==========\n", flush=True)
         return JSONResponse(response)
 
+    except HTTPException:
+        set_progress(100, "error", "Rejected")
+        raise
     except Exception as e:
         print(f"[API] ERROR:\n{traceback.format_exc()}", flush=True)
         set_progress(100, "error", f"Error: {e}")
         raise HTTPException(500, f"Analysis failed: {e}")
     finally:
+        if wav_file and os.path.exists(wav_file):
+            try:
+                os.unlink(wav_file)
+            except OSError:
+                pass
         if temp_file and os.path.exists(temp_file):
             try:
                 os.unlink(temp_file)
@@ -283,6 +523,120 @@ async def analyze_audio(file: UploadFile = File(...), model_select: str = Form("
             except Exception as ce:
                 print(f"[API] Temp cleanup failed: {ce}", flush=True)
 
+# ----------------- History -----------------
+def _parse_date(value: Optional[str], name: str) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(400, f"{name} must be an ISO date, e.g. 2024-05-01 or 2024-05-01T09:30")
+
+@app.get("/api/analyses")
+async def list_analyses(
+    candidate: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    q: Optional[str] = Query(None, description="transcript keywords (all must match)"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Newest-first page of stored analyses; filters combine with AND."""
+    since_ts, until_ts = _parse_date(since, "since"), _parse_date(until, "until")
+    loop = asyncio.get_event_loop()
+    items, total = await loop.run_in_executor(None, lambda: get_analysis_store().search(
+        candidate=candidate, since=since_ts, until=until_ts,
+        min_score=min_score, max_score=max_score, q=q, limit=limit, offset=offset,
+    ))
+    return {"items": items, "total": total, "limit": limit, "offset": offset}
+
+@app.get("/api/analyses/{analysis_id}")
+async def get_analysis(analysis_id: str):
+    loop = asyncio.get_event_loop()
+    row = await loop.run_in_executor(None, get_analysis_store().get, analysis_id)
+    if row is None:
+        raise HTTPException(404, f"Unknown analysis: {analysis_id}")
+    return row
+
+@app.get("/api/analyses/{analysis_id}/segments")
+async def analysis_segments(analysis_id: str):
+    """All transcript segments of a bounded-mode analysis, as NDJSON."""
+    try:
+        path = bounded_pipeline.spill_path(analysis_id)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if not os.path.exists(path):
+        raise HTTPException(404, f"No spilled segments for: {analysis_id}")
+    return FileResponse(path, media_type="application/x-ndjson")
+
+# ----------------- Re-score -----------------
+class RescoreRequest(BaseModel):
+    """Any field left out keeps the value used by /api/analyze-audio"""
+    positive_keywords: Optional[List[str]] = None
+    negative_keywords: Optional[List[str]] = None
+    segment_positive_keywords: Optional[List[str]] = None
+    segment_negative_keywords: Optional[List[str]] = None
+    weights: Optional[Dict[str, float]] = None  # sentiment / toxicity / competency / keywords
+    bin_size: Optional[int] = None              # seconds; default adapts to duration
+
+@app.post("/api/analyses/{analysis_id}/rescore")
+async def rescore_analysis(analysis_id: str, req: RescoreRequest):
+    """Recompute ensemble score + timeline from stored features (no ASR, no models)."""
+    t0 = time.perf_counter()
+    try:
+        stored = feature_store.load(analysis_id)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    if stored is None:
+        raise HTTPException(404, f"Unknown analysis: {analysis_id}")
+    if req.bin_size is not None and req.bin_size <= 0:
+        raise HTTPException(400, "bin_size must be positive")
+    try:
+        scorer = EnsembleScorer(weights=req.weights)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+    meta = stored["meta"]
+    timeline_analyzer = TimelineAnalyzer()
+    scored_segments = [
+        timeline_analyzer.score_features(
+            seg["start"], seg["end"], seg["text"], seg["sentiment"], seg["toxicity"],
+            scorer=scorer,
+            positive_keywords=req.segment_positive_keywords,
+            negative_keywords=req.segment_negative_keywords
+        )
+        for seg in stored["segments"]
+    ]
+    timeline_data = timeline_analyzer.create_timeline_data(scored_segments, meta["duration"], bin_size=req.bin_size)
+
+    positive_keywords = req.positive_keywords if req.positive_keywords is not None else POSITIVE_KEYWORDS
+    negative_keywords = req.negative_keywords if req.negative_keywords is not None else NEGATIVE_KEYWORDS
+    if meta.get("spilled"):
+        keywords = bounded_pipeline.scan_spilled_keywords(analysis_id, timeline_analyzer.nlp, positive_keywords, negative_keywords)
+    else:
+        keywords = timeline_analyzer.nlp.detect_keywords(meta["transcript"], positive_keywords=positive_keywords, negative_keywords=negative_keywords)
+    results = scorer.calculate_ensemble_score(
+        sentiment_scores=meta["sentiment"],
+        toxicity_score=meta["toxicity"]["toxic"],
+        competency_scores=meta["competency"],
+        keyword_match=keywords,
+        segment_sentiments=[seg["sentiment"] for seg in scored_segments]
+    )
+    return JSONResponse({
+        "success": True,
+        "analysis_id": analysis_id,
+        "prediction": results["prediction"],
+        "score": results["score"],
+        "confidence": results["confidence"],
+        "component_scores": results["component_scores"],
+        "component_contributions": results["component_contributions"],
+        "keywords": keywords,
+        "timeline": timeline_data,
+        "rescore_ms": round((time.perf_counter() - t0) * 1000, 2)
+    })
+
 # ----------------- Analyze Text -----------------
 @app.post("/api/analyze-text")
 async def analyze_text(text: str = Form(...)):
@@ -293,12 +647,12 @@ async def analyze_text(text: str = Form(...)):
         toxicity  = nlp.analyze_toxicity(text)
         competencies = nlp.analyze_competency(
             text,
-            candidate_labels=["technical skills","communication","problem solving","leadership"]
+            candidate_labels=COMPETENCY_LABELS
         )
         keywords = nlp.detect_keywords(
             text,
-            positive_keywords=["experienced","led","achieved","improved","solved"],
-            negative_keywords=["maybe","i think","i guess","not sure"]
+            positive_keywords=POSITIVE_KEYWORDS,
+            negative_keywords=NEGATIVE_KEYWORDS
         )
         results = scorer.calculate_ensemble_score(
             sentiment_scores=sentiment,
@@ -319,7 +673,84 @@ async def analyze_text(text: str = Form(...)):
         print(f"[API] analyze-text error:\n{traceback.format_exc()}", flush=True)
         raise HTTPException(500, f"Analysis failed: {e}")
 
+# ----------------- Live (WebSocket) -----------------
+@app.websocket("/ws/live")
+async def live_interview(ws: WebSocket):
+    """
+    Live interview mode. Client sends binary frames of 16 kHz mono PCM16
+    and a text frame {"type": "stop"} to finish. Server pushes JSON:
+    {"type": "ready"}, then "update" messages (partial transcript, newly
+    committed segments, rolling scores, changed timeline bins) and a "final"
+    message with the full timeline and transcript.
+    """
+    await ws.accept()
+    loop = asyncio.get_event_loop()
+    model_name = ws.query_params.get("model", LIVE_WHISPER_MODEL)
+    try:
+        asr = await loop.run_in_executor(None, get_asr)
+        session = LiveSession(asr, TimelineAnalyzer(), model_name=model_name)
+        await loop.run_in_executor(None, session.load)
+    except Exception as e:
+        print(f"[LIVE] Init failed: {e}", flush=True)
+        await ws.send_json({"type": "error", "error": f"Live mode unavailable: {e}"})
+        await ws.close()
+        return
+    await ws.send_json({"type": "ready", "model": model_name, "sample_rate": 16000})
+    print(f"[LIVE] Session started (model={model_name})", flush=True)
+
+    pending = None  # at most one step in flight; audio keeps buffering meanwhile
+
+    async def run_step(final: bool = False):
+        update = await loop.run_in_executor(None, session.step, final)
+        await ws.send_json(update)
+
+    try:
+        while True:
+            message = await ws.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                session.add_pcm(message["bytes"])
+                if session.ready() and (pending is None or pending.done()):
+                    pending = asyncio.create_task(run_step())
+            elif message.get("text"):
+                try:
+                    command = json.loads(message["text"])
+                except ValueError:
+                    command = {}
+                if command.get("type") == "stop":
+                    if pending is not None:
+                        await pending
+                    await run_step(final=True)
+                    await ws.close()
+                    break
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"[LIVE] ERROR:\n{traceback.format_exc()}", flush=True)
+        try:
+            await ws.send_json({"type": "error", "error": str(e)})
+        except Exception:
+            pass
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+        print(f"[LIVE] Session ended after {session.duration:.1f}s of audio", flush=True)
+
 # ----------------- Feedback -----------------
+def _feedback_request(score, prediction, sentiment, toxicity, competency, keywords, transcript):
+    return {
+        "score": score,
+        "prediction": prediction,
+        "component_scores": {
+            "sentiment": sentiment,
+            "toxicity": toxicity,
+            "competency": competency,
+            "keywords": keywords
+        },
+        "transcript": transcript
+    }
+
 @app.post("/api/generate-feedback")
 async def generate_feedback(
     score: float = Form(...),
@@ -331,30 +762,132 @@ async def generate_feedback(
     transcript: str = Form(...)
 ):
     try:
-        feedback_generator = LLMFeedbackGenerator()
-        api_configured = feedback_generator.configure_api()
-        analysis_results = {
-            "score": score,
-            "prediction": prediction,
-            "component_scores": {
-                "sentiment": sentiment,
-                "toxicity": toxicity,
-                "competency": competency,
-                "keywords": keywords
-            },
-            "transcript": transcript
-        }
-        feedback_result = feedback_generator.generate_feedback(analysis_results)
+        # Blocking network calls (first-use model resolution, generation): keep them off the event loop
+        loop = asyncio.get_event_loop()
+        feedback_generator = await loop.run_in_executor(None, get_feedback_generator)
+        analysis_results = _feedback_request(score, prediction, sentiment, toxicity, competency, keywords, transcript)
+        feedback_result = await loop.run_in_executor(
+            None, get_feedback_cache().generate, feedback_generator, analysis_results
+        )
+        api_configured = feedback_generator.working_model is not None
         return JSONResponse({
             "success": True,
             "feedback": feedback_result["feedback"],
-            "model": feedback_result["model_used"] if api_configured else "fallback"
+            "model": feedback_result["model_used"] if api_configured else "fallback",
+            "cache": feedback_result["cache"]
         })
     except Exception as e:
         print(f"[API] Feedback error: {e}", flush=True)
         return JSONResponse({"success": False, "error": f"Feedback generation failed: {e}"})
 
+@app.post("/api/generate-feedback/stream")
+async def generate_feedback_stream(
+    request: Request,
+    score: float = Form(...),
+    prediction: str = Form(...),
+    sentiment: float = Form(...),
+    toxicity: float = Form(...),
+    competency: float = Form(...),
+    keywords: float = Form(...),
+    transcript: str = Form(...),
+    max_tokens: int = Form(MAX_OUTPUT_TOKENS),
+    timeout: float = Form(STREAM_TIMEOUT_SECONDS)
+):
+    """
+    SSE variant of /api/generate-feedback: `data:` events with type
+    token (partial text), fallback (rule-based feedback replacing any partial
+    text) or done. Budget and timeout are capped at the server defaults.
+    """
+    max_tokens = max(1, min(max_tokens, MAX_OUTPUT_TOKENS))
+    timeout = max(1.0, min(timeout, STREAM_TIMEOUT_SECONDS))
+    loop = asyncio.get_event_loop()
+    feedback_generator = await loop.run_in_executor(None, get_feedback_generator)
+    analysis_results = canonicalize(
+        _feedback_request(score, prediction, sentiment, toxicity, competency, keywords, transcript)
+    )
+    cache = get_feedback_cache()
+    model_name = feedback_generator.working_model
+    key = cache_key(model_name, feedback_generator.build_prompt(analysis_results)) if model_name else None
+
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+
+    def produce():
+        # Runs in the executor: the SDK stream is a blocking iterator
+        try:
+            for event in feedback_generator.stream_feedback(analysis_results, max_tokens, timeout, cancelled):
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        except Exception as e:
+            print(f"[API] Feedback stream error: {e}", flush=True)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    def sse(event):
+        return f"data: {json.dumps(event)}\n\n"
+
+    def replay(value, meta):
+        # Cached / coalesced result: one token event with the full text
+        yield sse({"type": "token", "text": value["feedback"]})
+        yield sse({"type": "done", "feedback": value["feedback"], "model": value["model_used"],
+                   "cache": dict(meta, key=key[:16])})
+
+    async def eventgen():
+        if key:
+            hit = cache.lookup(key)
+            if hit:
+                for chunk in replay(*hit):
+                    yield chunk
+                return
+            leader, future = cache.begin(key)
+            if not leader:
+                # An identical request is already generating: wait for its result.
+                # shield: timing out here must not cancel the shared future other waiters use
+                try:
+                    value = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=timeout)
+                    for chunk in replay(value, {"hit": True, "tier": "inflight", "age_seconds": 0.0}):
+                        yield chunk
+                    return
+                except Exception:
+                    pass  # leader failed or timed out: fall through to a fresh stream
+                key_owned = False
+            else:
+                key_owned = True
+        else:
+            key_owned = False
+
+        loop.run_in_executor(None, produce)
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=max(0.0, deadline - loop.time()))
+                except asyncio.TimeoutError:
+                    fallback = feedback_generator._generate_fallback_feedback(analysis_results)
+                    event = {"type": "fallback", "feedback": fallback["feedback"], "model": fallback["model_used"],
+                             "error": f"Timed out after {timeout:.0f}s"}
+                if event is None:
+                    break
+                if key_owned and event["type"] == "done":
+                    cache.finish(key, {"success": True, "feedback": event["feedback"], "model_used": event["model"]},
+                                 cacheable=not event["truncated"])
+                    event["cache"] = {"hit": False, "tier": None, "age_seconds": 0.0, "key": key[:16]}
+                elif key_owned and event["type"] == "fallback":
+                    cache.finish(key, {"success": True, "feedback": event["feedback"], "model_used": event["model"]},
+                                 cacheable=False)
+                yield sse(event)
+                if event["type"] != "token" or await request.is_disconnected():
+                    break
+        finally:
+            cancelled.set()
+            if key_owned:
+                cache.fail(key, RuntimeError("Feedback stream ended early"))
+
+    return StreamingResponse(eventgen(), headers=_SSE_HEADERS, media_type="text/event-stream")
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "prefetch":
+        # Build-time: python app.py prefetch [--dest DIR] [--whisper tiny,base]
+        sys.exit(model_store.main(sys.argv[1:]))
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080)
 
@@ -0,0 +1,65 @@
+"""
+ASR profile benchmark - wall time and real-time factor per faster-whisper profile
+
+    python benchmarks/asr_profiles.py sample.mp3 --model base --runs 3
+
+Prints a markdown table (paste into README "ASR profiles"). The first run of
+each profile includes the model load and is reported separately.
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.asr_processor import ASRProcessor, ASR_PROFILES  # noqa: E402
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("audio", help="audio file to transcribe")
+    parser.add_argument("--model", default="base", help="whisper size (default: base)")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per profile after the warm-up run")
+    parser.add_argument("--profiles", default=",".join(ASR_PROFILES), help="comma-separated profiles")
+    args = parser.parse_args(argv)
+
+    asr = ASRProcessor()
+    rows = []
+    for profile in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+        t0 = time.perf_counter()
+        result = asr.transcribe_audio(args.audio, model_name=args.model, profile=profile)
+        cold = time.perf_counter() - t0
+
+        times = []
+        for _ in range(args.runs):
+            t0 = time.perf_counter()
+            result = asr.transcribe_audio(args.audio, model_name=args.model, profile=profile)
+            times.append(time.perf_counter() - t0)
+
+        duration = float(result.get("duration", 0) or 0)
+        warm = statistics.median(times) if times else cold
+        rows.append({
+            "profile": profile,
+            "compute": asr.compute_type_for(profile),
+            "beam": ASR_PROFILES[profile]["beam_size"],
+            "batched": ASR_PROFILES[profile]["batched"],
+            "cold": cold,
+            "warm": warm,
+            "rtf": warm / duration if duration else float("nan"),
+            "words": len((result.get("text") or "").split()),
+        })
+
+    print(f"\nmodel={args.model} device={asr.device} threads={asr.cpu_threads} audio={args.audio}\n")
+    print("| profile | compute type | beam | batched | first run (s) | median (s) | RTF | words |")
+    print("|---|---|---|---|---|---|---|---|")
+    for r in rows:
+        print(f"| {r['profile']} | {r['compute']} | {r['beam']} | {'yes' if r['batched'] else 'no'} "
+              f"| {r['cold']:.2f} | {r['warm']:.2f} | {r['rtf']:.3f} | {r['words']} |")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
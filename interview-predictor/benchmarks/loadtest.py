@@ -0,0 +1,389 @@
+"""
+Load test / soak benchmark - concurrency ramp against the analysis endpoints
+
+    python benchmarks/loadtest.py --audio samples/ --ramp 1,2,4,8 --stage-seconds 60 --out report.json
+    python benchmarks/loadtest.py --url http://127.0.0.1:8080 --pid 1234 --soak-seconds 3600
+    python benchmarks/loadtest.py --compare old.json new.json
+
+Without --url the server is started here (uvicorn app:app, FEEDBACK_BACKEND=stub
+so /api/generate-feedback never calls Gemini). Against an external server, start
+it with FEEDBACK_BACKEND=stub yourself and pass --pid for memory readings.
+
+Each ramp stage runs N closed-loop clients for --stage-seconds, drawing requests
+from the fixture corpus by --mix weight:
+  audio     POST /api/analyze-audio      (files from --audio)
+  text      POST /api/analyze-text       (paragraphs from --text, or built-in answers)
+  feedback  POST /api/generate-feedback  (built from the text fixtures)
+An optional soak stage then holds the last concurrency. Per stage and endpoint:
+throughput, p50/p95/p99/max latency, error rate and status codes. Server RSS
+(master + workers) is sampled every --sample-seconds for the whole run.
+The ramp stops early once --max-error-rate or --max-p95-ms is exceeded.
+
+The JSON report (--out) has sorted keys and rounded numbers, so two releases
+diff cleanly; --compare prints the per-stage deltas as markdown.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import signal
+import asyncio
+import argparse
+import platform
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_EXTS = (".wav", ".mp3", ".m4a", ".flac", ".ogg", ".webm")
+
+TEXT_FIXTURES = [
+    "In my last role I led a team of five engineers through a migration to a new billing system. "
+    "We planned the cut-over in stages, and I successfully delivered it two weeks ahead of schedule.",
+    "Um, I guess I would maybe try to talk to the manager first. I'm not really sure what the right process is.",
+    "When two stakeholders disagreed about priorities, I set up a short meeting, listened to both sides, "
+    "and we agreed on a plan that met the most important deadline. I learned to communicate trade-offs early.",
+    "I have experience with Python and SQL. I built dashboards that reduced reporting time by half, "
+    "and I definitely enjoy solving analytical problems with the team.",
+    "Honestly, I don't like working with people who slow me down, and I usually just do it myself.",
+]
+
+
+# ----------------- fixtures -----------------
+def _load_audio(path):
+    if not path:
+        return []
+    paths = [path] if os.path.isfile(path) else sorted(
+        os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(AUDIO_EXTS))
+    out = []
+    for p in paths:
+        with open(p, "rb") as f:
+            out.append((os.path.basename(p), f.read()))
+    return out
+
+
+def _load_texts(path):
+    if not path:
+        return list(TEXT_FIXTURES)
+    with open(path, encoding="utf-8") as f:
+        texts = [t.strip() for t in f.read().split("\n\n") if t.strip()]
+    return texts or list(TEXT_FIXTURES)
+
+
+class Corpus:
+    """Round-robin fixtures per endpoint; weighted endpoint choice (seeded, so runs are comparable)"""
+
+    def __init__(self, audio, texts, mix, seed=0):
+        self.audio, self.texts = audio, texts
+        self.mix = {k: w for k, w in mix.items() if w > 0 and (k != "audio" or audio)}
+        if not self.mix:
+            raise SystemExit("nothing to send: empty --mix (audio needs --audio fixtures)")
+        self.rng = random.Random(seed)
+        self.n = 0
+
+    def next(self):
+        self.n += 1
+        kind = self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        if kind == "audio":
+            name, data = self.audio[self.n % len(self.audio)]
+            return kind, "/api/analyze-audio", {"data": {"model_size": "base"}, "files": {"file": (name, data)}}
+        text = self.texts[self.n % len(self.texts)]
+        if kind == "text":
+            return kind, "/api/analyze-text", {"data": {"text": text}}
+        score = 30 + (self.n * 7) % 60
+        return kind, "/api/generate-feedback", {"data": {
+            "score": score, "prediction": "Hire" if score >= 60 else "No Hire",
+            "sentiment": 60, "toxicity": 5, "competency": 55, "keywords": 50,
+            "transcript": f"{text} [#{self.n}]",  # distinct transcripts: measure generation, not the cache
+        }}
+
+
+# ----------------- server + memory -----------------
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def _tree_rss_mb(pid):
+    """RSS of pid and all descendants, MB (shared pages counted per process)."""
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            continue
+        stack.extend(_children(p))
+    return total / 2**20
+
+
+def _start_server(port, workers):
+    env = dict(os.environ, FEEDBACK_BACKEND="stub", PORT=str(port))
+    cmd = [sys.executable, "-m", "uvicorn", "app:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def _wait_ready(client, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(1)
+    raise TimeoutError("server did not become ready")
+
+
+# ----------------- stats -----------------
+def _pct(sorted_ms, q):
+    if not sorted_ms:
+        return None
+    return sorted_ms[min(len(sorted_ms) - 1, int(q * len(sorted_ms)))]
+
+
+def _summary(samples, seconds):
+    """samples: [(latency_ms, status)] with status None for transport errors"""
+    ms = sorted(s[0] for s in samples)
+    errors = sum(1 for s in samples if s[1] is None or s[1] >= 400)
+    statuses = {}
+    for _, status in samples:
+        key = str(status) if status is not None else "error"
+        statuses[key] = statuses.get(key, 0) + 1
+    r = lambda v: round(v, 1) if v is not None else None  # noqa: E731
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "rps": round(len(samples) / seconds, 2) if seconds else 0.0,
+        "p50_ms": r(_pct(ms, 0.50)),
+        "p95_ms": r(_pct(ms, 0.95)),
+        "p99_ms": r(_pct(ms, 0.99)),
+        "max_ms": r(ms[-1] if ms else None),
+        "status": statuses,
+    }
+
+
+# ----------------- run -----------------
+async def _stage(client, corpus, concurrency, seconds, timeout):
+    samples = {}  # endpoint kind -> [(ms, status)]
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            kind, path, kwargs = corpus.next()
+            t0 = time.perf_counter()
+            try:
+                status = (await client.post(path, timeout=timeout, **kwargs)).status_code
+            except httpx.HTTPError:
+                status = None
+            samples.setdefault(kind, []).append(((time.perf_counter() - t0) * 1000, status))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0  # includes requests still in flight at the deadline
+    everything = [s for v in samples.values() for s in v]
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 1),
+        "endpoints": {k: _summary(v, elapsed) for k, v in sorted(samples.items())},
+        "total": _summary(everything, elapsed),
+    }
+
+
+async def _sample_memory(pid, t_start, interval, out, stop):
+    while not stop.is_set():
+        out.append([round(time.perf_counter() - t_start, 1), round(_tree_rss_mb(pid), 1)])
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(args):
+    proc = None
+    url = args.url
+    pid = args.pid
+    if not url:
+        proc = _start_server(args.port, args.workers)
+        url, pid = f"http://127.0.0.1:{args.port}", proc.pid
+
+    corpus = Corpus(_load_audio(args.audio), _load_texts(args.text), _parse_mix(args.mix), seed=args.seed)
+    memory, stop = [], asyncio.Event()
+    stages = []
+    limits = httpx.Limits(max_connections=max(args.ramp) + 4, max_keepalive_connections=max(args.ramp) + 4)
+    try:
+        async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+            await _wait_ready(client, args.ready_timeout)
+            t_start = time.perf_counter()
+            sampler = asyncio.ensure_future(
+                _sample_memory(pid, t_start, args.sample_seconds, memory, stop)) if pid else None
+
+            plan = [("ramp", c, args.stage_seconds) for c in args.ramp]
+            if args.soak_seconds:
+                plan.append(("soak", args.ramp[-1], args.soak_seconds))
+            for phase, concurrency, seconds in plan:
+                t_stage = time.perf_counter() - t_start
+                print(f"[LOAD] {phase} c={concurrency} for {seconds:.0f}s", file=sys.stderr, flush=True)
+                stage = await _stage(client, corpus, concurrency, seconds, args.request_timeout)
+                stage["phase"] = phase
+                window = [m[1] for m in memory if m[0] >= t_stage]
+                if window:
+                    stage["rss_mb"] = {"start": window[0], "end": window[-1], "max": max(window)}
+                stages.append(stage)
+                total = stage["total"]
+                print(f"[LOAD]   {total['rps']} req/s, p95 {total['p95_ms']} ms, errors {total['error_rate']:.1%}",
+                      file=sys.stderr, flush=True)
+                if phase == "ramp" and not _within_limits(total, args):
+                    print("[LOAD] limits exceeded, stopping ramp", file=sys.stderr, flush=True)
+                    break
+
+            stop.set()
+            if sampler:
+                await sampler
+    finally:
+        if proc:
+            proc.send_signal(signal.SIGTERM)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    ok = [s for s in stages if s["phase"] == "ramp" and _within_limits(s["total"], args)]
+    return {
+        "meta": {
+            "url": url if args.url else "spawned",
+            "workers": args.workers if not args.url else None,
+            "mix": corpus.mix,
+            "audio_fixtures": [name for name, _ in corpus.audio],
+            "text_fixtures": len(corpus.texts),
+            "stage_seconds": args.stage_seconds,
+            "soak_seconds": args.soak_seconds,
+            "limits": {"max_error_rate": args.max_error_rate, "max_p95_ms": args.max_p95_ms},
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+        },
+        "max_concurrency_within_limits": ok[-1]["concurrency"] if ok else 0,
+        "stages": stages,
+        "memory": memory,
+    }
+
+
+def _within_limits(total, args):
+    return total["error_rate"] <= args.max_error_rate and not (
+        args.max_p95_ms and (total["p95_ms"] or 0) > args.max_p95_ms)
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _parse_mix(raw):
+    mix = {}
+    for part in raw.split(","):
+        if part.strip():
+            key, _, weight = part.partition("=")
+            if key.strip() not in ("audio", "text", "feedback"):
+                raise SystemExit(f"unknown endpoint in --mix: {key!r}")
+            mix[key.strip()] = float(weight or 1)
+    return mix
+
+
+# ----------------- report -----------------
+def markdown(report):
+    lines = [f"git {report['meta']['git']}, max concurrency within limits: {report['max_concurrency_within_limits']}", "",
+             "| phase | c | endpoint | req | req/s | p50 ms | p95 ms | p99 ms | errors | RSS max MB |",
+             "|---|---|---|---|---|---|---|---|---|---|"]
+    for s in report["stages"]:
+        rss = s.get("rss_mb", {}).get("max", "")
+        for name, e in list(s["endpoints"].items()) + [("all", s["total"])]:
+            lines.append(f"| {s['phase']} | {s['concurrency']} | {name} | {e['requests']} | {e['rps']} | {e['p50_ms']} "
+                         f"| {e['p95_ms']} | {e['p99_ms']} | {e['error_rate']:.1%} | {rss if name == 'all' else ''} |")
+    mem = report["memory"]
+    if len(mem) >= 2:
+        lines += ["", f"RSS {mem[0][1]} → {mem[-1][1]} MB (max {max(m[1] for m in mem)})"]
+    soak = [s for s in report["stages"] if s["phase"] == "soak" and "rss_mb" in s]
+    if soak and soak[0]["seconds"]:
+        rss = soak[0]["rss_mb"]
+        lines.append(f"soak RSS growth: {(rss['end'] - rss['start']) / soak[0]['seconds'] * 3600:+.0f} MB/h")
+    return "\n".join(lines)
+
+
+def compare(old, new):
+    def index(report):
+        return {(s["phase"], s["concurrency"], name): e
+                for s in report["stages"] for name, e in list(s["endpoints"].items()) + [("all", s["total"])]}
+
+    def delta(a, b, fmt="{:+.1f}"):
+        if a is None or b is None:
+            return "n/a"
+        return fmt.format(b - a) + (f" ({(b - a) / a:+.0%})" if a else "")
+
+    a, b = index(old), index(new)
+    lines = [f"{old['meta']['git']} → {new['meta']['git']}", "",
+             "| phase | c | endpoint | req/s | Δ req/s | p95 ms | Δ p95 | p99 ms | Δ p99 | errors | Δ errors |",
+             "|---|---|---|---|---|---|---|---|---|---|---|"]
+    for key in sorted(set(a) | set(b), key=lambda k: (k[0] != "ramp", k[1], k[2])):
+        o, n = a.get(key), b.get(key)
+        if not (o and n):
+            lines.append(f"| {key[0]} | {key[1]} | {key[2]} | {'only in new' if n else 'only in old'} | | | | | | | |")
+            continue
+        lines.append(f"| {key[0]} | {key[1]} | {key[2]} | {n['rps']} | {delta(o['rps'], n['rps'], '{:+.2f}')} "
+                     f"| {n['p95_ms']} | {delta(o['p95_ms'], n['p95_ms'])} | {n['p99_ms']} | {delta(o['p99_ms'], n['p99_ms'])} "
+                     f"| {n['error_rate']:.1%} | {(n['error_rate'] - o['error_rate']) * 100:+.1f} pp |")
+    return "\n".join(lines)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="running server (default: start one here with the stub feedback backend)")
+    parser.add_argument("--pid", type=int, help="server PID for memory sampling when using --url")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned server")
+    parser.add_argument("--audio", help="audio file or directory of fixtures")
+    parser.add_argument("--text", help="text fixtures, one per paragraph (blank-line separated)")
+    parser.add_argument("--mix", default="audio=1,text=4,feedback=4", help="endpoint weights")
+    parser.add_argument("--ramp", default="1,2,4,8", help="concurrency levels")
+    parser.add_argument("--stage-seconds", type=float, default=60)
+    parser.add_argument("--soak-seconds", type=float, default=0, help="hold the last level this long afterwards")
+    parser.add_argument("--sample-seconds", type=float, default=2, help="memory sampling interval")
+    parser.add_argument("--request-timeout", type=float, default=900)
+    parser.add_argument("--ready-timeout", type=float, default=900)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--max-p95-ms", type=float, default=0, help="0 = no latency limit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff two JSON reports and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f_old, open(args.compare[1]) as f_new:
+            print(compare(json.load(f_old), json.load(f_new)))
+        return 0
+
+    args.ramp = [int(c) for c in args.ramp.split(",") if c.strip()]
+    if not args.ramp or min(args.ramp) < 1:
+        parser.error("--ramp needs positive concurrency levels")
+    report = asyncio.run(run(args))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    print(markdown(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
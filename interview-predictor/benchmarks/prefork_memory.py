@@ -0,0 +1,112 @@
+"""
+Memory per worker: pre-fork (shared weights) vs. independent workers
+
+    python benchmarks/prefork_memory.py --workers 4
+
+Starts the server twice with STARTUP_MODE=eager, so every worker has its
+models loaded before it serves:
+  - independent: uvicorn --workers N  (each worker loads its own copy)
+  - prefork:     gunicorn -c gunicorn.conf.py  (NLP weights loaded once in
+                 the master, in shared memory)
+then reads /proc/<pid>/smaps_rollup for the master and every worker.
+RSS counts shared pages in full for every process. PSS splits them across
+the processes that share them, so the PSS total is the real footprint.
+Linux only.
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _children(pid: int):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+
+def _tree(pid: int):
+    out = [pid]
+    for child in _children(pid):
+        out.extend(_tree(child))
+    return out
+
+
+def _smaps(pid: int):
+    """(rss, pss, shared) in MB from smaps_rollup."""
+    vals = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(":") and parts[1].isdigit():
+                vals[parts[0][:-1]] = int(parts[1]) / 1024
+    shared = vals.get("Shared_Clean", 0) + vals.get("Shared_Dirty", 0)
+    return vals.get("Rss", 0), vals.get("Pss", 0), shared
+
+
+def _wait_ready(port: int, workers: int, timeout: float):
+    """Every worker answers /ready=200 (probe a few times per worker)."""
+    deadline = time.time() + timeout
+    ok = 0
+    while time.time() < deadline:
+        try:
+            r = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=5)
+            ok = ok + 1 if r.status_code == 200 else 0
+        except httpx.HTTPError:
+            ok = 0
+        if ok >= workers * 3:
+            return
+        time.sleep(1)
+    raise TimeoutError("server did not become ready")
+
+
+def measure(mode: str, workers: int, port: int, timeout: float):
+    env = dict(os.environ, STARTUP_MODE="eager", WEB_CONCURRENCY=str(workers), PORT=str(port))
+    if mode == "prefork":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--workers", str(workers)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_ready(port, workers, timeout)
+        time.sleep(3)  # let late allocations settle
+        rows = [(pid, *_smaps(pid)) for pid in _tree(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return rows
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--timeout", type=float, default=900, help="seconds to wait for warm workers")
+    parser.add_argument("--modes", default="independent,prefork")
+    args = parser.parse_args(argv)
+
+    print("| mode | workers | processes | RSS total (MB) | PSS total (MB) | PSS / worker (MB) | shared (MB, max) |")
+    print("|---|---|---|---|---|---|---|")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        rows = measure(mode, args.workers, args.port, args.timeout)
+        rss = sum(r[1] for r in rows)
+        pss = sum(r[2] for r in rows)
+        shared = max((r[3] for r in rows), default=0)
+        print(f"| {mode} | {args.workers} | {len(rows)} | {rss:.0f} | {pss:.0f} | {pss / args.workers:.0f} | {shared:.0f} |")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,32 @@
+"""
+Pre-fork serving: gunicorn -c gunicorn.conf.py app:app
+- preload_app imports app.py once in the master
+- when_ready loads the NLP models there (weights in shared memory), then
+  workers are forked and map the same pages instead of loading their own
+- Each worker gets an equal share of the cgroup CPU quota
+  (model_loader.apply_thread_budget), split again only while its model
+  calls overlap (model_loader.inference)
+- In-process state (progress SSE, live sessions, caches) is per worker
+"""
+
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("WORKER_TIMEOUT", "900"))  # long transcriptions hold the worker
+graceful_timeout = 30
+keepalive = 5
+
+
+def when_ready(server):
+    # master, after preload_app imported app.py and before any worker is forked
+    import app as app_module
+    app_module.preload_for_fork()
+
+
+def post_fork(server, worker):
+    from utils import model_loader
+    threads = model_loader.apply_thread_budget(workers=server.cfg.workers)
+    server.log.info(f"worker {worker.pid}: torch threads per model = {threads}")
@@ -39,7 +39,7 @@ pip3 install --break-system-packages \
     scikit-learn==1.3.0 \
     'numpy>=1.26,<2.0' \
     pandas==2.0.0 \
-    faster-whisper==1.0.3 \
+    faster-whisper==1.1.0 \
     librosa \
     soundfile==0.12.1 \
     google-generativeai==0.8.5 \
@@ -0,0 +1,313 @@
+"""
+Analysis Store - embedded SQLite history of finished analyses
+- One row per analysis: candidate, scores, component breakdown, timeline
+  bins (JSON) and full transcript
+- FTS5 index over transcripts (falls back to LIKE if the build lacks FTS5)
+- Long (spilled) transcripts are streamed in as TRANSCRIPT_PART_CHARS-sized
+  rows of transcript_parts, indexed the same way, so the full text is never
+  held in memory at once
+- Writes are queued and committed in batches by one background thread,
+  so request handlers never wait on disk
+- Reads use a per-thread connection; WAL lets them run alongside the writer
+"""
+
+import os
+import json
+import time
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+ANALYSIS_DB_PATH = os.getenv("ANALYSIS_DB_PATH", "data/analyses.db")
+ANALYSIS_WRITE_BATCH = int(os.getenv("ANALYSIS_WRITE_BATCH", "64"))
+ANALYSIS_WRITE_INTERVAL = float(os.getenv("ANALYSIS_WRITE_INTERVAL", "0.5"))
+
+MAX_PAGE_SIZE = 100
+TRANSCRIPT_PART_CHARS = 16000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id          TEXT PRIMARY KEY,
+    candidate   TEXT NOT NULL DEFAULT '',
+    created_at  REAL NOT NULL,
+    model       TEXT,
+    duration    REAL,
+    score       REAL,
+    prediction  TEXT,
+    confidence  TEXT,
+    sentiment   REAL,
+    toxicity    REAL,
+    competency  REAL,
+    keywords    REAL,
+    timeline    TEXT,
+    transcript  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_candidate ON analyses(candidate, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses(created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_score ON analyses(score);
+CREATE TABLE IF NOT EXISTS transcript_parts (
+    analysis_id TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    text        TEXT NOT NULL,
+    PRIMARY KEY (analysis_id, seq)
+);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+    transcript, content='analyses', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS analyses_ai AFTER INSERT ON analyses BEGIN
+    INSERT INTO analyses_fts(rowid, transcript) VALUES (new.rowid, new.transcript);
+END;
+CREATE TRIGGER IF NOT EXISTS analyses_ad AFTER DELETE ON analyses BEGIN
+    INSERT INTO analyses_fts(analyses_fts, rowid, transcript) VALUES ('delete', old.rowid, old.transcript);
+END;
+CREATE TRIGGER IF NOT EXISTS analyses_au AFTER UPDATE ON analyses BEGIN
+    INSERT INTO analyses_fts(analyses_fts, rowid, transcript) VALUES ('delete', old.rowid, old.transcript);
+    INSERT INTO analyses_fts(rowid, transcript) VALUES (new.rowid, new.transcript);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_parts_fts USING fts5(
+    text, content='transcript_parts', content_rowid='rowid'
+);
+CREATE TRIGGER IF NOT EXISTS transcript_parts_ai AFTER INSERT ON transcript_parts BEGIN
+    INSERT INTO transcript_parts_fts(rowid, text) VALUES (new.rowid, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcript_parts_ad AFTER DELETE ON transcript_parts BEGIN
+    INSERT INTO transcript_parts_fts(transcript_parts_fts, rowid, text) VALUES ('delete', old.rowid, old.text);
+END;
+"""
+
+_COLUMNS = ("id", "candidate", "created_at", "model", "duration", "score", "prediction", "confidence",
+            "sentiment", "toxicity", "competency", "keywords", "timeline", "transcript")
+
+_SUMMARY_COLUMNS = ("id", "candidate", "created_at", "model", "duration", "score", "prediction", "confidence",
+                    "sentiment", "toxicity", "competency", "keywords")
+
+_STOP = object()
+
+
+def _fts_query(text: str) -> str:
+    """Treat user input as plain terms: quote each word so FTS syntax can't leak in."""
+    terms = [t.replace('"', '""') for t in text.split() if t.strip()]
+    return " ".join(f'"{t}"' for t in terms)
+
+
+def _parts(analysis_id: str, pieces: Iterable[str]) -> Iterator[Tuple[str, int, str]]:
+    """transcript_parts rows of ~TRANSCRIPT_PART_CHARS characters from a stream of text pieces."""
+    buf, n, seq = [], 0, 0
+    for piece in pieces:
+        buf.append(piece)
+        n += len(piece) + 1
+        if n >= TRANSCRIPT_PART_CHARS:
+            yield analysis_id, seq, " ".join(buf)
+            buf, n, seq = [], 0, seq + 1
+    if buf:
+        yield analysis_id, seq, " ".join(buf)
+
+
+class AnalysisStore:
+    """SQLite-backed analysis history with a batched background writer"""
+
+    def __init__(self, path: str = ANALYSIS_DB_PATH, batch_size: int = ANALYSIS_WRITE_BATCH,
+                 flush_interval: float = ANALYSIS_WRITE_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError as e:
+            print(f"[STORE] FTS5 unavailable, transcript search uses LIKE: {e}", flush=True)
+            self.fts = False
+        conn.close()
+
+        self._local = threading.local()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="analysis-store-writer", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ----------------- writes -----------------
+    def record(self, analysis_id: str, result: Dict[str, Any], transcript: Union[str, Iterable[str]],
+               candidate: str = "", model: str = "", duration: float = 0.0):
+        """
+        Queue one finished analysis (non-blocking). `transcript` is the text,
+        or an iterable of text pieces (e.g. spilled segments) that the writer
+        thread consumes into transcript_parts.
+        """
+        components = result.get("component_scores", {}) or {}
+        pieces = None
+        if not isinstance(transcript, str):
+            pieces, transcript = transcript, ""
+        self._queue.put(((
+            analysis_id,
+            (candidate or "").strip(),
+            time.time(),
+            model,
+            float(duration or 0.0),
+            float(result.get("score", 0.0) or 0.0),
+            result.get("prediction"),
+            result.get("confidence"),
+            components.get("sentiment"),
+            components.get("toxicity"),
+            components.get("competency"),
+            components.get("keywords"),
+            json.dumps(result.get("timeline", {})),
+            transcript or "",
+        ), pieces))
+
+    def _write_loop(self):
+        conn = self._connect()
+        sql = f"INSERT OR REPLACE INTO analyses ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+        parts_sql = "INSERT INTO transcript_parts (analysis_id, seq, text) VALUES (?, ?, ?)"
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch, taken = [], 1
+            if item is _STOP:
+                stopping = True
+            else:
+                batch.append(item)
+            # Gather whatever else arrives within the flush window, up to one batch
+            deadline = time.monotonic() + self.flush_interval
+            while not stopping and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                taken += 1
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(sql, [row for row, _ in batch])
+                        conn.executemany("DELETE FROM transcript_parts WHERE analysis_id = ?",
+                                         [(row[0],) for row, _ in batch])
+                except sqlite3.Error as e:
+                    print(f"[STORE] Batch write failed ({len(batch)} rows): {e}", flush=True)
+                for row, pieces in batch:
+                    if pieces is None:
+                        continue
+                    try:
+                        with conn:
+                            conn.executemany(parts_sql, _parts(row[0], pieces))  # pulls pieces lazily
+                    except (sqlite3.Error, OSError, ValueError) as e:
+                        print(f"[STORE] Transcript write failed for {row[0]}: {e}", flush=True)
+            for _ in range(taken):
+                self._queue.task_done()
+        conn.close()
+
+    def flush(self):
+        """Block until every queued write is committed."""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._writer.join(timeout=10)
+
+    # ----------------- reads -----------------
+    def get(self, analysis_id: str) -> Optional[Dict[str, Any]]:
+        row = self._reader().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM analyses WHERE id = ?", (analysis_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        out = dict(row)
+        out["timeline"] = json.loads(out["timeline"] or "{}")
+        if not out["transcript"]:
+            parts = self._reader().execute(
+                "SELECT text FROM transcript_parts WHERE analysis_id = ? ORDER BY seq", (analysis_id,)
+            ).fetchall()
+            out["transcript"] = " ".join(p[0] for p in parts)
+        return out
+
+    def search(self, candidate: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+               min_score: Optional[float] = None, max_score: Optional[float] = None, q: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Filtered, newest-first page of summaries plus the total match count."""
+        where, params = [], []
+        if candidate:
+            where.append("a.candidate = ?"); params.append(candidate.strip())
+        if since is not None:
+            where.append("a.created_at >= ?"); params.append(since)
+        if until is not None:
+            where.append("a.created_at < ?"); params.append(until)
+        if min_score is not None:
+            where.append("a.score >= ?"); params.append(min_score)
+        if max_score is not None:
+            where.append("a.score <= ?"); params.append(max_score)
+
+        # every term must appear in the transcript or in one of its parts
+        source = "analyses a"
+        select = ", ".join(f"a.{c}" for c in _SUMMARY_COLUMNS)
+        select_params: List[Any] = []
+        match = _fts_query(q) if q else ""
+        if match and self.fts:
+            for term in match.split(" "):
+                where.append("(a.rowid IN (SELECT rowid FROM analyses_fts WHERE analyses_fts MATCH ?)"
+                             " OR a.id IN (SELECT p.analysis_id FROM transcript_parts_fts f"
+                             " JOIN transcript_parts p ON p.rowid = f.rowid WHERE transcript_parts_fts MATCH ?))")
+                params += [term, term]
+            select += (", COALESCE("
+                       "(SELECT snippet(analyses_fts, 0, '[', ']', '…', 12) FROM analyses_fts"
+                       " WHERE analyses_fts MATCH ? AND rowid = a.rowid),"
+                       " (SELECT snippet(transcript_parts_fts, 0, '[', ']', '…', 12) FROM transcript_parts_fts f"
+                       " JOIN transcript_parts p ON p.rowid = f.rowid"
+                       " WHERE transcript_parts_fts MATCH ? AND p.analysis_id = a.id ORDER BY p.seq LIMIT 1)"
+                       ") AS snippet")
+            any_term = " OR ".join(match.split(" "))
+            select_params = [any_term, any_term]
+        elif q:
+            for term in q.split():
+                where.append("(a.transcript LIKE ? OR EXISTS (SELECT 1 FROM transcript_parts p"
+                             " WHERE p.analysis_id = a.id AND p.text LIKE ?))")
+                params += [f"%{term}%", f"%{term}%"]
+
+        clause = f" WHERE {' AND '.join(where)}" if where else ""
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        offset = max(0, int(offset))
+        conn = self._reader()
+        total = conn.execute(f"SELECT COUNT(*) FROM {source}{clause}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {select} FROM {source}{clause} ORDER BY a.created_at DESC LIMIT ? OFFSET ?",
+            select_params + params + [limit, offset],
+        ).fetchall()
+        return [dict(r) for r in rows], total
+
+
+# ----------------- Process-wide store -----------------
+_STORE: Optional[AnalysisStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_analysis_store() -> AnalysisStore:
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = AnalysisStore()
+        return _STORE
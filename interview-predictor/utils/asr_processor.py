@@ -6,36 +6,53 @@ Works in both local (WhisperX) and Docker (faster-whisper) environments
 import os
 import uuid
 import tempfile
+import threading
 import subprocess
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List, Optional
 
-# Try to import torch for GPU detection
-try:
-    import torch
-    HAS_CUDA = torch.cuda.is_available()  # RESTORED GPU DETECTION
-    print(f"[ASR] CUDA available: {HAS_CUDA}", flush=True)
-except Exception:
-    HAS_CUDA = False
-    torch = None
-    print("[ASR] CUDA not available", flush=True)
+from utils import model_store
+from utils.cpu_quota import available_cpus
+from utils import speech_compactor
 
-# Try WhisperX first (for local), fall back to faster-whisper (for Docker)
+# Backends are imported on first use (see _import_backends) so that importing
+# this module stays cheap and /health can answer during cold start
 WHISPERX_AVAILABLE = False
 FASTER_WHISPER_AVAILABLE = False
+whisperx = None
+WhisperModel = None
+BatchedInferencePipeline = None  # faster-whisper >= 1.1
+_BACKENDS_PROBED = False
+_BACKENDS_LOCK = threading.Lock()
 
-try:
-    import whisperx
-    WHISPERX_AVAILABLE = True
-    print("[ASR] Using WhisperX backend", flush=True)
-except ImportError:
-    print("[ASR] WhisperX not available, trying faster-whisper...", flush=True)
-    try:
-        from faster_whisper import WhisperModel
-        FASTER_WHISPER_AVAILABLE = True
-        print("[ASR] Using faster-whisper backend", flush=True)
-    except ImportError:
-        print("[ASR] ERROR: Neither WhisperX nor faster-whisper available!", flush=True)
+
+def _import_backends():
+    """Try WhisperX first (for local), fall back to faster-whisper (for Docker)"""
+    global WHISPERX_AVAILABLE, FASTER_WHISPER_AVAILABLE, whisperx, WhisperModel, BatchedInferencePipeline, _BACKENDS_PROBED
+    with _BACKENDS_LOCK:
+        if _BACKENDS_PROBED:
+            return
+        try:
+            import whisperx as _whisperx
+            whisperx = _whisperx
+            WHISPERX_AVAILABLE = True
+            print("[ASR] Using WhisperX backend", flush=True)
+        except ImportError:
+            print("[ASR] WhisperX not available, trying faster-whisper...", flush=True)
+            try:
+                from faster_whisper import WhisperModel as _WhisperModel
+                WhisperModel = _WhisperModel
+                FASTER_WHISPER_AVAILABLE = True
+                print("[ASR] Using faster-whisper backend", flush=True)
+                try:
+                    from faster_whisper import BatchedInferencePipeline as _Batched
+                    BatchedInferencePipeline = _Batched
+                except ImportError:
+                    print("[ASR] Batched inference unavailable (faster-whisper < 1.1)", flush=True)
+            except ImportError:
+                print("[ASR] ERROR: Neither WhisperX nor faster-whisper available!", flush=True)
+        _BACKENDS_PROBED = True
 
 # Import soundfile for duration check
 try:
@@ -47,6 +64,31 @@ except ImportError:
 
 FFMPEG_BIN = "ffmpeg"
 
+# Speed/accuracy profiles for faster-whisper (selectable per request)
+# - beam_size: 1 = greedy
+# - batched: BatchedInferencePipeline decodes VAD chunks in parallel batches
+# - cpu/gpu_compute: CTranslate2 compute type; int8_float32 keeps float32
+#   activations for a little accuracy at some speed cost
+ASR_PROFILES = {
+    "fast":     {"beam_size": 1, "batched": True,  "batch_size": 16, "cpu_compute": "int8",         "gpu_compute": "int8_float16"},
+    "balanced": {"beam_size": 2, "batched": True,  "batch_size": 8,  "cpu_compute": "int8",         "gpu_compute": "float16"},
+    "accurate": {"beam_size": 5, "batched": False, "batch_size": 1,  "cpu_compute": "int8_float32", "gpu_compute": "float16"},
+}
+ASR_PROFILE = os.getenv("ASR_PROFILE", "accurate")  # beam 5, sequential: the pre-profile quality
+ASR_MAX_MODELS = int(os.getenv("ASR_MAX_MODELS", "2"))  # loaded (size, compute type) pairs kept in memory
+
+# Preferred compute type -> fallbacks when the CTranslate2 build lacks it
+_COMPUTE_FALLBACKS = {
+    "int8_float32": ["int8", "float32"],
+    "int8_float16": ["float16", "int8", "float32"],
+    "float16": ["int8_float16", "float32"],
+    "int8": ["float32"],
+}
+
+def resolve_profile(profile: Optional[str]) -> str:
+    profile = (profile or ASR_PROFILE).lower()
+    return profile if profile in ASR_PROFILES else "accurate"
+
 def _wav_duration_seconds(path: str) -> float:
     """Get WAV file duration in seconds"""
     if not HAS_SOUNDFILE:
@@ -99,98 +141,166 @@ def _to_wav_mono_16k(src_path: str) -> str:
         print(f"[ASR] FFmpeg conversion error: {e}", flush=True)
         raise
 
+def _compact_speech(audio) -> Optional["speech_compactor.CompactedAudio"]:
+    """Speech-only buffer when trimming is enabled and worthwhile, else None."""
+    if not speech_compactor.ASR_TRIM_SILENCE:
+        return None
+    compaction = speech_compactor.compact(audio)
+    if compaction:
+        st = compaction.stats()
+        print(f"[ASR] Silence trim: {st['original_seconds']}s -> {st['speech_seconds']}s "
+              f"({st['skipped_pct']}% skipped, {st['spans']} spans)", flush=True)
+    return compaction
+
+def _trim_stats(compaction, original_seconds: float) -> Dict:
+    if compaction:
+        return compaction.stats()
+    return {"original_seconds": round(original_seconds, 2), "speech_seconds": round(original_seconds, 2),
+            "skipped_pct": 0.0, "spans": 0}
+
 class ASRProcessor:
     """Handles automatic speech recognition using available backend"""
     
     def __init__(self):
-        self.device = "cuda" if HAS_CUDA else "cpu"
-        self.compute_type = "float16" if self.device == "cuda" else "int8"
+        _import_backends()
         self.model = None
         self.model_name = None
         self.backend = None
+        self._load_lock = threading.Lock()
+        self._models: "OrderedDict[tuple, object]" = OrderedDict()  # (size, compute_type) -> model
+        self._pipelines: Dict[tuple, object] = {}
         
         if WHISPERX_AVAILABLE:
             self.backend = "whisperx"
+            self.device = "cuda" if model_store.cuda_available() else "cpu"
+            self.compute_types = {"float16", "int8"} if self.device == "cuda" else {"int8"}
             print(f"[ASR] Backend: WhisperX on {self.device}", flush=True)
         elif FASTER_WHISPER_AVAILABLE:
             self.backend = "faster-whisper"
+            # probed once per process; no per-load CUDA attempt on CPU-only hosts
+            probe = model_store.ct2_device()
+            self.device = probe["device"]
+            self.compute_types = probe["compute_types"]
             print(f"[ASR] Backend: faster-whisper on {self.device}", flush=True)
         else:
             raise RuntimeError("No ASR backend available! Install whisperx or faster-whisper")
+        self.compute_type = "float16" if self.device == "cuda" else "int8"
+        self.cpu_threads = available_cpus()
         
-        if self.device == "cuda" and torch:
+        if self.device == "cuda":
             try:
+                import torch
                 gpu_name = torch.cuda.get_device_name(0)
                 print(f"[ASR] GPU: {gpu_name}", flush=True)
             except:
                 pass
     
-    def _load_fw_model(self, model_name: str):
-        """Load faster-whisper model with GPU fallback"""
-        try:
-            print(f"[ASR] Trying GPU (cuda) for faster-whisper...", flush=True)
-            model = WhisperModel(
-                model_name,
-                device="cuda",
-                compute_type="float16",
-                cpu_threads=0,
-            )
-            print(f"[ASR] ✅ Using GPU for faster-whisper", flush=True)
-            return model
-        except Exception as e:
-            print(f"[ASR] GPU init failed, falling back to CPU: {e}", flush=True)
+    def compute_type_for(self, profile: str) -> str:
+        """Profile's preferred compute type, degraded to one this device supports."""
+        spec = ASR_PROFILES[resolve_profile(profile)]
+        wanted = spec["gpu_compute"] if self.device == "cuda" else spec["cpu_compute"]
+        for candidate in [wanted] + _COMPUTE_FALLBACKS.get(wanted, []):
+            if candidate in self.compute_types:
+                return candidate
+        return "float32"
+
+    def _load_fw_model(self, model_name: str, compute_type: str, profile: Optional[str] = None):
+        """Load faster-whisper model on the probed device; falls back to CPU if CUDA init fails"""
+        source = model_store.whisper_source(model_name)
+        if self.device == "cuda":
             try:
-                model = WhisperModel(
-                    model_name,
-                    device="cpu",
-                    compute_type="int8",
-                    cpu_threads=4,
-                )
-                print(f"[ASR] ✅ Using CPU for faster-whisper", flush=True)
+                model = WhisperModel(source, device="cuda", compute_type=compute_type, cpu_threads=0, num_workers=1)
+                print(f"[ASR] ✅ faster-whisper {model_name} on cuda ({compute_type})", flush=True)
                 return model
-            except Exception as e2:
-                print(f"[ASR] ❌ CPU init also failed: {e2}", flush=True)
-                raise
+            except Exception as e:
+                # CUDA visible but unusable (driver / cuDNN mismatch): stay on CPU from now on
+                print(f"[ASR] GPU init failed, falling back to CPU: {e}", flush=True)
+                self.device = "cpu"
+                self.compute_types = {"int8", "float32"}
+                self.compute_type = "int8"
+                compute_type = self.compute_type_for(profile)
+        model = WhisperModel(
+            source,
+            device="cpu",
+            compute_type=compute_type,
+            cpu_threads=self.cpu_threads,
+            num_workers=1,
+        )
+        print(f"[ASR] ✅ faster-whisper {model_name} on cpu ({compute_type}, {self.cpu_threads} threads)", flush=True)
+        return model
     
-    def load_model(self, model_name: str = "base"):
-        """Load ASR model (backend-agnostic)"""
+    def load_model(self, model_name: str = "base", profile: Optional[str] = None):
+        """Load ASR model (backend-agnostic); returns it. Keeps the last ASR_MAX_MODELS loaded."""
         model_name = (model_name or "base").lower()
         if model_name not in {"tiny", "base", "small", "medium", "large", "large-v2"}:
             model_name = "base"
+        compute_type = self.compute_type_for(profile) if self.backend == "faster-whisper" else self.compute_type
+        key = (model_name, compute_type)
         
-        if self.model is not None and self.model_name == model_name:
-            print(f"[ASR] Model {model_name} already loaded", flush=True)
-            return
-        
-        print(f"[ASR] Loading {self.backend} model: {model_name}", flush=True)
-        
-        if self.backend == "whisperx":
-            self.model = whisperx.load_model(
-                model_name,
-                self.device,
-                compute_type=self.compute_type
-            )
-        elif self.backend == "faster-whisper":
-            self.model = self._load_fw_model(model_name)
-        
-        self.model_name = model_name
-        print(f"[ASR] Model {model_name} loaded successfully", flush=True)
+        with self._load_lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.model, self.model_name = model, model_name
+                return model
+            
+            print(f"[ASR] Loading {self.backend} model: {model_name} ({compute_type})", flush=True)
+            
+            with model_store.track(f"whisper:{model_name}", model_store.WHISPER_REPOS.get(model_name, model_name)):
+                if self.backend == "whisperx":
+                    model = whisperx.load_model(
+                        model_name,
+                        self.device,
+                        compute_type=self.compute_type
+                    )
+                elif self.backend == "faster-whisper":
+                    model = self._load_fw_model(model_name, compute_type, profile)
+                    key = (model_name, self.compute_type_for(profile))  # changes if CUDA fell back to CPU
+            
+            self._models[key] = model
+            while len(self._models) > max(1, ASR_MAX_MODELS):
+                old_key, _ = self._models.popitem(last=False)
+                self._pipelines.pop(old_key, None)
+                if all(k[0] != old_key[0] for k in self._models):
+                    model_store.mark(f"whisper:{old_key[0]}", "unloaded")
+            self.model = model
+            self.model_name = model_name
+            print(f"[ASR] Model {model_name} loaded successfully", flush=True)
+            return model
+    
+    def _pipeline_for(self, model_name: str, compute_type: str, model):
+        """Cached BatchedInferencePipeline wrapping a loaded model (None if unsupported)."""
+        if BatchedInferencePipeline is None:
+            return None
+        key = (model_name, compute_type)
+        with self._load_lock:
+            pipeline = self._pipelines.get(key)
+            if pipeline is None:
+                pipeline = self._pipelines[key] = BatchedInferencePipeline(model=model)
+            return pipeline
     
     def transcribe_audio(
         self,
         audio_path: str,
         model_name: str = "base",
-        batch_size: int = 16
+        batch_size: int = 16,
+        profile: Optional[str] = None,
+        decoded: bool = False
     ) -> Dict:
-        """Transcribe audio file using available backend"""
+        """
+        Transcribe audio file using available backend. `decoded=True` means
+        audio_path is already a 16 kHz mono WAV (owned by the caller), so it
+        is not converted again.
+        """
         try:
-            self.load_model(model_name)
-            print(f"[ASR] Transcribing: {audio_path}", flush=True)
+            profile = resolve_profile(profile)
+            model = self.load_model(model_name, profile)
+            print(f"[ASR] Transcribing: {audio_path} (profile: {profile})", flush=True)
             
             if self.backend == "whisperx":
-                return self._transcribe_whisperx(audio_path, batch_size)
+                return self._transcribe_whisperx(model, audio_path, batch_size)
             elif self.backend == "faster-whisper":
-                return self._transcribe_faster_whisper(audio_path)
+                return self._transcribe_faster_whisper(model, audio_path, profile, (model_name or "base").lower(), decoded)
             else:
                 raise RuntimeError("No backend available")
                 
@@ -198,10 +308,63 @@ class ASRProcessor:
             print(f"[ASR] Error during transcription: {str(e)}", flush=True)
             raise
     
-    def _transcribe_whisperx(self, audio_path: str, batch_size: int) -> Dict:
+    def _fw_decode(self, model, audio_input, profile: str, model_name: str):
+        """faster-whisper transcribe call for a profile -> (segments iterator, info)"""
+        spec = ASR_PROFILES[profile]
+        pipeline = self._pipeline_for(model_name, self.compute_type_for(profile), model) if spec["batched"] else None
+        if pipeline is not None:
+            return pipeline.transcribe(
+                audio_input,
+                vad_filter=True,
+                beam_size=spec["beam_size"],
+                batch_size=spec["batch_size"],
+                word_timestamps=False
+            )
+        return model.transcribe(
+            audio_input,
+            vad_filter=True,
+            beam_size=spec["beam_size"],
+            word_timestamps=False
+        )
+    
+    def transcribe_window(self, audio, model_name: str = "base", profile: Optional[str] = None) -> Dict:
+        """
+        Transcribe one in-memory 16 kHz float32 window (bounded pipeline).
+        Segment times are relative to the window start.
+        """
+        profile = resolve_profile(profile)
+        model = self.load_model(model_name, profile)
+        compaction = _compact_speech(audio)
+        audio_input = compaction.audio if compaction else audio
+        
+        segments = []
+        try:
+            if self.backend == "whisperx":
+                result = model.transcribe(audio_input, batch_size=ASR_PROFILES[profile]["batch_size"])
+                raw = result.get("segments", [])
+            else:
+                segments_iter, _ = self._fw_decode(model, audio_input, profile, (model_name or "base").lower())
+                raw = ({"start": seg.start, "end": seg.end, "text": seg.text} for seg in segments_iter)
+            for seg in raw:
+                txt = (seg.get("text") or "").strip()
+                if txt:
+                    start = float(seg.get("start", 0.0) or 0.0)
+                    segments.append({"start": start, "end": float(seg.get("end", start) or start), "text": txt})
+        except ValueError as e:
+            if "empty sequence" not in str(e).lower():
+                raise
+        
+        if compaction:
+            compaction.remap_segments(segments)
+        return {"segments": segments, "silence_trim": _trim_stats(compaction, len(audio) / speech_compactor.SAMPLE_RATE)}
+    
+    def _transcribe_whisperx(self, model, audio_path: str, batch_size: int) -> Dict:
         """Transcribe using WhisperX"""
         audio = whisperx.load_audio(audio_path)
-        result = self.model.transcribe(audio, batch_size=batch_size)
+        compaction = _compact_speech(audio)
+        result = model.transcribe(compaction.audio if compaction else audio, batch_size=batch_size)
+        if compaction:
+            compaction.remap_segments(result.get("segments", []))
         
         if "segments" in result and len(result["segments"]) > 0:
             transcription_text = " ".join([seg["text"].strip() for seg in result["segments"]])
@@ -225,13 +388,18 @@ class ASRProcessor:
             "segments": result.get("segments", []),
             "words": words,
             "duration": duration,
-            "language": result.get("language", "en")
+            "language": result.get("language", "en"),
+            "silence_trim": _trim_stats(compaction, len(audio) / speech_compactor.SAMPLE_RATE)
         }
     
-    def _transcribe_faster_whisper(self, audio_path: str) -> Dict:
+    def _transcribe_faster_whisper(self, model, audio_path: str, profile: str, model_name: str,
+                                   decoded: bool = False) -> Dict:
         """Transcribe using faster-whisper with robust empty audio handling"""
-        print(f"[ASR] Converting audio to WAV...", flush=True)
-        wav_path = _to_wav_mono_16k(audio_path)
+        if decoded:
+            wav_path = audio_path
+        else:
+            print(f"[ASR] Converting audio to WAV...", flush=True)
+            wav_path = _to_wav_mono_16k(audio_path)
         
         try:
             dur = _wav_duration_seconds(wav_path)
@@ -250,13 +418,20 @@ class ASRProcessor:
             
             print(f"[ASR] Starting transcription (this may take a while)...", flush=True)
             
+            # Cut long silences first; Whisper only sees the speech-only buffer
+            audio_input = wav_path
+            compaction = None
+            if speech_compactor.ASR_TRIM_SILENCE and HAS_SOUNDFILE:
+                try:
+                    samples, _ = sf.read(wav_path, dtype="float32")
+                    compaction = _compact_speech(samples)
+                except Exception as e:
+                    print(f"[ASR] Silence trim skipped: {e}", flush=True)
+            if compaction:
+                audio_input = compaction.audio
+            
             try:
-                segments_iter, info = self.model.transcribe(
-                    wav_path,
-                    vad_filter=True,
-                    beam_size=5,
-                    word_timestamps=False
-                )
+                segments_iter, info = self._fw_decode(model, audio_input, profile, model_name)
             except ValueError as e:
                 if "empty sequence" in str(e).lower():
                     print(f"[ASR] ⚠️  No speech detected (VAD returned no segments)", flush=True)
@@ -304,6 +479,10 @@ class ASRProcessor:
                     "warning": "No transcribable content found"
                 }
             
+            if compaction:
+                compaction.remap_segments(output_segments)
+                duration = max((seg["end"] for seg in output_segments), default=duration)
+            
             print(f"[ASR] ✅ Transcription complete: {segment_count} segments, {duration:.1f}s", flush=True)
             
             return {
@@ -311,13 +490,16 @@ class ASRProcessor:
                 "segments": output_segments,
                 "words": [],
                 "duration": duration if duration > 0 else dur,
-                "language": getattr(info, "language", "en")
+                "language": getattr(info, "language", "en"),
+                "profile": profile,
+                "silence_trim": _trim_stats(compaction, dur)
             }
             
         finally:
             try:
-                os.unlink(wav_path)
-                print(f"[ASR] Cleaned up temp WAV: {wav_path}", flush=True)
+                if not decoded:
+                    os.unlink(wav_path)
+                    print(f"[ASR] Cleaned up temp WAV: {wav_path}", flush=True)
             except:
                 pass
     
@@ -0,0 +1,200 @@
+"""
+Bounded Pipeline - constant-memory analysis for multi-hour recordings
+- Reads the 16 kHz WAV in fixed windows (cut at the quietest frame near the
+  window end, so words are not split); only one window is ever in memory
+- Each window's segments go straight to a JSONL spill file
+- NLP statistics are running sums: segment sentiment means, matched keyword
+  sets, a capped transcript prefix for the full-text models (they only read
+  the first 512 characters anyway)
+- Timeline comes from a streaming BinAccumulator with capped previews
+- Sampled scored segments are kept for the feature store, capped at about
+  MAX_TIMELINE_SEGMENTS the same way TimelineAnalyzer does it
+"""
+
+import os
+import re
+import json
+import math
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import soundfile as sf
+
+from utils.vad import frame_db
+from utils.timeline_analyzer import TimelineAnalyzer, BinAccumulator
+
+BOUNDED_WINDOW_SECONDS = float(os.getenv("BOUNDED_WINDOW_SECONDS", "300"))
+SEGMENT_SPILL_DIR = os.getenv("SEGMENT_SPILL_DIR", "data/segments")
+CUT_SEARCH_SECONDS = 5.0   # look this far back from the window end for a quiet cut point
+FULL_TEXT_CHARS = 512      # what the full-text classifiers actually consume
+KEYWORD_OVERLAP_CHARS = 64 # carried between windows so phrases can match across a cut
+BIN_PREVIEW_SEGMENTS = 5
+AVG_SEGMENT_SECONDS = 4.0  # to pick a sampling stride before segment count is known
+
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+def spill_path(analysis_id: str, root: str = SEGMENT_SPILL_DIR) -> str:
+    if not _ID_RE.match(analysis_id or ""):
+        raise ValueError(f"Invalid analysis id: {analysis_id!r}")
+    return os.path.join(root, f"{analysis_id}.jsonl")
+
+
+class KeywordScan:
+    """detect_keywords over text fed in chunks: matched keyword sets, small overlap between chunks"""
+
+    def __init__(self, nlp, positive_keywords: List[str], negative_keywords: List[str]):
+        self.nlp = nlp
+        self.positive_keywords = positive_keywords
+        self.negative_keywords = negative_keywords
+        self._pos, self._neg = set(), set()
+        self._tail = ""
+
+    def feed(self, text: str):
+        text = (self._tail + " " + text).strip()
+        kw = self.nlp.detect_keywords(text, self.positive_keywords, self.negative_keywords)
+        self._pos.update(kw["positive_keywords"])
+        self._neg.update(kw["negative_keywords"])
+        self._tail = text[-KEYWORD_OVERLAP_CHARS:]
+
+    def result(self) -> Dict:
+        total = len(self._pos) + len(self._neg)
+        return {
+            "positive_count": len(self._pos),
+            "negative_count": len(self._neg),
+            "positive_keywords": [k for k in self.positive_keywords if k in self._pos],
+            "negative_keywords": [k for k in self.negative_keywords if k in self._neg],
+            "score": round(len(self._pos) / total * 100, 2) if total else 50.0,
+        }
+
+
+def _quiet_cut(block: np.ndarray, sample_rate: int) -> int:
+    """Sample offset of the quietest 30 ms frame in the block's last few seconds."""
+    search = min(len(block), int(CUT_SEARCH_SECONDS * sample_rate))
+    tail = block[len(block) - search:]
+    levels = frame_db(tail, sample_rate, frame_ms=30)
+    if len(levels) == 0:
+        return len(block)
+    frame_len = int(sample_rate * 30 / 1000)
+    return len(block) - search + int(np.argmin(levels)) * frame_len + frame_len // 2
+
+
+class BoundedAnalysis:
+    """One recording, analyzed window by window"""
+
+    def __init__(self, asr, timeline: TimelineAnalyzer, model_name: str = "base",
+                 profile: Optional[str] = None, window_seconds: float = BOUNDED_WINDOW_SECONDS):
+        self.asr = asr
+        self.timeline = timeline
+        self.nlp = timeline.nlp
+        self.model_name = model_name
+        self.profile = profile
+        self.window_seconds = window_seconds
+
+    def run(self, wav_path: str, analysis_id: str, positive_keywords: List[str], negative_keywords: List[str],
+            progress: Optional[Callable[[float, str], None]] = None) -> Dict:
+        """
+        Transcribe + score `wav_path` (16 kHz mono). Returns the aggregates
+        analyze-audio needs; segments are in spill_path(analysis_id).
+        """
+        self.nlp.load_models()
+        os.makedirs(SEGMENT_SPILL_DIR, exist_ok=True)
+        out_path = spill_path(analysis_id)
+
+        with sf.SoundFile(wav_path) as f:
+            sample_rate = f.samplerate
+            total = f.frames
+            duration = total / float(sample_rate)
+            window = int(self.window_seconds * sample_rate)
+
+            bins = BinAccumulator(TimelineAnalyzer.bin_size_for(duration), max_preview=BIN_PREVIEW_SEGMENTS)
+            stride = max(1, math.ceil(duration / AVG_SEGMENT_SECONDS / self.timeline.MAX_SEGMENTS))
+            scored_segments: List[Dict] = []
+            sums = {"positive": 0.0, "negative": 0.0, "neutral": 0.0}
+            keywords = KeywordScan(self.nlp, positive_keywords, negative_keywords)
+            prefix = ""
+            n_segments, text_length, speech_samples = 0, 0, 0
+            pos = 0
+
+            with open(out_path + ".tmp", "w", encoding="utf-8") as spill:
+                while pos < total:
+                    f.seek(pos)
+                    block = f.read(window, dtype="float32", always_2d=False)
+                    if block.ndim > 1:
+                        block = block.mean(axis=1)
+                    if len(block) == 0:
+                        break
+                    if pos + len(block) < total:
+                        block = block[:_quiet_cut(block, sample_rate)]
+                    offset = pos / float(sample_rate)
+
+                    result = self.asr.transcribe_window(block, model_name=self.model_name, profile=self.profile)
+                    speech_samples += int(result["silence_trim"]["speech_seconds"] * sample_rate)
+                    window_text = []
+                    for seg in result["segments"]:
+                        seg["start"] = round(seg["start"] + offset, 3)
+                        seg["end"] = round(seg["end"] + offset, 3)
+                        spill.write(json.dumps(seg) + "\n")
+                        window_text.append(seg["text"])
+                        if len(prefix) < FULL_TEXT_CHARS:
+                            prefix = (prefix + " " + seg["text"]).strip()
+                        text_length += len(seg["text"]) + (1 if n_segments else 0)
+
+                        if n_segments % stride == 0:
+                            scored = self.timeline.score_segment(seg)
+                            if scored is not None:
+                                bins.add(scored)
+                                for k in sums:
+                                    sums[k] += scored["sentiment"].get(k, 0.0)
+                                scored_segments.append(scored)
+                        n_segments += 1
+
+                    keywords.feed(" ".join(window_text))
+
+                    pos += len(block)
+                    print(f"[BOUNDED] {pos / sample_rate:.0f}/{duration:.0f}s, {n_segments} segments", flush=True)
+                    if progress:
+                        progress(pos / float(total), f"Transcribed {pos / sample_rate / 60:.0f}/{duration / 60:.0f} min")
+            os.replace(out_path + ".tmp", out_path)
+
+        n_scored = len(scored_segments)
+        return {
+            "duration": duration,
+            "segment_count": n_segments,
+            "transcript_prefix": prefix,
+            "transcript_length": text_length,
+            "segment_sentiment": {k: v / n_scored for k, v in sums.items()} if n_scored else None,
+            "keywords": keywords.result(),
+            "scored_segments": scored_segments,
+            "timeline": bins.to_timeline(duration),
+            "silence_trim": {
+                "original_seconds": round(duration, 2),
+                "speech_seconds": round(speech_samples / float(sample_rate), 2),
+                "skipped_pct": round((1 - speech_samples / total) * 100, 1) if total else 0.0,
+            },
+        }
+
+
+def iter_spilled_segments(analysis_id: str):
+    """Stream segments back from a spill file."""
+    with open(spill_path(analysis_id), "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def scan_spilled_keywords(analysis_id: str, nlp, positive_keywords: List[str], negative_keywords: List[str],
+                          chunk_chars: int = 20000) -> Dict:
+    """Full-transcript keyword match over a spill file without loading it whole."""
+    scan = KeywordScan(nlp, positive_keywords, negative_keywords)
+    buf, size = [], 0
+    for seg in iter_spilled_segments(analysis_id):
+        buf.append(seg["text"])
+        size += len(seg["text"]) + 1
+        if size >= chunk_chars:
+            scan.feed(" ".join(buf))
+            buf, size = [], 0
+    if buf:
+        scan.feed(" ".join(buf))
+    return scan.result()
@@ -0,0 +1,54 @@
+"""
+CPU Quota - how many cores this process may actually use
+- os.cpu_count() reports the host; containers are limited by the cgroup
+  CPU quota (cpu.max on v2, cfs_quota_us/cfs_period_us on v1) and affinity
+- Read once and cached; CPU_LIMIT overrides
+"""
+
+import os
+import math
+from typing import Optional
+
+_CPUS: Optional[int] = None
+
+
+def _cgroup_quota() -> Optional[float]:
+    """CPUs allowed by the cgroup quota, or None when unlimited/unknown."""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:  # cgroup v2: "<quota|max> <period>"
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read().strip())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read().strip())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus() -> int:
+    """Usable cores: min(affinity, cgroup quota), at least 1."""
+    global _CPUS
+    if _CPUS is None:
+        override = os.getenv("CPU_LIMIT", "")
+        if override.isdigit() and int(override) > 0:
+            _CPUS = int(override)
+        else:
+            try:
+                cpus = len(os.sched_getaffinity(0))
+            except AttributeError:
+                cpus = os.cpu_count() or 1
+            quota = _cgroup_quota()
+            if quota:
+                cpus = min(cpus, max(1, math.floor(quota)))
+            _CPUS = max(1, cpus)
+        print(f"[CPU] Usable cores: {_CPUS}", flush=True)
+    return _CPUS
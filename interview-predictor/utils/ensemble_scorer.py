@@ -17,9 +17,27 @@ def _clamp(x: float, lo: float = 0.0, hi: float = 100.0) -> float:
     return max(lo, min(hi, v))
 
 
+DEFAULT_WEIGHTS = {"sentiment": 0.25, "toxicity": 0.25, "competency": 0.30, "keywords": 0.20}
+
+
 class EnsembleScorer:
     """Combines sentiment, toxicity, competency, keywords"""
     
+    def __init__(self, weights: Dict[str, float] = None):
+        """
+        weights: optional per-component weights (missing keys keep their
+        default); normalized to sum to 1
+        """
+        merged = dict(DEFAULT_WEIGHTS)
+        for k, v in (weights or {}).items():
+            if k not in merged:
+                raise ValueError(f"Unknown score component: {k}")
+            merged[k] = max(0.0, float(v))
+        total = sum(merged.values())
+        if total <= 0:
+            raise ValueError("At least one component weight must be positive")
+        self.weights = {k: v / total for k, v in merged.items()}
+    
     def calculate_ensemble_score(
         self,
         sentiment_scores: Dict[str, float],
@@ -60,7 +78,7 @@ class EnsembleScorer:
         keyword_component = _clamp((keyword_match or {}).get("score", 50.0))
         
         # ---- Weights
-        w_sent, w_tox, w_comp, w_key = 0.25, 0.25, 0.30, 0.20
+        w_sent, w_tox, w_comp, w_key = (self.weights[k] for k in ("sentiment", "toxicity", "competency", "keywords"))
         
         # ---- Weighted sum
         final_score = (
@@ -97,9 +115,6 @@ class EnsembleScorer:
                 "keywords": round(keyword_component, 2)
             },
             "component_contributions": {
-                "sentiment": 25.0,
-                "toxicity": 25.0,
-                "competency": 30.0,
-                "keywords": 20.0
+                k: round(w * 100.0, 2) for k, w in self.weights.items()
             }
         }
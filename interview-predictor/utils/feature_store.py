@@ -0,0 +1,83 @@
+"""
+Feature Store - compact columnar snapshot of a finished analysis
+- One .npz per analysis: float32 columns per scored segment (timing,
+  sentiment, toxicity) + segment texts, and a JSON meta blob with the
+  full-text model outputs
+- Everything a re-score needs (keywords, weights, bin size) without
+  re-running ASR or any model
+"""
+
+import os
+import re
+import json
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+
+FEATURE_STORE_DIR = os.getenv("FEATURE_STORE_DIR", "data/features")
+
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# per-segment numeric columns, in storage order
+COLUMNS = ("start", "end", "positive", "negative", "neutral", "toxic")
+
+
+class FeatureStore:
+    """Columnar per-analysis feature snapshots on local disk"""
+
+    def __init__(self, root: str = FEATURE_STORE_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, analysis_id: str) -> str:
+        if not _ID_RE.match(analysis_id or ""):
+            raise ValueError(f"Invalid analysis id: {analysis_id!r}")
+        return os.path.join(self.root, f"{analysis_id}.npz")
+
+    def save(self, analysis_id: str, scored_segments: List[Dict], meta: Dict):
+        """
+        scored_segments: TimelineAnalyzer output (start/end/text/sentiment/toxicity)
+        meta: full-text outputs (sentiment, toxicity, competency, transcript, duration, ...)
+        """
+        cols = {c: np.zeros(len(scored_segments), dtype=np.float32) for c in COLUMNS}
+        for i, seg in enumerate(scored_segments):
+            cols["start"][i] = seg.get("start", 0.0)
+            cols["end"][i] = seg.get("end", 0.0)
+            cols["positive"][i] = seg["sentiment"].get("positive", 0.0)
+            cols["negative"][i] = seg["sentiment"].get("negative", 0.0)
+            cols["neutral"][i] = seg["sentiment"].get("neutral", 0.0)
+            cols["toxic"][i] = seg["toxicity"].get("toxic", 0.0)
+        texts = np.array([seg.get("text", "") for seg in scored_segments], dtype=str)
+
+        path = self._path(analysis_id)
+        tmp = f"{path}.{threading.get_ident()}.tmp.npz"
+        np.savez_compressed(tmp, text=texts, meta=np.array(json.dumps(meta)), **cols)
+        os.replace(tmp, path)
+
+    def load(self, analysis_id: str) -> Optional[Dict]:
+        """{"segments": [...], "meta": {...}} or None if unknown"""
+        path = self._path(analysis_id)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            cols = {c: data[c].tolist() for c in COLUMNS}
+            texts = data["text"].tolist()
+            meta = json.loads(str(data["meta"]))
+
+        # scores were 2-decimal percentages before the float32 round-trip
+        segments = []
+        for i, txt in enumerate(texts):
+            toxic = round(cols["toxic"][i], 2)
+            segments.append({
+                "start": round(cols["start"][i], 3),
+                "end": round(cols["end"][i], 3),
+                "text": txt,
+                "sentiment": {
+                    "positive": round(cols["positive"][i], 2),
+                    "negative": round(cols["negative"][i], 2),
+                    "neutral": round(cols["neutral"][i], 2),
+                },
+                "toxicity": {"toxic": toxic, "non_toxic": round(100.0 - toxic, 2)},
+            })
+        return {"segments": segments, "meta": meta}
@@ -0,0 +1,208 @@
+"""
+Feedback Cache - sits in front of LLMFeedbackGenerator
+- Key: sha256 of (model, prompt built from canonicalized analysis results),
+  so repeats of the same analysis map to the same entry
+- LRU in-memory tier + optional on-disk tier (FEEDBACK_CACHE_DIR), both with TTL
+- Concurrent identical requests share one in-flight LLM call; followers wait
+  at most FEEDBACK_WAIT_TIMEOUT seconds for it, then use the rule-based fallback
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+FEEDBACK_CACHE_SIZE = int(os.getenv("FEEDBACK_CACHE_SIZE", "256"))
+FEEDBACK_CACHE_TTL = float(os.getenv("FEEDBACK_CACHE_TTL", "86400"))
+FEEDBACK_CACHE_DIR = os.getenv("FEEDBACK_CACHE_DIR", "")
+FEEDBACK_WAIT_TIMEOUT = float(os.getenv("FEEDBACK_WAIT_TIMEOUT", "30"))
+
+
+def canonicalize(analysis_results: Dict[str, Any]) -> Dict[str, Any]:
+    """Round scores and normalize the transcript sample the prompt actually uses."""
+    components = analysis_results.get("component_scores", {}) or {}
+    transcript = " ".join((analysis_results.get("transcript", "") or "").split())
+    return {
+        "score": round(float(analysis_results.get("score", 0) or 0), 1),
+        "prediction": str(analysis_results.get("prediction", "Unknown")).strip(),
+        "component_scores": {
+            k: round(float(components.get(k, 0) or 0), 1)
+            for k in ("sentiment", "toxicity", "competency", "keywords")
+        },
+        "transcript": transcript[:500],
+    }
+
+
+def cache_key(model_name: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model_name}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class FeedbackCache:
+    """Two-tier TTL cache with in-flight request coalescing"""
+
+    def __init__(self, max_entries: int = FEEDBACK_CACHE_SIZE, ttl_seconds: float = FEEDBACK_CACHE_TTL,
+                 disk_dir: str = FEEDBACK_CACHE_DIR):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir or None
+        self._mem: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    # ----------------- tiers -----------------
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Tuple[float, Dict]]:
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return float(entry["created_at"]), entry["value"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_disk(self, key: str, created_at: float, value: Dict):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"created_at": created_at, "value": value}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[CACHE] Disk write failed: {e}", flush=True)
+
+    def lookup(self, key: str) -> Optional[Tuple[Dict, Dict]]:
+        """Return (value, meta) on a fresh hit in either tier."""
+        now = time.time()
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry and now - entry[0] <= self.ttl_seconds:
+                self._mem.move_to_end(key)
+                return entry[1], {"hit": True, "tier": "memory", "age_seconds": round(now - entry[0], 1)}
+            if entry:
+                del self._mem[key]
+
+        entry = self._read_disk(key)
+        if entry and now - entry[0] <= self.ttl_seconds:
+            self._store_memory(key, entry[0], entry[1])
+            return entry[1], {"hit": True, "tier": "disk", "age_seconds": round(now - entry[0], 1)}
+        return None
+
+    def _store_memory(self, key: str, created_at: float, value: Dict):
+        with self._lock:
+            self._mem[key] = (created_at, value)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def put(self, key: str, value: Dict):
+        created_at = time.time()
+        self._store_memory(key, created_at, value)
+        self._write_disk(key, created_at, value)
+
+    # ----------------- in-flight coalescing -----------------
+    def begin(self, key: str) -> Tuple[bool, Future]:
+        """(True, future) for the caller that must compute; (False, future) for followers."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return False, future
+            future = Future()
+            self._inflight[key] = future
+            return True, future
+
+    def finish(self, key: str, value: Dict, cacheable: bool = True):
+        if cacheable:
+            self.put(key, value)
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    def fail(self, key: str, error: BaseException):
+        with self._lock:
+            future = self._inflight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_exception(error)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Dict],
+                       cacheable: Callable[[Dict], bool] = lambda v: True,
+                       fallback: Optional[Callable[[], Dict]] = None,
+                       wait_timeout: float = FEEDBACK_WAIT_TIMEOUT) -> Tuple[Dict, Dict]:
+        """
+        Serve from cache, join an identical in-flight call, or compute once.
+        A follower waits at most wait_timeout for the leader; if the leader is
+        that slow or fails, the follower returns fallback() (or re-raises without one).
+        """
+        hit = self.lookup(key)
+        if hit:
+            return hit
+
+        leader, future = self.begin(key)
+        if not leader:
+            try:
+                return future.result(timeout=wait_timeout), {"hit": True, "tier": "inflight", "age_seconds": 0.0}
+            except Exception as e:
+                if fallback is None:
+                    raise
+                reason = f"timed out after {wait_timeout:g}s" if isinstance(e, FutureTimeoutError) else str(e)
+                print(f"[CACHE] In-flight feedback call failed ({reason}), using fallback", flush=True)
+                return fallback(), {"hit": False, "tier": None, "age_seconds": 0.0}
+
+        hit = self.lookup(key)  # a previous leader may have finished in between
+        if hit:
+            self.finish(key, hit[0], cacheable=False)
+            return hit
+
+        try:
+            value = compute()
+        except BaseException as e:
+            self.fail(key, e)
+            raise
+        self.finish(key, value, cacheable(value))
+        return value, {"hit": False, "tier": None, "age_seconds": 0.0}
+
+    # ----------------- generator front -----------------
+    def generate(self, generator, analysis_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Cached LLMFeedbackGenerator.generate_feedback; result carries a `cache` dict."""
+        canonical = canonicalize(analysis_results)
+        model_name = generator.working_model
+        if not model_name:
+            result = dict(generator.generate_feedback(canonical))
+            result["cache"] = {"hit": False, "tier": None, "age_seconds": 0.0}
+            return result
+
+        key = cache_key(model_name, generator.build_prompt(canonical))
+        value, meta = self.get_or_compute(
+            key,
+            lambda: generator.generate_feedback(canonical),
+            cacheable=lambda v: v.get("model_used") == model_name,  # never cache fallback text
+            fallback=lambda: generator._generate_fallback_feedback(canonical),
+        )
+        result = dict(value)
+        result["cache"] = dict(meta, key=key[:16])
+        return result
+
+
+# ----------------- Process-wide cache -----------------
+_CACHE: Optional[FeedbackCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_feedback_cache() -> FeedbackCache:
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = FeedbackCache()
+        return _CACHE
@@ -0,0 +1,186 @@
+"""
+Live Session - incremental interview analysis over streamed microphone audio
+- Input: 16 kHz mono PCM16 frames
+- Energy VAD gates Whisper: silent stretches are dropped, never transcribed
+- faster-whisper runs on a rolling window of not-yet-committed audio;
+  segments that end before the window tail are committed, the rest is partial
+- Committed segments are scored once (TimelineAnalyzer.score_segment) and
+  added to running sums + a BinAccumulator, so updates never rescan history
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+
+from utils.vad import EnergyVAD, SAMPLE_RATE
+from utils.timeline_analyzer import TimelineAnalyzer, BinAccumulator
+
+LIVE_WINDOW_SECONDS = float(os.getenv("LIVE_WINDOW_SECONDS", "12"))
+LIVE_STEP_SECONDS = float(os.getenv("LIVE_STEP_SECONDS", "1.0"))
+LIVE_COMMIT_MARGIN = 1.0     # segments ending this close to the window tail may still change
+LIVE_ROLLING_SECONDS = 60.0  # horizon for the "recent" scores
+LIVE_BIN_SIZE = 20
+
+
+class LiveSession:
+    """One WebSocket connection's worth of audio, transcript and scores"""
+
+    def __init__(self, asr, timeline: TimelineAnalyzer, model_name: str = "tiny",
+                 window_seconds: float = LIVE_WINDOW_SECONDS, step_seconds: float = LIVE_STEP_SECONDS):
+        if asr.backend != "faster-whisper":
+            raise RuntimeError("Live mode requires the faster-whisper backend")
+        self.asr = asr
+        self.timeline = timeline
+        self.model_name = model_name
+        self.window_seconds = window_seconds
+        self.step_seconds = step_seconds
+        self.model = None
+
+        self.vad = EnergyVAD()
+        self._lock = threading.Lock()
+        self._buffer = np.zeros(0, dtype=np.float32)  # uncommitted audio
+        self._buffer_start = 0                        # session sample index of _buffer[0]
+        self._total_samples = 0
+        self._samples_since_step = 0
+        self._last_speech = -1                        # sample index where speech was last heard
+
+        self.bins = BinAccumulator(LIVE_BIN_SIZE)
+        self.committed: List[Dict] = []
+        self._text_parts: List[str] = []
+        self._recent = deque()
+        self._sums = {"positive": 0.0, "toxic": 0.0, "score": 0.0, "kw_pos": 0, "kw_neg": 0}
+
+    def load(self):
+        """Blocking: load whisper + NLP models (call from an executor)."""
+        # own reference: the shared ASRProcessor may load other sizes meanwhile
+        self.model = self.asr.load_model(self.model_name, profile="fast")
+        self.timeline.nlp.load_models()
+
+    # ----------------- audio in -----------------
+    def add_pcm(self, data: bytes):
+        audio = np.frombuffer(data[:len(data) - len(data) % 2], dtype="<i2").astype(np.float32) / 32768.0
+        speech = self.vad.process(audio)
+        with self._lock:
+            if speech.any():
+                last_frame = int(np.flatnonzero(speech)[-1])
+                self._last_speech = self._total_samples + (last_frame + 1) * self.vad.frame_len
+            self._buffer = np.concatenate([self._buffer, audio])
+            self._total_samples += len(audio)
+            self._samples_since_step += len(audio)
+
+    @property
+    def duration(self) -> float:
+        return self._total_samples / SAMPLE_RATE
+
+    def ready(self) -> bool:
+        return self._samples_since_step >= self.step_seconds * SAMPLE_RATE
+
+    # ----------------- incremental step -----------------
+    def step(self, final: bool = False) -> Dict:
+        """Transcribe the pending window, commit stable segments, return an update."""
+        with self._lock:
+            audio = self._buffer
+            start = self._buffer_start
+            has_speech = self._last_speech > start
+            self._samples_since_step = 0
+        offset = start / SAMPLE_RATE
+
+        buffer_seconds = len(audio) / SAMPLE_RATE
+        partial = ""
+        new_segments = []
+        consumed = 0.0
+
+        if not has_speech:
+            # Dead air: drop it, keep a short tail in case speech starts mid-frame
+            consumed = max(0.0, buffer_seconds - 0.5)
+        elif buffer_seconds >= 0.5:
+            segments = self._transcribe(audio)
+            force = final or buffer_seconds >= self.window_seconds
+            for i, seg in enumerate(segments):
+                last = i == len(segments) - 1
+                stable = seg["end"] <= buffer_seconds - LIVE_COMMIT_MARGIN
+                if final or stable or (force and not last):
+                    new_segments.append({"start": offset + seg["start"], "end": offset + seg["end"], "text": seg["text"]})
+                    consumed = seg["end"]
+                else:
+                    partial = (partial + " " + seg["text"]).strip()
+            if force and not new_segments and not final:
+                # One long unfinished utterance: bound the window anyway
+                new_segments = [{"start": offset + s["start"], "end": offset + s["end"], "text": s["text"]} for s in segments]
+                consumed = segments[-1]["end"] if segments else buffer_seconds
+                partial = ""
+
+        with self._lock:
+            cut = min(len(audio), int(consumed * SAMPLE_RATE))
+            self._buffer = self._buffer[cut:]
+            self._buffer_start = start + cut
+
+        committed = [self._commit(seg) for seg in new_segments]
+        return {
+            "type": "final" if final else "update",
+            "audio_seconds": round(self.duration, 2),
+            "partial": partial,
+            "committed": [
+                {"start": round(c["start"], 2), "end": round(c["end"], 2), "text": c["text"],
+                 "score": c.get("score")}
+                for c in committed
+            ],
+            "scores": self.scores(),
+            # only bins touched by this update; the final message carries the full timeline
+            "bin_size": self.bins.bin_size,
+            "bins": self.bins.pop_dirty(self.duration),
+            **({"timeline": self.bins.to_timeline(self.duration), "transcript": self.transcript()} if final else {}),
+        }
+
+    def _transcribe(self, audio: np.ndarray) -> List[Dict]:
+        segments_iter, _ = self.model.transcribe(
+            audio,
+            beam_size=1,
+            vad_filter=True,
+            word_timestamps=False,
+            condition_on_previous_text=False,
+        )
+        out = []
+        for seg in segments_iter:
+            txt = (getattr(seg, "text", "") or "").strip()
+            if txt:
+                out.append({"start": float(seg.start), "end": float(seg.end), "text": txt})
+        return out
+
+    def _commit(self, seg: Dict) -> Dict:
+        self._text_parts.append(seg["text"])
+        scored = self.timeline.score_segment(seg)
+        if scored is None:
+            return seg  # too short to score, still part of the transcript
+        self.committed.append(scored)
+        self.bins.add(scored)
+        self._sums["positive"] += scored["sentiment"].get("positive", 50.0)
+        self._sums["toxic"] += scored["toxicity"].get("toxic", 0.0)
+        self._sums["score"] += scored["score"]
+        self._sums["kw_pos"] += scored["keywords"]["positive_count"]
+        self._sums["kw_neg"] += scored["keywords"]["negative_count"]
+        self._recent.append(scored)
+        return scored
+
+    # ----------------- rolling scores -----------------
+    def scores(self) -> Dict:
+        n = len(self.committed)
+        while self._recent and self._recent[0]["end"] < self.duration - LIVE_ROLLING_SECONDS:
+            self._recent.popleft()
+        recent = list(self._recent)
+        kw_total = self._sums["kw_pos"] + self._sums["kw_neg"]
+        return {
+            "segments": n,
+            "sentiment": round(self._sums["positive"] / n, 2) if n else None,
+            "toxicity": round(self._sums["toxic"] / n, 2) if n else None,
+            "keywords": round(self._sums["kw_pos"] / kw_total * 100, 2) if kw_total else 50.0,
+            "keyword_hits": {"positive": self._sums["kw_pos"], "negative": self._sums["kw_neg"]},
+            "score": round(self._sums["score"] / n, 2) if n else None,
+            "recent_score": round(sum(s["score"] for s in recent) / len(recent), 2) if recent else None,
+        }
+
+    def transcript(self) -> str:
+        return " ".join(self._text_parts)
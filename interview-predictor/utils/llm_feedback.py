@@ -1,16 +1,116 @@
 """
 LLM Feedback Generator using Google Gemini (Fixed)
+- One process-wide generator (get_feedback_generator): the working model is
+  resolved once via a metadata lookup, then re-validated in the background
+- genai.configure() runs once per process; it resets the SDK's client cache,
+  so calling it per request threw away the pooled connection every time
+- FEEDBACK_BACKEND=stub swaps in a deterministic offline backend for tests
 """
 
 import google.generativeai as genai
 import os
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Iterator, Optional
+
+FEEDBACK_BACKEND = os.getenv("FEEDBACK_BACKEND", "gemini").lower()
+REVALIDATE_SECONDS = int(os.getenv("FEEDBACK_REVALIDATE_SECONDS", "900"))
+STREAM_TIMEOUT_SECONDS = float(os.getenv("FEEDBACK_STREAM_TIMEOUT", "30"))
+MAX_OUTPUT_TOKENS = int(os.getenv("FEEDBACK_MAX_TOKENS", "1024"))
+
+
+def _approx_tokens(text: str) -> int:
+    """~4 chars per token; good enough for enforcing a budget client-side"""
+    return max(1, len(text) // 4) if text else 0
+
+
+class GeminiBackend:
+    """google-generativeai transport; GenerativeModel objects are cached per model"""
+    
+    name = "gemini"
+    
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key
+        self._models: Dict[str, Any] = {}
+    
+    def configure(self, api_key: str = None) -> bool:
+        api_key = api_key or self.api_key or os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            print("Warning: No Gemini API key found. Set GEMINI_API_KEY env var.")
+            return False
+        self.api_key = api_key
+        genai.configure(api_key=api_key)
+        self._models.clear()
+        return True
+    
+    def validate(self, model_name: str) -> bool:
+        """Metadata lookup only - no tokens generated"""
+        info = genai.get_model(f"models/{model_name}")
+        return 'generateContent' in (info.supported_generation_methods or [])
+    
+    def _model(self, model_name: str):
+        if model_name not in self._models:
+            self._models[model_name] = genai.GenerativeModel(model_name)
+        return self._models[model_name]
+    
+    def generate(self, model_name: str, prompt: str) -> str:
+        response = self._model(model_name).generate_content(prompt)
+        return response.text if response else ""
+    
+    def stream(self, model_name: str, prompt: str, max_tokens: int, timeout: float) -> Iterator[str]:
+        response = self._model(model_name).generate_content(
+            prompt,
+            stream=True,
+            generation_config={"max_output_tokens": max_tokens},
+            request_options={"timeout": timeout},
+        )
+        for chunk in response:
+            text = getattr(chunk, "text", "")
+            if text:
+                yield text
+
+
+class StubBackend:
+    """Deterministic offline backend (FEEDBACK_BACKEND=stub) for tests and load runs"""
+    
+    name = "stub"
+    
+    def configure(self, api_key: str = None) -> bool:
+        return True
+    
+    def validate(self, model_name: str) -> bool:
+        return True
+    
+    def generate(self, model_name: str, prompt: str) -> str:
+        score = next((ln.split(":", 1)[1].strip() for ln in prompt.splitlines()
+                      if ln.startswith("- Overall Score:")), "n/a")
+        return f"""**STRENGTHS (3 specific items):**
+- Overall score of {score} shows a solid baseline
+- Answers stay professional throughout
+- Responses reference concrete experience
+
+**AREAS FOR IMPROVEMENT (3 specific items):**
+- Quantify results with specific metrics
+- Tighten long answers to the key point
+- Replace hedging phrases with direct statements
+
+**NEXT STEPS (2 actionable items):**
+- Rehearse three STAR stories out loud
+- Record a mock interview and review the timeline"""
+    
+    def stream(self, model_name: str, prompt: str, max_tokens: int, timeout: float) -> Iterator[str]:
+        words = self.generate(model_name, prompt).split(" ")
+        for i, word in enumerate(words):
+            yield word if i == 0 else " " + word
+
+
+def _default_backend():
+    return StubBackend() if FEEDBACK_BACKEND == "stub" else GeminiBackend()
 
 
 class LLMFeedbackGenerator:
     """Generates actionable feedback using Google Gemini"""
     
-    def __init__(self):
+    def __init__(self, backend=None):
         # Use correct model names from API documentation
         self.models_to_try = [
             "gemini-2.0-flash",      # Latest model
@@ -18,40 +118,57 @@ class LLMFeedbackGenerator:
             "gemini-1.5-flash",      # Base model
             "gemini-pro"             # Fallback
         ]
-        self.client = None
+        self.backend = backend or _default_backend()
         self.working_model = None
+        self._configured = False
+        self._lock = threading.Lock()
+        self._revalidate_stop = None
         
     def configure_api(self, api_key: str = None):
-        """Configure Gemini API and find working model"""
-        if api_key:
-            genai.configure(api_key=api_key)
-        else:
-            api_key = os.getenv('GEMINI_API_KEY')
-            if not api_key:
-                print("Warning: No Gemini API key found. Set GEMINI_API_KEY env var.")
-                return False
-            genai.configure(api_key=api_key)
-        
-        # Try to find a working model
+        """Configure the backend once and find a working model"""
+        with self._lock:
+            if not self._configured:
+                if not self.backend.configure(api_key):
+                    return False
+                self._configured = True
+        return self.resolve_model() is not None
+    
+    def resolve_model(self) -> Optional[str]:
+        """Pick the first model the API reports as able to generate content"""
         for model_name in self.models_to_try:
             try:
                 print(f"Trying model: {model_name}")
-                test_client = genai.GenerativeModel(model_name)
-                
-                # Test with a simple prompt
-                response = test_client.generate_content("Say 'test successful'")
-                if response and response.text:
-                    self.client = test_client
+                if self.backend.validate(model_name):
+                    if model_name != self.working_model:
+                        print(f"✅ Successfully configured with model: {model_name}")
                     self.working_model = model_name
-                    print(f"✅ Successfully configured with model: {model_name}")
-                    return True
-                    
+                    return model_name
             except Exception as e:
                 print(f"❌ Model {model_name} failed: {str(e)}")
                 continue
         
         print("❌ No working Gemini models found")
-        return False
+        self.working_model = None
+        return None
+    
+    def start_revalidation(self, interval: float = REVALIDATE_SECONDS):
+        """Re-check the working model every `interval` seconds on a daemon thread"""
+        if self._revalidate_stop is not None or interval <= 0:
+            return
+        self._revalidate_stop = threading.Event()
+        
+        def _loop(stop: threading.Event):
+            while not stop.wait(interval):
+                if self._configured:
+                    self.resolve_model()
+        
+        threading.Thread(target=_loop, args=(self._revalidate_stop,),
+                         name="feedback-revalidate", daemon=True).start()
+    
+    def stop_revalidation(self):
+        if self._revalidate_stop is not None:
+            self._revalidate_stop.set()
+            self._revalidate_stop = None
     
     def list_available_models(self):
         """List available models (for debugging)"""
@@ -62,18 +179,14 @@ class LLMFeedbackGenerator:
         except Exception as e:
             print(f"Error listing models: {e}")
     
-    def generate_feedback(self, analysis_results: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate actionable interview feedback"""
-        if not self.client or not self.working_model:
-            return self._generate_fallback_feedback(analysis_results)
+    def build_prompt(self, analysis_results: Dict[str, Any]) -> str:
+        """Coaching prompt from scores, prediction and a transcript sample"""
+        score = analysis_results.get('score', 0)
+        prediction = analysis_results.get('prediction', 'Unknown')
+        components = analysis_results.get('component_scores', {})
+        transcript = analysis_results.get('transcript', '')
         
-        try:
-            score = analysis_results.get('score', 0)
-            prediction = analysis_results.get('prediction', 'Unknown')
-            components = analysis_results.get('component_scores', {})
-            transcript = analysis_results.get('transcript', '')
-            
-            prompt = f"""You are an expert interview coach. Analyze this interview performance and provide specific, actionable feedback.
+        return f"""You are an expert interview coach. Analyze this interview performance and provide specific, actionable feedback.
 
 INTERVIEW METRICS:
 - Overall Score: {score}%
@@ -103,22 +216,78 @@ Provide feedback in this EXACT format:
 - [Another concrete next step]
 
 Keep each point concise (1-2 sentences)."""
-
-            response = self.client.generate_content(prompt)
+    
+    def generate_feedback(self, analysis_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate actionable interview feedback"""
+        model_name = self.working_model
+        if not self._configured or not model_name:
+            return self._generate_fallback_feedback(analysis_results)
+        
+        try:
+            text = self.backend.generate(model_name, self.build_prompt(analysis_results))
             
-            if response and response.text:
+            if text:
                 return {
                     "success": True,
-                    "feedback": response.text.strip(),
-                    "model_used": self.working_model
+                    "feedback": text.strip(),
+                    "model_used": model_name
                 }
             else:
                 return self._generate_fallback_feedback(analysis_results)
                 
         except Exception as e:
             print(f"Error generating feedback: {e}")
+            # The model may have been retired; re-resolve off the request path
+            threading.Thread(target=self.resolve_model, daemon=True).start()
             return self._generate_fallback_feedback(analysis_results)
     
+    def stream_feedback(
+        self,
+        analysis_results: Dict[str, Any],
+        max_tokens: int = MAX_OUTPUT_TOKENS,
+        timeout: float = STREAM_TIMEOUT_SECONDS,
+        cancelled: Optional[threading.Event] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield feedback as events while Gemini generates it:
+        {"type": "token", "text"} ... then {"type": "done", ...}
+        If the stream fails partway, yields {"type": "fallback", "feedback"}
+        with the rule-based feedback, which replaces any partial text.
+        """
+        model_name = self.working_model
+        if not self._configured or not model_name:
+            fallback = self._generate_fallback_feedback(analysis_results)
+            yield {"type": "fallback", "feedback": fallback["feedback"], "model": fallback["model_used"],
+                   "error": "No working model configured"}
+            return
+        
+        parts = []
+        used = 0
+        truncated = False
+        try:
+            chunks = self.backend.stream(model_name, self.build_prompt(analysis_results), max_tokens, timeout)
+            for text in chunks:
+                if cancelled is not None and cancelled.is_set():
+                    return
+                used += _approx_tokens(text)
+                if used > max_tokens:
+                    truncated = True
+                    break
+                parts.append(text)
+                yield {"type": "token", "text": text}
+            if not parts:
+                raise RuntimeError("Empty response stream")
+        except Exception as e:
+            print(f"Error streaming feedback: {e}")
+            threading.Thread(target=self.resolve_model, daemon=True).start()
+            fallback = self._generate_fallback_feedback(analysis_results)
+            yield {"type": "fallback", "feedback": fallback["feedback"], "model": fallback["model_used"],
+                   "error": str(e)}
+            return
+        
+        yield {"type": "done", "feedback": "".join(parts).strip(), "model": model_name,
+               "tokens": used, "truncated": truncated}
+    
     def _generate_fallback_feedback(self, analysis_results):
         """Generate simple fallback feedback when Gemini fails"""
         score = analysis_results.get('score', 0)
@@ -156,3 +325,22 @@ Overall Performance: {score:.1f}% ({prediction})
             "feedback": feedback,
             "model_used": "Fallback Rule-Based Generator"
         }
+
+
+# ----------------- Process-wide generator -----------------
+_GENERATOR: Optional[LLMFeedbackGenerator] = None
+_GENERATOR_LOCK = threading.Lock()
+
+
+def get_feedback_generator() -> LLMFeedbackGenerator:
+    """Shared generator: configured and model-resolved once per process"""
+    global _GENERATOR
+    with _GENERATOR_LOCK:
+        if _GENERATOR is None:
+            generator = LLMFeedbackGenerator()
+            generator.configure_api()
+            if generator._configured:
+                # keeps retrying when no model resolved at startup
+                generator.start_revalidation()
+            _GENERATOR = generator
+        return _GENERATOR
@@ -0,0 +1,306 @@
+"""
+Model Loader - the one place transformers models are loaded
+- Weights come from safetensors when the snapshot has them (memory-mapped
+  and materialized once: low_cpu_mem_usage skips the random-init copy);
+  snapshots that only ship pytorch_model.bin fall back to it
+- Models are cached by (model ID, dtype, device): two pipelines over the
+  same model share one set of weights
+- Tokenizers are shared between models with the same vocabulary and
+  tokenizer config, but only within one inference lock: fast tokenizers
+  are not thread-safe, so concurrently used models never share one
+- Per-model load time and memory footprint are reported to model_store
+  (visible on /ready)
+- Inference on one model is serialized (model_lock); different models run
+  in parallel. The worker's cores (apply_thread_budget) are split between
+  the forward passes actually in flight (inference), so a lone call gets
+  them all and concurrent stages don't oversubscribe
+torch/transformers are imported on first load, not at module import
+"""
+
+import os
+import sys
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Tuple
+
+from utils import model_store
+from utils.cpu_quota import available_cpus
+
+_MODELS: Dict[Tuple[str, str, int], object] = {}     # (model_id, dtype, device) -> model
+_TOKENIZERS: Dict[Tuple[str, str], object] = {}     # (lock name, vocab fingerprint) -> tokenizer
+_TOKENIZER_BY_MODEL: Dict[Tuple[str, str], object] = {}  # (lock name, model_id) -> tokenizer
+_PIPELINES: Dict[tuple, object] = {}
+_LOCKS: Dict[tuple, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+_INFERENCE_LOCKS: Dict[str, threading.Lock] = {}
+
+# sentiment, toxicity, zero-shot: with one call per model at a time, at most
+# this many forward passes overlap
+CONCURRENT_MODELS = 3
+NLP_INTRA_OP_THREADS = os.getenv("NLP_INTRA_OP_THREADS", "")
+_THREADS: Optional[int] = None  # sequential budget (whole worker)
+_WORKERS = 1
+_IN_FLIGHT = 0                  # model calls inside inference() right now
+
+SHM_PATH = "/dev/shm"
+SHM_HEADROOM = 1.2  # free space wanted in SHM_PATH per byte of weights moved there
+
+# Files that define a tokenizer (vocabulary, then class/special tokens), in the order we look for them
+_VOCAB_FILES = ("tokenizer.json", "vocab.txt", "vocab.json", "merges.txt", "spm.model", "sentencepiece.bpe.model")
+_CONFIG_FILES = ("tokenizer_config.json", "special_tokens_map.json")
+
+
+def _lock_for(key: tuple) -> threading.Lock:
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(key, threading.Lock())
+
+
+def model_lock(name: str) -> threading.Lock:
+    """
+    Held around every call into the named model: pipelines and fast
+    tokenizers are not thread-safe, but calls into different models can
+    overlap (torch releases the GIL during the forward pass).
+    """
+    with _LOCKS_GUARD:
+        return _INFERENCE_LOCKS.setdefault(name, threading.Lock())
+
+
+@contextmanager
+def inference(name: str):
+    """
+    model_lock(name) for the duration of one model call, with torch's
+    thread count split between the calls in flight: every thread calling
+    into torch gets a pool of that size, so overlapping stages would
+    otherwise oversubscribe the cores, while a lone call keeps them all.
+    """
+    global _IN_FLIGHT
+    with model_lock(name):
+        with _LOCKS_GUARD:
+            _IN_FLIGHT += 1
+            _sync_torch_threads()
+        try:
+            yield
+        finally:
+            with _LOCKS_GUARD:
+                _IN_FLIGHT -= 1
+                _sync_torch_threads()
+
+
+def _fixed_threads() -> Optional[int]:
+    return int(NLP_INTRA_OP_THREADS) if NLP_INTRA_OP_THREADS.isdigit() and int(NLP_INTRA_OP_THREADS) > 0 else None
+
+
+def thread_budget(workers: int = 1) -> int:
+    """Intra-op threads for a lone model call: this worker's share of the cores."""
+    return _fixed_threads() or max(1, available_cpus() // max(1, workers))
+
+
+def _current_threads() -> int:
+    """Budget split between the model calls in flight (NLP_INTRA_OP_THREADS pins it)."""
+    budget = _THREADS or thread_budget(_WORKERS)
+    if _fixed_threads() or _IN_FLIGHT <= 1:
+        return budget
+    return max(1, budget // min(_IN_FLIGHT, CONCURRENT_MODELS))
+
+
+def _sync_torch_threads():
+    """Push the current budget to torch (no-op until torch is imported)."""
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.get_num_threads() != _current_threads():
+        torch.set_num_threads(_current_threads())
+
+
+def apply_thread_budget(workers: int = 1, threads: Optional[int] = None) -> int:
+    """
+    Set this worker's share of the cores: torch's intra-op thread count
+    for a lone model call (process-wide; inference() splits it while calls
+    overlap). Applied now if torch is imported, else on the first model load.
+    """
+    global _THREADS, _WORKERS
+    _WORKERS = max(1, workers)
+    _THREADS = threads or thread_budget(workers)
+    if "torch" in sys.modules:
+        _sync_torch_threads()
+        print(f"[LOADER] torch intra-op threads: {_THREADS}", flush=True)
+    return _THREADS
+
+
+
+
+def default_device() -> int:
+    """Pipeline device index: 0 on CUDA, -1 on CPU (probed once)."""
+    return 0 if model_store.cuda_available() else -1
+
+
+def default_dtype(device: int) -> str:
+    return "float16" if device >= 0 else "float32"
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _param_bytes(model) -> int:
+    return sum(t.numel() * t.element_size() for t in list(model.parameters()) + list(model.buffers()))
+
+
+# ----------------- tokenizers -----------------
+def _vocab_fingerprint(source: str, tokenizer=None) -> Optional[str]:
+    """Hash of the vocabulary + tokenizer config files (local snapshot) or of the loaded tokenizer."""
+    h = hashlib.sha1()
+    if os.path.isdir(source):
+        found = False
+        for name in _VOCAB_FILES + _CONFIG_FILES:
+            path = os.path.join(source, name)
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    h.update(name.encode() + f.read())
+                found = found or name in _VOCAB_FILES
+        return h.hexdigest() if found else None
+    if tokenizer is not None:
+        h.update(type(tokenizer).__name__.encode())
+        h.update(repr(sorted(tokenizer.get_vocab().items())).encode("utf-8"))
+        h.update(repr(sorted((k, repr(v)) for k, v in getattr(tokenizer, "init_kwargs", {}).items())).encode("utf-8"))
+        return h.hexdigest()
+    return None
+
+
+def load_tokenizer(model_id: str, lock_name: str = ""):
+    """
+    Tokenizer for model_id, shared with loaded models that have the same
+    vocabulary and config and are called under the same model_lock(lock_name).
+    """
+    with _lock_for(("tokenizer", lock_name, model_id)):
+        if (lock_name, model_id) in _TOKENIZER_BY_MODEL:
+            return _TOKENIZER_BY_MODEL[(lock_name, model_id)]
+        from transformers import AutoTokenizer
+
+        source = model_store.resolve(model_id)
+        fingerprint = _vocab_fingerprint(source)
+        tokenizer = _TOKENIZERS.get((lock_name, fingerprint)) if fingerprint else None
+        if tokenizer is None:
+            tokenizer = AutoTokenizer.from_pretrained(source, use_fast=True)
+            fingerprint = fingerprint or _vocab_fingerprint(source, tokenizer)
+            tokenizer = _TOKENIZERS.setdefault((lock_name, fingerprint), tokenizer)
+        else:
+            print(f"[LOADER] Sharing tokenizer for {model_id} ({lock_name or 'unlocked'})", flush=True)
+        _TOKENIZER_BY_MODEL[(lock_name, model_id)] = tokenizer
+        return tokenizer
+
+
+# ----------------- models -----------------
+def load_model(model_id: str, dtype: Optional[str] = None, device: Optional[int] = None, name: str = ""):
+    """Sequence-classification model, cached by (model_id, dtype, device)."""
+    device = default_device() if device is None else device
+    dtype = dtype or default_dtype(device)
+    key = (model_id, dtype, device)
+    if key in _MODELS:
+        return _MODELS[key]
+
+    with _lock_for(("model",) + key):
+        if key in _MODELS:
+            return _MODELS[key]
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        if _THREADS is None:
+            apply_thread_budget(workers=_WORKERS)
+        else:
+            _sync_torch_threads()
+        name = name or model_id
+        rss0, t0 = _rss_bytes(), time.perf_counter()
+        with model_store.track(name, model_id):
+            source = model_store.resolve(model_id)
+            try:
+                model = AutoModelForSequenceClassification.from_pretrained(
+                    source, use_safetensors=True, low_cpu_mem_usage=True, torch_dtype=getattr(torch, dtype),
+                )
+            except (OSError, ValueError) as e:
+                print(f"[LOADER] No safetensors for {model_id}, loading default weights: {str(e)[:120]}", flush=True)
+                model = AutoModelForSequenceClassification.from_pretrained(
+                    source, use_safetensors=None, low_cpu_mem_usage=True, torch_dtype=getattr(torch, dtype),
+                )
+            if device >= 0:
+                model = model.to(f"cuda:{device}")
+            model.eval()
+        footprint = {
+            "params_mb": round(_param_bytes(model) / 2**20, 1),
+            "rss_delta_mb": round((_rss_bytes() - rss0) / 2**20, 1),
+            "dtype": dtype,
+            "device": "cpu" if device < 0 else f"cuda:{device}",
+        }
+        model_store.mark(name, "warm", **footprint)
+        print(f"[LOADER] ✅ {model_id} ({dtype}, {footprint['device']}) in {time.perf_counter() - t0:.1f}s, "
+              f"{footprint['params_mb']} MB params, RSS +{footprint['rss_delta_mb']} MB", flush=True)
+        _MODELS[key] = model
+        return model
+
+
+def load_pipeline(task: str, model_id: str, name: str = "", fallbacks: Iterable[str] = (),
+                  dtype: Optional[str] = None, device: Optional[int] = None, **pipeline_kwargs):
+    """
+    transformers pipeline over a cached model + shared tokenizer. `fallbacks`
+    are tried in order if `model_id` fails to load. `name` is also the
+    model_lock callers hold: the tokenizer is only shared under that lock.
+    """
+    device = default_device() if device is None else device
+    last_error = None
+    for candidate in [model_id, *fallbacks]:
+        key = (task, candidate, dtype or default_dtype(device), device, tuple(sorted(pipeline_kwargs.items())))
+        if key in _PIPELINES:
+            return _PIPELINES[key]
+        try:
+            from transformers import pipeline
+
+            model = load_model(candidate, dtype=dtype, device=device, name=name)
+            tokenizer = load_tokenizer(candidate, lock_name=name)
+            pipe = pipeline(task, model=model, tokenizer=tokenizer, device=device, framework="pt", **pipeline_kwargs)
+            return _PIPELINES.setdefault(key, pipe)
+        except Exception as e:
+            print(f"[LOADER] ❌ {candidate} failed: {str(e)[:200]}", flush=True)
+            last_error = e
+    raise RuntimeError(f"Failed to load {task} model ({model_id}): {last_error}")
+
+
+def loaded_models() -> Dict[str, Dict]:
+    """What is resident right now (for diagnostics)."""
+    return {
+        f"{model_id}|{dtype}|{device}": {"params_mb": round(_param_bytes(m) / 2**20, 1)}
+        for (model_id, dtype, device), m in list(_MODELS.items())
+    }
+
+
+def _shm_free_bytes(path: str = SHM_PATH) -> Optional[int]:
+    try:
+        st = os.statvfs(path)
+    except OSError:
+        return None
+    return st.f_bavail * st.f_frsize
+
+
+def share_memory() -> int:
+    """
+    Move every cached CPU model's tensors into shared memory (pre-fork
+    master): forked workers then map the same pages instead of relying on
+    copy-on-write surviving refcount/GC writes. Returns MB shared.
+
+    torch backs shared tensors with /dev/shm; when it has no room for the
+    weights (Docker's default is 64 MB) this is skipped and workers fall
+    back to plain copy-on-write pages.
+    """
+    models = [model for (model_id, dtype, device), model in list(_MODELS.items()) if device < 0]
+    needed = sum(_param_bytes(model) for model in models)
+    free = _shm_free_bytes()
+    if free is not None and free < needed * SHM_HEADROOM:
+        print(f"[LOADER] {SHM_PATH} has {free / 2**20:.0f} MB free, weights need {needed / 2**20:.0f} MB: "
+              f"not sharing (raise shm_size, see README)", flush=True)
+        return 0
+    for model in models:
+        model.share_memory()
+    return round(needed / 2**20)
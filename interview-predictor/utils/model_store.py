@@ -0,0 +1,189 @@
+"""
+Model Store - local model snapshots + warm-state registry
+- `prefetch` snapshots every model the service uses into MODEL_DIR (build time)
+- `resolve` maps a HuggingFace hub ID to its local snapshot when one exists
+- Tracks per-model warm state for the /ready endpoint
+- Probes CUDA once, lazily, so importing this module never pulls in torch
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+MODEL_DIR = os.getenv("MODEL_DIR", "")
+
+# faster-whisper sizes -> CTranslate2 snapshots on the hub
+WHISPER_REPOS = {
+    "tiny": "Systran/faster-whisper-tiny",
+    "base": "Systran/faster-whisper-base",
+    "small": "Systran/faster-whisper-small",
+    "medium": "Systran/faster-whisper-medium",
+    "large": "Systran/faster-whisper-large-v3",
+    "large-v2": "Systran/faster-whisper-large-v2",
+}
+
+# transformers models used by safe_nlp / NLPAnalyzer (loaded via model_loader)
+NLP_MODELS = {
+    "sentiment": "distilbert-base-uncased-finetuned-sst-2-english",
+    "toxicity": "unitary/toxic-bert",
+    "zero_shot": "facebook/bart-large-mnli",
+}
+
+# Weights for other frameworks are never loaded, don't bake them into the image
+_IGNORE_PATTERNS = [
+    "*.h5", "*.msgpack", "*.ot", "*.onnx", "onnx/*",
+    "tf_model*", "flax_model*", "rust_model*", "coreml/*",
+]
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _local_dir(repo_id: str, root: str) -> str:
+    return os.path.join(root, repo_id.replace("/", "--"))
+
+
+def resolve(repo_id: str) -> str:
+    """Return the local snapshot path for `repo_id` if prefetched, else the hub ID."""
+    if MODEL_DIR:
+        path = _local_dir(repo_id, MODEL_DIR)
+        if os.path.isdir(path) and os.listdir(path):
+            return path
+    return repo_id
+
+
+def whisper_source(model_name: str) -> str:
+    """faster-whisper accepts either a size name or a model directory."""
+    repo_id = WHISPER_REPOS.get(model_name)
+    if not repo_id:
+        return model_name
+    path = resolve(repo_id)
+    return path if path != repo_id else model_name
+
+
+def prefetch(dest: str, whisper_sizes: List[str]) -> Dict[str, str]:
+    """Download every model snapshot into `dest` and write a manifest."""
+    from huggingface_hub import snapshot_download
+
+    os.makedirs(dest, exist_ok=True)
+    repos = [WHISPER_REPOS[s] for s in whisper_sizes if s in WHISPER_REPOS]
+    repos += list(NLP_MODELS.values())
+
+    manifest = {}
+    for repo_id in repos:
+        target = _local_dir(repo_id, dest)
+        t0 = time.perf_counter()
+        print(f"[PREFETCH] {repo_id} -> {target}", flush=True)
+        snapshot_download(
+            repo_id=repo_id,
+            local_dir=target,
+            ignore_patterns=_IGNORE_PATTERNS,
+        )
+        manifest[repo_id] = target
+        print(f"[PREFETCH] ✅ {repo_id} ({time.perf_counter() - t0:.1f}s)", flush=True)
+
+    with open(os.path.join(dest, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"[PREFETCH] ✅ {len(manifest)} models in {dest}", flush=True)
+    return manifest
+
+
+# ----------------- Device probe -----------------
+_CUDA: Optional[bool] = None
+
+
+def cuda_available() -> bool:
+    """Probe CUDA once (imports torch on first call) and cache the answer."""
+    global _CUDA
+    if _CUDA is None:
+        try:
+            import torch
+            _CUDA = bool(torch.cuda.is_available())
+            print(f"[MODELS] PyTorch {torch.__version__} loaded, CUDA: {_CUDA}", flush=True)
+        except Exception:
+            _CUDA = False
+            print("[MODELS] PyTorch not available", flush=True)
+    return _CUDA
+
+
+_CT2: Optional[Dict] = None
+
+
+def ct2_device() -> Dict:
+    """
+    faster-whisper's device + supported compute types, probed once via
+    CTranslate2 (no torch, no throwaway model load on CPU-only hosts).
+    """
+    global _CT2
+    if _CT2 is None:
+        try:
+            import ctranslate2
+            device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+            compute_types = set(ctranslate2.get_supported_compute_types(device))
+        except Exception as e:
+            print(f"[MODELS] CTranslate2 probe failed, assuming CPU: {e}", flush=True)
+            device, compute_types = "cpu", {"int8", "float32"}
+        _CT2 = {"device": device, "compute_types": compute_types}
+        print(f"[MODELS] CTranslate2 device: {device}, compute types: {sorted(compute_types)}", flush=True)
+    return _CT2
+
+
+def cuda_probed() -> Optional[bool]:
+    """Cached CUDA answer without triggering the probe (None = not probed yet)."""
+    return _CUDA
+
+
+# ----------------- Warm state -----------------
+_state: Dict[str, Dict] = {}
+_state_lock = threading.Lock()
+
+
+def mark(name: str, status: str, **extra):
+    with _state_lock:
+        entry = _state.setdefault(name, {})
+        entry.update(extra)
+        entry["status"] = status
+        entry["updated_at"] = round(time.time(), 3)
+
+
+@contextmanager
+def track(name: str, model_id: str = ""):
+    """Record loading -> warm/failed around a model load."""
+    mark(name, "loading", model_id=model_id)
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        mark(name, "failed", error=str(e)[:200])
+        raise
+    mark(name, "warm", load_seconds=round(time.perf_counter() - t0, 2), error=None)
+
+
+def warm_state() -> Dict[str, Dict]:
+    with _state_lock:
+        return {k: dict(v) for k, v in _state.items()}
+
+
+# ----------------- CLI -----------------
+def main(argv: List[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="model_store", description="Bake model snapshots for offline startup")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("prefetch", help="snapshot every model into a local directory")
+    p.add_argument("--dest", default=MODEL_DIR or "models", help="target directory (default: $MODEL_DIR)")
+    p.add_argument("--whisper", default=os.getenv("PREFETCH_WHISPER", "tiny,base"),
+                   help="comma-separated whisper sizes to bake (default: tiny,base)")
+    args = parser.parse_args(argv)
+
+    if args.command == "prefetch":
+        sizes = [s.strip() for s in args.whisper.split(",") if s.strip()]
+        prefetch(args.dest, sizes)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -5,22 +5,17 @@ Handles ALL sentiment label formats
 
 import re
 from typing import Dict, List
-import torch
+
+from utils.model_loader import inference
 
 try:
-    from utils.safe_nlp import sentiment_pipeline, toxicity_pipeline, warmup_models
+    from utils.safe_nlp import sentiment_pipeline, toxicity_pipeline, zero_shot_pipeline, warmup_models
     HAS_SAFE_NLP = True
     print("[NLP] Safe loader imported")
 except ImportError as e:
     HAS_SAFE_NLP = False
     print(f"[NLP] WARNING: safe_nlp not available: {e}")
 
-try:
-    from transformers import pipeline as tf_pipeline
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    TRANSFORMERS_AVAILABLE = False
-
 
 class NLPAnalyzer:
     """NLP analysis with robust label handling"""
@@ -45,15 +40,7 @@ class NLPAnalyzer:
         try:
             self.sentiment_analyzer = sentiment_pipeline()
             self.toxicity_analyzer = toxicity_pipeline()
-            
-            if TRANSFORMERS_AVAILABLE:
-                device = 0 if torch.cuda.is_available() else -1
-                self.zero_shot_classifier = tf_pipeline(
-                    "zero-shot-classification",
-                    model="facebook/bart-large-mnli",
-                    device=device
-                )
-                print("[NLP] ✅ Zero-shot loaded")
+            self.zero_shot_classifier = zero_shot_pipeline()
             
             self._models_loaded = True
             print("[NLP] ✅ All models loaded")
@@ -87,7 +74,8 @@ class NLPAnalyzer:
             return self._fallback_sentiment(text)
         
         try:
-            raw = self.sentiment_analyzer(text[:512])
+            with inference("sentiment"):
+                raw = self.sentiment_analyzer(text[:512])
             
             # Normalize to list of {label, score} dicts
             if isinstance(raw, dict):
@@ -192,7 +180,8 @@ class NLPAnalyzer:
             return self._fallback_toxicity(text)
         
         try:
-            out = self.toxicity_analyzer(text[:512])
+            with inference("toxicity"):
+                out = self.toxicity_analyzer(text[:512])
             toxic_score = 0.0
             
             first = out[0] if isinstance(out, list) else out
@@ -244,11 +233,12 @@ class NLPAnalyzer:
             return {l: 50.0 for l in candidate_labels}
         
         try:
-            result = self.zero_shot_classifier(
-                text[:512],
-                candidate_labels=candidate_labels,
-                multi_label=True
-            )
+            with inference("zero_shot"):
+                result = self.zero_shot_classifier(
+                    text[:512],
+                    candidate_labels=candidate_labels,
+                    multi_label=True
+                )
             return {
                 l: round(float(s) * 100, 2)
                 for l, s in zip(result['labels'], result['scores'])
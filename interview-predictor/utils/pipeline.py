@@ -0,0 +1,163 @@
+"""
+Pipeline - declarative, per-request stage selection for analyze-audio
+- A spec names the outputs a client wants (plus per-stage options); the
+  runner pulls in their dependencies and skips every other stage
+- Stages whose dependencies are done run concurrently on a thread pool,
+  except stages that declare the same resource (e.g. the same model),
+  which never overlap
+- Per-stage wall time is recorded for the response
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+
+
+class Stage:
+    """One node of the analysis DAG"""
+
+    def __init__(self, name: str, fn: Callable[[Dict[str, Any], Dict[str, Any]], Any],
+                 deps: Iterable[str] = (), resources: Iterable[str] = (), options: Dict[str, type] = None):
+        self.name = name
+        self.fn = fn                            # fn(results_so_far, options) -> value
+        self.deps = tuple(deps)
+        self.resources = frozenset(resources)   # stages sharing a resource are serialized
+        self.options = options or {}            # allowed option -> expected type
+
+
+class PipelineSpec:
+    """
+    Parsed request spec:
+        {"stages": ["timeline", {"name": "competency", "labels": ["leadership"]}]}
+    A bare list of stage names is accepted too. No spec = every stage.
+    """
+
+    def __init__(self, targets: Set[str], options: Dict[str, Dict[str, Any]]):
+        self.targets = targets
+        self.options = options
+
+    @classmethod
+    def parse(cls, raw: Optional[str], stages: Dict[str, Stage], root: str = "") -> "PipelineSpec":
+        if not raw or not raw.strip():
+            return cls(set(stages), {})
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"pipeline must be JSON: {e}")
+        if isinstance(data, dict):
+            data = data.get("stages", [])
+        if not isinstance(data, list):
+            raise ValueError("pipeline.stages must be a list")
+
+        targets, options = set(), {}
+        for item in data:
+            if isinstance(item, str):
+                name, opts = item, {}
+            elif isinstance(item, dict) and isinstance(item.get("name"), str):
+                name, opts = item["name"], {k: v for k, v in item.items() if k != "name"}
+            else:
+                raise ValueError(f"invalid stage entry: {item!r}")
+            if name == root:
+                continue  # always runs
+            if name not in stages:
+                raise ValueError(f"unknown stage {name!r} (available: {', '.join([root] + sorted(stages)) if root else ', '.join(sorted(stages))})")
+            allowed = stages[name].options
+            for key, value in opts.items():
+                if key not in allowed:
+                    raise ValueError(f"stage {name!r} has no option {key!r}")
+                if not isinstance(value, allowed[key]):
+                    raise ValueError(f"option {name}.{key} must be {allowed[key].__name__}")
+            targets.add(name)
+            if opts:
+                options[name] = opts
+        return cls(targets, options)
+
+
+def plan(stages: Dict[str, Stage], targets: Iterable[str]) -> List[str]:
+    """Targets plus transitive dependencies, in a valid execution order."""
+    order: List[str] = []
+    state: Dict[str, int] = {}  # 1 = visiting, 2 = done
+
+    def visit(name: str):
+        if name not in stages or state.get(name) == 2:
+            return  # seeded input (e.g. the transcript) or already planned
+        if state.get(name) == 1:
+            raise ValueError(f"pipeline cycle at {name!r}")
+        state[name] = 1
+        for dep in stages[name].deps:
+            visit(dep)
+        state[name] = 2
+        order.append(name)
+
+    for name in sorted(targets):
+        visit(name)
+    return order
+
+
+_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="stage")
+        return _EXECUTOR
+
+
+def run(stages: Dict[str, Stage], spec: PipelineSpec, seed: Dict[str, Any] = None,
+        executor: Optional[ThreadPoolExecutor] = None,
+        on_done: Optional[Callable[[str, int, int], None]] = None) -> Tuple[Dict[str, Any], Dict[str, float], List[str]]:
+    """
+    Execute the planned stages. Returns (results, timings_ms, skipped).
+    `seed` holds values already computed upstream (e.g. the transcript);
+    on_done(name, finished, total) is called as each stage completes.
+    The first stage failure is re-raised once running stages finish.
+    """
+    executor = executor or get_executor()
+    order = plan(stages, spec.targets)
+    skipped = sorted(set(stages) - set(order))
+    results: Dict[str, Any] = dict(seed or {})
+    timings: Dict[str, float] = {}
+    pending = list(order)
+    running = {}  # future -> name
+    busy: Set[str] = set()
+
+    def timed(stage: Stage, opts: Dict[str, Any]):
+        t0 = time.perf_counter()
+        value = stage.fn(results, opts)
+        return value, (time.perf_counter() - t0) * 1000
+
+    error = None
+    while pending or running:
+        if error is None:
+            for name in list(pending):
+                stage = stages[name]
+                if all(dep in results for dep in stage.deps) and not (stage.resources & busy):
+                    pending.remove(name)
+                    busy |= stage.resources
+                    running[executor.submit(timed, stage, spec.options.get(name, {}))] = name
+        if not running:
+            break
+        done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+        for future in done:
+            name = running.pop(future)
+            busy -= stages[name].resources
+            try:
+                results[name], timings[name] = future.result()
+                timings[name] = round(timings[name], 1)
+            except Exception as e:
+                if error is None:
+                    error = e
+                continue
+            if on_done:
+                on_done(name, len(timings), len(order))
+    if error is not None:
+        raise error
+    return results, timings, skipped
@@ -0,0 +1,131 @@
+"""
+Speech Compactor - drop long silences before ASR, map timestamps back
+- EnergyVAD pass over the decoded 16 kHz buffer
+- Speech gate is relative to the clip's own noise floor, so quiet speakers
+  on a quiet line are not mistaken for silence
+- Speech regions are padded and merged; only silences longer than
+  `min_silence` are cut, so normal pauses stay intact for Whisper
+- Spans table: (compact_start, original_start, length) in samples, used to
+  map segment/word times from the compacted buffer to the original audio
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.vad import EnergyVAD, SAMPLE_RATE, frame_db
+
+ASR_TRIM_SILENCE = os.getenv("ASR_TRIM_SILENCE", "0") not in ("0", "false", "False", "")  # opt-in
+ASR_MIN_SILENCE = float(os.getenv("ASR_MIN_SILENCE", "1.0"))  # seconds of non-speech before we cut
+SPEECH_PAD = 0.2        # seconds kept either side of each speech region
+MIN_SKIP_RATIO = 0.02   # not worth remapping below this
+NOISE_PERCENTILE = 10   # frame level taken as the clip's noise floor
+
+
+class CompactedAudio:
+    """Speech-only buffer + the table to map its times back to the original"""
+
+    def __init__(self, audio: np.ndarray, spans: np.ndarray, original_samples: int,
+                 sample_rate: int = SAMPLE_RATE):
+        self.audio = audio
+        self.spans = spans  # int64 rows: compact_start, original_start, length
+        self.original_samples = original_samples
+        self.sample_rate = sample_rate
+
+    @property
+    def skipped_ratio(self) -> float:
+        if not self.original_samples:
+            return 0.0
+        return 1.0 - len(self.audio) / self.original_samples
+
+    def stats(self) -> Dict:
+        return {
+            "original_seconds": round(self.original_samples / self.sample_rate, 2),
+            "speech_seconds": round(len(self.audio) / self.sample_rate, 2),
+            "skipped_pct": round(self.skipped_ratio * 100, 1),
+            "spans": int(len(self.spans)),
+        }
+
+    def to_original(self, t: float, is_end: bool = False) -> float:
+        """Map a time (s) in the compacted buffer to the original recording."""
+        if len(self.spans) == 0:
+            return t
+        pos = t * self.sample_rate
+        starts = self.spans[:, 0]
+        # a time exactly on a join belongs to the next span for starts, the previous for ends
+        i = int(np.searchsorted(starts, pos, side="left" if is_end else "right")) - 1
+        i = min(max(i, 0), len(self.spans) - 1)
+        c_start, o_start, length = self.spans[i]
+        offset = min(max(pos - c_start, 0), length)
+        return float(o_start + offset) / self.sample_rate
+
+    def remap_segments(self, segments: List[Dict]) -> List[Dict]:
+        """In place: segment (and word) start/end back to original time."""
+        for seg in segments:
+            if seg.get("start") is not None:
+                seg["start"] = round(self.to_original(float(seg["start"])), 3)
+            if seg.get("end") is not None:
+                seg["end"] = round(self.to_original(float(seg["end"]), is_end=True), 3)
+            for word in seg.get("words", []) or []:
+                if word.get("start") is not None:
+                    word["start"] = round(self.to_original(float(word["start"])), 3)
+                if word.get("end") is not None:
+                    word["end"] = round(self.to_original(float(word["end"]), is_end=True), 3)
+        return segments
+
+
+def _speech_regions(mask: np.ndarray, frame_len: int, total: int, sample_rate: int,
+                    min_silence: float, pad: float) -> List[List[int]]:
+    """[start, end) sample ranges of padded speech, merged across short gaps."""
+    if not mask.any():
+        return []
+    padded = np.concatenate([[False], mask, [False]])
+    edges = np.flatnonzero(np.diff(padded.astype(np.int8)))
+    pad_s = int(pad * sample_rate)
+    bridge = int(min_silence * sample_rate)
+
+    regions: List[List[int]] = []
+    for on, off in zip(edges[::2], edges[1::2]):
+        start = max(0, on * frame_len - pad_s)
+        end = min(total, off * frame_len + pad_s)
+        if regions and start - regions[-1][1] < bridge:
+            regions[-1][1] = max(regions[-1][1], end)
+        else:
+            regions.append([start, end])
+    return regions
+
+
+def _clip_min_db(audio: np.ndarray, vad: EnergyVAD) -> float:
+    """Absolute speech gate for this clip: never above the noise floor + margin."""
+    levels = frame_db(audio, vad.sample_rate, vad.frame_ms)
+    if len(levels) == 0:
+        return vad.min_db
+    return min(vad.min_db, float(np.percentile(levels, NOISE_PERCENTILE)) + vad.margin_db)
+
+
+def compact(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, min_silence: float = ASR_MIN_SILENCE,
+            pad: float = SPEECH_PAD) -> Optional[CompactedAudio]:
+    """
+    Speech-only copy of `audio`, or None when there is nothing worth cutting
+    (no speech found by the energy VAD, or less than MIN_SKIP_RATIO silence).
+    """
+    audio = np.asarray(audio, dtype=np.float32)
+    vad = EnergyVAD(sample_rate=sample_rate)
+    vad.min_db = _clip_min_db(audio, vad)
+    mask = vad.speech_mask(audio)
+    regions = _speech_regions(mask, vad.frame_len, len(audio), sample_rate, min_silence, pad)
+    if not regions:
+        return None  # quiet speech the energy gate missed: let Whisper's own VAD decide
+
+    kept = sum(end - start for start, end in regions)
+    if 1.0 - kept / max(len(audio), 1) < MIN_SKIP_RATIO:
+        return None
+
+    spans = np.zeros((len(regions), 3), dtype=np.int64)
+    cursor = 0
+    for i, (start, end) in enumerate(regions):
+        spans[i] = (cursor, start, end - start)
+        cursor += end - start
+    compacted = np.concatenate([audio[start:end] for start, end in regions])
+    return CompactedAudio(compacted, spans, len(audio), sample_rate)
@@ -3,18 +3,127 @@ Timeline Analyzer - Optimized for long audio
 - Samples segments to a fixed upper bound
 - Uses faster per-segment features (sentiment + toxicity + keywords)
 - Dynamic bin sizing for long durations
+- Segment sentiment and toxicity run as two parallel streams (one per model)
 """
 
 import math
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
 from utils.nlp_analyzer import NLPAnalyzer
 from utils.ensemble_scorer import EnsembleScorer
 import os
 
 
+def _make_bin(bin_start: float, bin_end: float, bin_segments: List[Dict],
+              score_sum: float = None, count: int = None) -> Dict:
+    """
+    One timeline bin in the shape the frontend expects. score_sum/count
+    override the aggregate when bin_segments is only a preview.
+    """
+    if count is None:
+        count = len(bin_segments)
+        score_sum = sum(seg['score'] for seg in bin_segments)
+    if count:
+        avg_score = score_sum / count
+        if avg_score >= 70:
+            color, label = 'green', 'Strong'
+        elif avg_score >= 40:
+            color, label = 'yellow', 'Okay'
+        else:
+            color, label = 'red', 'Weak'
+        
+        return {
+            't0': round(bin_start, 1),      # for frontend compatibility
+            't1': round(bin_end, 1),         # for frontend compatibility
+            'start': round(bin_start, 1),    # legacy field
+            'end': round(bin_end, 1),        # legacy field
+            'score': round(avg_score, 1),
+            'color': color,
+            'label': label,
+            'segment_count': count,
+            'segments': [
+                {
+                    'text': seg['text'][:100] + '...' if len(seg['text']) > 100 else seg['text'],
+                    'score': round(seg['score'], 1),
+                    'start': round(seg['start'], 1),
+                    'end': round(seg['end'], 1)
+                }
+                for seg in bin_segments
+            ]
+        }
+    
+    # Empty bin - use neutral score
+    return {
+        't0': round(bin_start, 1),
+        't1': round(bin_end, 1),
+        'start': round(bin_start, 1),
+        'end': round(bin_end, 1),
+        'score': 50.0,
+        'color': 'yellow',
+        'label': 'No data',
+        'segment_count': 0,
+        'segments': []
+    }
+
+
+class BinAccumulator:
+    """
+    Incremental version of create_timeline_data for a fixed bin size:
+    each scored segment is added once to the bins it overlaps, so the
+    timeline can be re-emitted without rescanning every segment.
+    With max_preview, bins keep running score sums and only the first
+    few segments (for the transcript preview), so memory is O(bins).
+    """
+    
+    def __init__(self, bin_size: int = 20, max_preview: int = None):
+        self.bin_size = bin_size
+        self.max_preview = max_preview
+        self._bins: Dict[int, List[Dict]] = {}
+        self._sums: Dict[int, List[float]] = {}  # bin -> [score_sum, count]
+        self._dirty = set()
+    
+    def add(self, seg: Dict):
+        first = int(seg['start'] // self.bin_size)
+        last = int(seg['end'] // self.bin_size)
+        for i in range(first, last + 1):
+            # same overlap rule as create_timeline_data
+            if seg['end'] > i * self.bin_size and seg['start'] < (i + 1) * self.bin_size:
+                preview = self._bins.setdefault(i, [])
+                if self.max_preview is None or len(preview) < self.max_preview:
+                    preview.append(seg)
+                sums = self._sums.setdefault(i, [0.0, 0])
+                sums[0] += seg['score']
+                sums[1] += 1
+                self._dirty.add(i)
+    
+    def _bin(self, i: int, bin_end: float) -> Dict:
+        score_sum, count = self._sums.get(i, (0.0, 0))
+        return _make_bin(i * self.bin_size, bin_end, self._bins.get(i, []), score_sum, count)
+    
+    def pop_dirty(self, duration: float) -> List[Dict]:
+        """Bins changed since the last call (for incremental updates)."""
+        changed = [
+            self._bin(i, min((i + 1) * self.bin_size, max(duration, i * self.bin_size)))
+            for i in sorted(self._dirty)
+        ]
+        self._dirty.clear()
+        return changed
+    
+    def to_timeline(self, duration: float) -> Dict:
+        if duration <= 0:
+            return {'bins': [], 'duration': 0, 'bin_size': 0}
+        num_bins = int(duration / self.bin_size) + 1
+        bins = [self._bin(i, min((i + 1) * self.bin_size, duration)) for i in range(num_bins)]
+        return {'bins': bins, 'duration': round(duration, 1), 'bin_size': self.bin_size}
+
+
 class TimelineAnalyzer:
     """Creates timeline with real NLP-based segment scores (optimized)"""
     
+    # very light per-segment keywords
+    SEGMENT_POSITIVE_KEYWORDS = ["yes", "definitely", "experience", "achieved", "successfully"]
+    SEGMENT_NEGATIVE_KEYWORDS = ["um", "uh", "maybe", "I guess"]
+    
     def __init__(self):
         self.nlp = NLPAnalyzer()
         self.scorer = EnsembleScorer()
@@ -48,49 +157,90 @@ class TimelineAnalyzer:
         sampled = self._sample_segments(segments)
         print(f"Timeline: downsampled to {len(sampled)} segments")
         
+        # trivial fillers are skipped; both models then walk the same list
+        # concurrently (their locks are independent, torch releases the GIL)
+        kept = [seg for seg in sampled if len((seg.get('text') or '').strip()) >= 10]
+        if len(kept) < len(sampled):
+            print(f"Skipping {len(sampled) - len(kept)} segments: too short")
+        texts = [seg['text'].strip() for seg in kept]
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="segments") as pool:
+            sentiments = pool.submit(lambda: [self.nlp.analyze_sentiment(t) for t in texts])
+            toxicities = pool.submit(lambda: [self.nlp.analyze_toxicity(t) for t in texts])
+            sentiments, toxicities = sentiments.result(), toxicities.result()
+        
         scored_segments = []
-        for i, segment in enumerate(sampled, 1):
-            txt = (segment.get('text') or '').strip()
-            if len(txt) < 10:
-                print(f"Skipping segment {i}: too short")
-                continue  # skip trivial fillers
-            
-            # Fast features only
-            sentiment = self.nlp.analyze_sentiment(txt)
-            toxicity = self.nlp.analyze_toxicity(txt)
-            
-            # very light keywords
-            keywords = self.nlp.detect_keywords(
-                txt,
-                positive_keywords=["yes", "definitely", "experience", "achieved", "successfully"],
-                negative_keywords=["um", "uh", "maybe", "I guess"]
-            )
-            
-            # Compute a score using a neutral competency proxy (avoid zero-shot here)
-            results = self.scorer.calculate_ensemble_score(
-                sentiment_scores=sentiment,
-                toxicity_score=toxicity["toxic"],
-                competency_scores={"general": 50.0},  # neutral per-segment
-                keyword_match=keywords
-            )
-            
-            scored_segments.append({
-                'start': segment.get('start', 0),
-                'end': segment.get('end', 0),
-                'text': txt,
-                'score': results['score'],
-                'sentiment': sentiment,
-                'toxicity': toxicity,
-                'prediction': results['prediction']
-            })
+        for i, (segment, txt, sentiment, toxicity) in enumerate(zip(kept, texts, sentiments, toxicities), 1):
+            scored = self.score_features(segment.get('start', 0), segment.get('end', 0), txt, sentiment, toxicity)
+            scored_segments.append(scored)
             
             if i <= 3 or i % 20 == 0:
-                print(f"  Segment {i}/{len(sampled)}: score={results['score']:.1f}%")
+                print(f"  Segment {i}/{len(kept)}: score={scored['score']:.1f}%")
         
         print(f"Timeline: scored {len(scored_segments)} segments")
         return scored_segments
     
-    def create_timeline_data(self, scored_segments: List[Dict], duration: float) -> Dict:
+    def score_segment(self, segment: Dict) -> Optional[Dict]:
+        """
+        Score one segment with the fast features (sentiment + toxicity +
+        keywords). Returns None for trivial fillers. Models must be loaded.
+        """
+        txt = (segment.get('text') or '').strip()
+        if len(txt) < 10:
+            return None
+        
+        # Fast features only
+        sentiment = self.nlp.analyze_sentiment(txt)
+        toxicity = self.nlp.analyze_toxicity(txt)
+        
+        return self.score_features(segment.get('start', 0), segment.get('end', 0), txt, sentiment, toxicity)
+    
+    def score_features(
+        self,
+        start: float,
+        end: float,
+        txt: str,
+        sentiment: Dict[str, float],
+        toxicity: Dict[str, float],
+        scorer: EnsembleScorer = None,
+        positive_keywords: List[str] = None,
+        negative_keywords: List[str] = None
+    ) -> Dict:
+        """
+        Segment score from already-computed model outputs. No model calls,
+        so stored features can be re-scored with other keywords/weights.
+        """
+        keywords = self.nlp.detect_keywords(
+            txt,
+            positive_keywords=positive_keywords if positive_keywords is not None else self.SEGMENT_POSITIVE_KEYWORDS,
+            negative_keywords=negative_keywords if negative_keywords is not None else self.SEGMENT_NEGATIVE_KEYWORDS
+        )
+        
+        # Compute a score using a neutral competency proxy (avoid zero-shot here)
+        results = (scorer or self.scorer).calculate_ensemble_score(
+            sentiment_scores=sentiment,
+            toxicity_score=toxicity["toxic"],
+            competency_scores={"general": 50.0},  # neutral per-segment
+            keyword_match=keywords
+        )
+        
+        return {
+            'start': start,
+            'end': end,
+            'text': txt,
+            'score': results['score'],
+            'sentiment': sentiment,
+            'toxicity': toxicity,
+            'keywords': keywords,
+            'prediction': results['prediction']
+        }
+    
+    @staticmethod
+    def bin_size_for(duration: float) -> int:
+        """target around ~100 bins; min 20s, max 120s"""
+        target_bins = 100
+        return max(20, min(120, int(max(1, duration // target_bins))))
+    
+    def create_timeline_data(self, scored_segments: List[Dict], duration: float, bin_size: int = None) -> Dict:
         """
         Create timeline visualization data from scored segments.
         Bin size adapts to keep ~100 bins on very long calls.
@@ -98,6 +248,7 @@ class TimelineAnalyzer:
         Args:
             scored_segments: List of segments with 'start', 'end', 'score'
             duration: Total duration in seconds
+            bin_size: Optional fixed bin size in seconds (default: adaptive)
             
         Returns:
             Dict with 'bins', 'duration', 'bin_size'
@@ -112,9 +263,7 @@ class TimelineAnalyzer:
             print(f"WARNING: Invalid duration: {duration}")
             return {'bins': [], 'duration': 0, 'bin_size': 0}
         
-        # target around ~100 bins; min 20s, max 120s
-        target_bins = 100
-        bin_size = max(20, min(120, int(max(1, duration // target_bins))))
+        bin_size = int(bin_size) if bin_size else self.bin_size_for(duration)
         
         num_bins = int(duration / bin_size) + 1
         print(f"Timeline: Creating {num_bins} bins of {bin_size}s each")
@@ -130,48 +279,7 @@ class TimelineAnalyzer:
                 seg for seg in scored_segments
                 if seg['end'] > bin_start and seg['start'] < bin_end
             ]
-            
-            if bin_segments:
-                avg_score = sum(seg['score'] for seg in bin_segments) / len(bin_segments)
-                if avg_score >= 70:
-                    color, label = 'green', 'Strong'
-                elif avg_score >= 40:
-                    color, label = 'yellow', 'Okay'
-                else:
-                    color, label = 'red', 'Weak'
-                
-                bins.append({
-                    't0': round(bin_start, 1),      # for frontend compatibility
-                    't1': round(bin_end, 1),         # for frontend compatibility
-                    'start': round(bin_start, 1),    # legacy field
-                    'end': round(bin_end, 1),        # legacy field
-                    'score': round(avg_score, 1),
-                    'color': color,
-                    'label': label,
-                    'segment_count': len(bin_segments),
-                    'segments': [
-                        {
-                            'text': seg['text'][:100] + '...' if len(seg['text']) > 100 else seg['text'],
-                            'score': round(seg['score'], 1),
-                            'start': round(seg['start'], 1),
-                            'end': round(seg['end'], 1)
-                        }
-                        for seg in bin_segments
-                    ]
-                })
-            else:
-                # Empty bin - use neutral score
-                bins.append({
-                    't0': round(bin_start, 1),
-                    't1': round(bin_end, 1),
-                    'start': round(bin_start, 1),
-                    'end': round(bin_end, 1),
-                    'score': 50.0,
-                    'color': 'yellow',
-                    'label': 'No data',
-                    'segment_count': 0,
-                    'segments': []
-                })
+            bins.append(_make_bin(bin_start, bin_end, bin_segments))
         
         result = {
             'bins': bins,
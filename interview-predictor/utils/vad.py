@@ -0,0 +1,60 @@
+"""
+Energy VAD - fast numpy speech/non-speech framing for 16 kHz mono float32 audio
+- Frame RMS in dBFS against an adaptive noise floor
+- Incremental: feed audio in arbitrary chunks, state carries across calls
+"""
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def frame_db(audio: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30) -> np.ndarray:
+    """Per-frame RMS level in dBFS (trailing partial frame dropped)."""
+    frame_len = int(sample_rate * frame_ms / 1000)
+    n = len(audio) // frame_len
+    if n == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[:n * frame_len].reshape(n, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return (20.0 * np.log10(np.maximum(rms, 1e-6))).astype(np.float32)
+
+
+class EnergyVAD:
+    """
+    Adaptive-threshold energy detector. A frame is speech when it is
+    `margin_db` above the tracked noise floor and above `min_db`. The floor
+    drops immediately to quieter frames and rises slowly otherwise, so it
+    follows room noise without locking onto speech.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE, frame_ms: int = 30,
+                 margin_db: float = 10.0, min_db: float = -45.0, rise_db_per_frame: float = 0.05):
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.frame_len = int(sample_rate * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.rise_db_per_frame = rise_db_per_frame
+        self.noise_floor = None  # starts at min_db - margin_db, see process()
+        self._carry = np.zeros(0, dtype=np.float32)
+
+    def process(self, audio: np.ndarray) -> np.ndarray:
+        """Boolean speech flag per complete frame; leftover samples carry over."""
+        audio = np.concatenate([self._carry, audio]) if len(self._carry) else audio
+        levels = frame_db(audio, self.sample_rate, self.frame_ms)
+        self._carry = audio[len(levels) * self.frame_len:]
+
+        flags = np.zeros(len(levels), dtype=bool)
+        floor = self.noise_floor if self.noise_floor is not None else self.min_db - self.margin_db
+        for i, level in enumerate(levels):
+            floor = min(floor + self.rise_db_per_frame, float(level))
+            flags[i] = level > max(floor + self.margin_db, self.min_db)
+        self.noise_floor = floor
+        return flags
+
+    def speech_mask(self, audio: np.ndarray) -> np.ndarray:
+        """One-shot pass over a whole buffer (fresh state)."""
+        self.noise_floor = None
+        self._carry = np.zeros(0, dtype=np.float32)
+        return self.process(audio)